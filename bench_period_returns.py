@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import pandas as pd
+
+from price_store import PORTFOLIO_DIR, load_matrix
+from period_returns import BENCHMARK, summary
+
+def legacy_loop(directory=PORTFOLIO_DIR):
+    """The pre-vectorization per-file metrics (with its known errors), kept only as the timing baseline"""
+    spy = pd.read_csv(os.path.join(directory, f"{BENCHMARK}.csv"), parse_dates=['Date'], index_col='Date')
+    annualized_return_spy = (1 + spy['Close'].pct_change().mean()) ** 252 - 1
+    results = {}
+    for filename in os.listdir(directory):
+        if filename.endswith('.csv'):
+            df = pd.read_csv(os.path.join(directory, filename), parse_dates=['Date'], index_col='Date')
+            df['Returns'] = df['Close'].pct_change()
+            df.resample('W-MON').last()
+            weekly = (df['Close'].iloc[-1] - df['Open'].iloc[-6]) / df['Open'].iloc[-6] * 100
+            annualized_return = (1 + df['Returns'].mean()) ** 252 - 1
+            results[filename[:-4]] = (weekly, annualized_return, annualized_return / annualized_return_spy - 1)
+    return results
+
+def benchmark(directory=PORTFOLIO_DIR, repeat=5):
+    """Time the old per-file loop against loading the matrix once and running summary()"""
+    def best_of(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    legacy = best_of(lambda: legacy_loop(directory))
+    vectorized = best_of(lambda: summary(load_matrix(directory)['Close']))
+    close = load_matrix(directory)['Close']
+    compute_only = best_of(lambda: summary(close))
+    print(f"Per-file loop:            {legacy * 1000:8.1f} ms")
+    print(f"Load matrix + summary():  {vectorized * 1000:8.1f} ms")
+    print(f"summary() on loaded data: {compute_only * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    # python bench_period_returns.py [price dir]
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else PORTFOLIO_DIR)
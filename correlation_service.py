@@ -0,0 +1,220 @@
+import os
+import sys
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import linkage, fcluster
+from scipy.spatial.distance import squareform
+
+from price_store import SP500_DIR, SECTOR_DIR, PORTFOLIO_DIR
+from returns_matrix import build_returns, load_returns_matrix
+
+WINDOWS = (20, 60, 120)
+UNIVERSES = {
+    'portfolio': (PORTFOLIO_DIR,),
+    'sp500': (SP500_DIR, SECTOR_DIR),
+}
+CACHE_DIR = 'cache'
+
+class RollingCovariance:
+    """
+    Rolling covariance and correlation of N series over the last `window` rows.
+
+    Keeps a (window x N) ring buffer of returns and four N x N running sums over
+    the rows both series of a pair have (V = 1 where a return is present):
+    X'X, X'V, (X*X)'V and V'V. Appending k rows adds their products and
+    subtracts the k evicted rows', so an update costs O(k N^2) however long the
+    history is, and memory stays fixed at the buffer plus four matrices.
+    """
+
+    def __init__(self, tickers, window, rebuild_every=None):
+        self.tickers = list(tickers)
+        self.window = window
+        n = len(self.tickers)
+        self.buffer = np.full((window, n), np.nan)
+        self.head = 0  # Next slot to overwrite
+        self.xx = np.zeros((n, n))
+        self.xv = np.zeros((n, n))
+        self.qv = np.zeros((n, n))
+        self.vv = np.zeros((n, n))
+        self.last_date = None
+        self.version = None  # rows_version of the rows in the window, set by CorrelationService
+        # Subtracting evicted rows accumulates rounding error; rebuild from the buffer now and then
+        self.rebuild_every = rebuild_every or 4 * window
+        self._since_rebuild = 0
+
+    def _accumulate(self, rows, sign):
+        valid = ~np.isnan(rows)
+        x = np.where(valid, rows, 0.0)
+        v = valid.astype(np.float64)
+        self.xx += sign * (x.T @ x)
+        self.xv += sign * (x.T @ v)
+        self.qv += sign * ((x * x).T @ v)
+        self.vv += sign * (v.T @ v)
+
+    def rebuild(self):
+        """Recompute the running sums from the buffer"""
+        for m in (self.xx, self.xv, self.qv, self.vv):
+            m[:] = 0.0
+        self._accumulate(self.buffer, 1.0)
+        self._since_rebuild = 0
+
+    def append(self, rows, dates=None):
+        """Append a block of return rows (k x N, NaN where missing) in date order"""
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        if len(rows) == 0:
+            return
+        if len(rows) > self.window:
+            rows = rows[-self.window:]
+        slots = (self.head + np.arange(len(rows))) % self.window
+        self._accumulate(self.buffer[slots], -1.0)
+        self._accumulate(rows, 1.0)
+        self.buffer[slots] = rows
+        self.head = (self.head + len(rows)) % self.window
+        if dates is not None and len(dates):
+            self.last_date = pd.Timestamp(dates[-1])
+
+        self._since_rebuild += len(rows)
+        if self._since_rebuild >= self.rebuild_every:
+            self.rebuild()
+
+    def _min_periods(self, min_periods):
+        return min_periods if min_periods is not None else max(2, self.window // 2)
+
+    def covariance(self, min_periods=None):
+        """Pairwise-complete sample covariance over the window, like DataFrame.cov()"""
+        n = self.vv
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (self.xx - self.xv * self.xv.T / n) / (n - 1)
+        cov[n < self._min_periods(min_periods)] = np.nan
+        return pd.DataFrame(cov, index=self.tickers, columns=self.tickers)
+
+    def correlation(self, min_periods=None):
+        """Pairwise-complete correlation over the window, like DataFrame.corr()"""
+        n = self.vv
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * self.xx - self.xv * self.xv.T
+            var = n * self.qv - self.xv * self.xv
+            corr = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+        corr[n < self._min_periods(min_periods)] = np.nan
+        return pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
+
+def top_pairs(corr, k=10, absolute=False):
+    """The k most correlated distinct pairs in a correlation matrix, strongest first"""
+    values = corr.to_numpy()
+    i, j = np.triu_indices(len(values), 1)
+    pair = values[i, j]
+    score = np.abs(pair) if absolute else pair
+    score = np.where(np.isnan(score), -np.inf, score)
+    k = min(k, int(np.isfinite(score).sum()))
+    if k == 0:
+        return pd.DataFrame(columns=['Ticker 1', 'Ticker 2', 'Correlation'])
+    best = np.argpartition(-score, k - 1)[:k]
+    best = best[np.argsort(-score[best])]
+    names = np.asarray(corr.columns)
+    return pd.DataFrame({
+        'Ticker 1': names[i[best]],
+        'Ticker 2': names[j[best]],
+        'Correlation': pair[best],
+    })
+
+def clusters(corr, min_corr=0.7, method='average'):
+    """
+    Cluster id per ticker from hierarchical clustering on 1 - correlation, cut so
+    members of a cluster are (on average) correlated above min_corr. Pairs without
+    enough shared data count as uncorrelated; tickers with no data are left out.
+    """
+    has_data = corr.notna().sum(axis=1) > 1
+    corr = corr.loc[has_data, has_data]
+    if len(corr) < 2:
+        return pd.Series(1, index=corr.index, name='Cluster')
+    distance = 1.0 - corr.fillna(0.0).to_numpy()
+    np.fill_diagonal(distance, 0.0)
+    tree = linkage(squareform(distance, checks=False), method=method)
+    labels = fcluster(tree, t=1.0 - min_corr, criterion='distance')
+    return pd.Series(labels, index=corr.index, name='Cluster')
+
+def rows_version(returns):
+    """Content hash of a block of return rows, dates included"""
+    return hashlib.sha1(pd.util.hash_pandas_object(returns).to_numpy().tobytes()).hexdigest()
+
+class CorrelationService:
+    """
+    Rolling correlation state for one universe across several windows.
+
+    update() appends only the return rows newer than what the state has seen and
+    saves the state under cache/, so repeated runs after a price download cost
+    one small update instead of a full recompute. A change in the ticker set,
+    or in any row still inside a window (e.g. split-adjusted history after a
+    refresh), starts that window over.
+    """
+
+    def __init__(self, universe='portfolio', windows=WINDOWS, cache_dir=CACHE_DIR):
+        if universe not in UNIVERSES:
+            raise ValueError(f"Unknown universe {universe!r}; choose from {sorted(UNIVERSES)}")
+        self.universe = universe
+        self.windows = tuple(windows)
+        self.cache_file = os.path.join(cache_dir, f"correlation_{universe}.pkl")
+        self.state = {}
+        if os.path.exists(self.cache_file):
+            self.state = pd.read_pickle(self.cache_file)
+
+    def _returns(self):
+        directories = UNIVERSES[self.universe]
+        if self.universe == 'sp500':
+            # Reuse the cached S&P + sector returns matrix
+            return load_returns_matrix(directories)['returns']
+        return build_returns(directories)
+
+    def update(self, returns=None):
+        """Append new return rows (date x ticker) to every window; loads them from the price store if omitted"""
+        if returns is None:
+            returns = self._returns()
+        tickers = list(returns.columns)
+
+        def seen(rolling):
+            """Version of the input rows the window currently holds"""
+            if rolling.last_date is None:
+                return None
+            return rows_version(returns[returns.index <= rolling.last_date].iloc[-rolling.window:])
+
+        for window in self.windows:
+            rolling = self.state.get(window)
+            if rolling is None or rolling.tickers != tickers or getattr(rolling, 'version', None) != seen(rolling):
+                rolling = RollingCovariance(tickers, window)
+                self.state[window] = rolling
+            new = returns if rolling.last_date is None else returns[returns.index > rolling.last_date]
+            rolling.append(new.to_numpy(), new.index)
+            rolling.version = seen(rolling)
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        pd.to_pickle(self.state, self.cache_file)
+        return self
+
+    def correlation(self, window=WINDOWS[1]):
+        return self.state[window].correlation()
+
+    def covariance(self, window=WINDOWS[1]):
+        return self.state[window].covariance()
+
+    def top_pairs(self, window=WINDOWS[1], k=10, absolute=False):
+        return top_pairs(self.correlation(window), k, absolute)
+
+    def most_correlated_with(self, ticker, window=WINDOWS[1], k=10):
+        corr = self.correlation(window)[ticker].drop(ticker).dropna()
+        return corr.sort_values(ascending=False).head(k)
+
+    def clusters(self, window=WINDOWS[1], min_corr=0.7):
+        return clusters(self.correlation(window), min_corr)
+
+if __name__ == '__main__':
+    universe = sys.argv[1] if len(sys.argv) > 1 else 'portfolio'
+    service = CorrelationService(universe).update()
+    for window in service.windows:
+        print(f"\nTop correlated pairs, {window}-day window ({universe}):")
+        print(service.top_pairs(window, k=10).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    groups = service.clusters(WINDOWS[1])
+    print(f"\nClusters at correlation >= 0.7 ({WINDOWS[1]}-day window):")
+    for label, members in groups.groupby(groups).groups.items():
+        if len(members) > 1:
+            print(f"  {label}: {', '.join(members)}")
@@ -4,78 +4,203 @@ import matplotlib.pyplot as plt
 import mplfinance as mpf
 import yfinance as yf
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the NumPy lockstep kernel is used instead
+    njit = None
+
+def _dc_lanes_scalar(close, high, low, sigma, conf_i, ext_i, ext_p, ext_type, counts):
+    """
+    Directional change over (n_bars, n_lanes) arrays, one lane per (series, sigma).
+    Plain loops so numba can compile it; lanes start at their first non-NaN bar.
+    """
+    n_bars, n_lanes = close.shape
+    for j in range(n_lanes):
+        started = False
+        up_zig = True
+        tmp_max = tmp_min = 0.0
+        tmp_max_i = tmp_min_i = 0
+        k = 0
+        for i in range(n_bars):
+            if close[i, j] != close[i, j]:  # NaN bar
+                continue
+            if not started:
+                started = True
+                tmp_max, tmp_min = high[i, j], low[i, j]
+                tmp_max_i = tmp_min_i = i
+            if up_zig:
+                if high[i, j] > tmp_max:
+                    tmp_max = high[i, j]
+                    tmp_max_i = i
+                elif close[i, j] < tmp_max - tmp_max * sigma[j]:
+                    conf_i[j, k] = i
+                    ext_i[j, k] = tmp_max_i
+                    ext_p[j, k] = tmp_max
+                    ext_type[j, k] = 1
+                    k += 1
+                    up_zig = False
+                    tmp_min = low[i, j]
+                    tmp_min_i = i
+            else:
+                if low[i, j] < tmp_min:
+                    tmp_min = low[i, j]
+                    tmp_min_i = i
+                elif close[i, j] > tmp_min + tmp_min * sigma[j]:
+                    conf_i[j, k] = i
+                    ext_i[j, k] = tmp_min_i
+                    ext_p[j, k] = tmp_min
+                    ext_type[j, k] = -1
+                    k += 1
+                    up_zig = True
+                    tmp_max = high[i, j]
+                    tmp_max_i = i
+        counts[j] = k
+
+_dc_lanes_jit = njit(cache=True)(_dc_lanes_scalar) if njit is not None else None
+
+def _dc_lanes_numpy(close, high, low, sigma, conf_i, ext_i, ext_p, ext_type, counts):
+    """
+    Same state machine as _dc_lanes_scalar, but every lane advances in lockstep
+    with array operations, so the only Python loop is over bars, not lanes.
+    """
+    n_bars, n_lanes = close.shape
+    up_zig = np.ones(n_lanes, dtype=bool)
+    tmp_max = np.full(n_lanes, np.nan)
+    tmp_min = np.full(n_lanes, np.nan)
+    tmp_max_i = np.zeros(n_lanes, dtype=np.int64)
+    tmp_min_i = np.zeros(n_lanes, dtype=np.int64)
+    pending = True
+
+    for i in range(n_bars):
+        c, h, lo = close[i], high[i], low[i]
+        if pending:
+            fresh = np.isnan(tmp_max) & ~np.isnan(c)
+            if fresh.any():
+                tmp_max[fresh], tmp_min[fresh] = h[fresh], lo[fresh]
+                tmp_max_i[fresh] = tmp_min_i[fresh] = i
+                pending = np.isnan(tmp_max).any()
+
+        # NaN prices compare False everywhere, so missing bars leave the state alone
+        new_max = up_zig & (h > tmp_max)
+        new_min = ~up_zig & (lo < tmp_min)
+        top = up_zig & ~new_max & (c < tmp_max - tmp_max * sigma)
+        bottom = ~up_zig & ~new_min & (c > tmp_min + tmp_min * sigma)
+
+        np.copyto(tmp_max, h, where=new_max)
+        tmp_max_i[new_max] = i
+        np.copyto(tmp_min, lo, where=new_min)
+        tmp_min_i[new_min] = i
+
+        confirmed = top | bottom
+        if confirmed.any():
+            lanes = np.flatnonzero(confirmed)
+            k = counts[lanes]
+            is_top = top[lanes]
+            conf_i[lanes, k] = i
+            ext_i[lanes, k] = np.where(is_top, tmp_max_i[lanes], tmp_min_i[lanes])
+            ext_p[lanes, k] = np.where(is_top, tmp_max[lanes], tmp_min[lanes])
+            ext_type[lanes, k] = np.where(is_top, 1, -1)
+            counts[lanes] = k + 1
+
+            # The confirming bar opens the opposite leg
+            tmp_min[top], tmp_min_i[top] = lo[top], i
+            tmp_max[bottom], tmp_max_i[bottom] = h[bottom], i
+            up_zig ^= confirmed
+
+def directional_change_batch(close: np.array, high: np.array, low: np.array, sigmas):
+    """
+    Directional change tops and bottoms for a batch of sigma values in one pass.
+
+    Prices may be 1-D (n_bars,) or an aligned 2-D (n_bars, n_series) matrix with
+    NaN where a series has no data. Returns (conf_i, ext_i, ext_p, ext_type, counts)
+    with event arrays of shape (n_sigma, n_bars), or (n_series, n_sigma, n_bars)
+    for 2-D input, preallocated and filled in confirmation order; only the first
+    counts[..., s] entries along the last axis are events. ext_type is 1 for tops
+    and -1 for bottoms.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    single = close.ndim == 1
+    close = close.reshape(len(close), -1)
+    high = np.asarray(high, dtype=np.float64).reshape(close.shape)
+    low = np.asarray(low, dtype=np.float64).reshape(close.shape)
+    sigmas = np.atleast_1d(np.asarray(sigmas, dtype=np.float64))
+    n_bars, n_series = close.shape
+    n_sigma = len(sigmas)
+
+    # One lane per (series, sigma), series-major
+    lane_close = np.ascontiguousarray(np.repeat(close, n_sigma, axis=1))
+    lane_high = np.ascontiguousarray(np.repeat(high, n_sigma, axis=1))
+    lane_low = np.ascontiguousarray(np.repeat(low, n_sigma, axis=1))
+    lane_sigma = np.tile(sigmas, n_series)
+    n_lanes = lane_sigma.shape[0]
+
+    conf_i = np.zeros((n_lanes, n_bars), dtype=np.int64)
+    ext_i = np.zeros((n_lanes, n_bars), dtype=np.int64)
+    ext_p = np.full((n_lanes, n_bars), np.nan)
+    ext_type = np.zeros((n_lanes, n_bars), dtype=np.int8)
+    counts = np.zeros(n_lanes, dtype=np.int64)
+
+    kernel = _dc_lanes_jit if _dc_lanes_jit is not None else _dc_lanes_numpy
+    if n_bars:
+        kernel(lane_close, lane_high, lane_low, lane_sigma, conf_i, ext_i, ext_p, ext_type, counts)
+
+    shape = (n_sigma,) if single else (n_series, n_sigma)
+    return (conf_i.reshape(shape + (n_bars,)), ext_i.reshape(shape + (n_bars,)),
+            ext_p.reshape(shape + (n_bars,)), ext_type.reshape(shape + (n_bars,)),
+            counts.reshape(shape))
+
 def directional_change(close: np.array, high: np.array, low: np.array, sigma: float):
-    up_zig = True
-    tmp_max = high[0]
-    tmp_min = low[0]
-    tmp_max_i = 0
-    tmp_min_i = 0
+    conf_i, ext_i, ext_p, ext_type, counts = directional_change_batch(close, high, low, [sigma])
+    k = counts[0]
+    events = zip(conf_i[0, :k].tolist(), ext_i[0, :k].tolist(), ext_p[0, :k].tolist(), ext_type[0, :k].tolist())
 
     tops = []
     bottoms = []
-
-    for i in range(len(close)):
-        if up_zig:
-            if high[i] > tmp_max:
-                tmp_max = high[i]
-                tmp_max_i = i
-            elif close[i] < tmp_max - tmp_max * sigma:
-                top = [i, tmp_max_i, tmp_max]
-                tops.append(top)
-                up_zig = False
-                tmp_min = low[i]
-                tmp_min_i = i
-        else:
-            if low[i] < tmp_min:
-                tmp_min = low[i]
-                tmp_min_i = i
-            elif close[i] > tmp_min + tmp_min * sigma:
-                bottom = [i, tmp_min_i, tmp_min]
-                bottoms.append(bottom)
-                up_zig = True
-                tmp_max = high[i]
-                tmp_max_i = i
+    for conf, ext_idx, price, kind in events:
+        (tops if kind == 1 else bottoms).append([conf, ext_idx, price])
 
     return tops, bottoms
 
 def get_extremes(ohlc: pd.DataFrame, sigma: float):
-    tops, bottoms = directional_change(ohlc['Close'].values, ohlc['High'].values, ohlc['Low'].values, sigma)
-    tops = pd.DataFrame(tops, columns=['conf_i', 'ext_i', 'ext_p'])
-    bottoms = pd.DataFrame(bottoms, columns=['conf_i', 'ext_i', 'ext_p'])
-    tops['type'] = 1
-    bottoms['type'] = -1
-    extremes = pd.concat([tops, bottoms])
-    extremes = extremes.set_index('conf_i')
-    extremes = extremes.sort_index()
+    conf_i, ext_i, ext_p, ext_type, counts = directional_change_batch(
+        ohlc['Close'].values, ohlc['High'].values, ohlc['Low'].values, [sigma]
+    )
+    k = counts[0]
+    # Events already come out in confirmation order, so no concat/sort is needed
+    extremes = pd.DataFrame({
+        'ext_i': ext_i[0, :k],
+        'ext_p': ext_p[0, :k],
+        'type': ext_type[0, :k].astype(int),
+    }, index=pd.Index(conf_i[0, :k], name='conf_i'))
     return extremes
 
-# Fetch Apple stock data
-ticker = 'TSLA'
-data = yf.download(ticker, start='2024-01-01', end='2024-10-12')
-
-# Calculate extremes
-sigma = 0.02  # 2% retracement
-extremes = get_extremes(data, sigma)
+if __name__ == '__main__':
+    # Fetch Apple stock data
+    ticker = 'TSLA'
+    data = yf.download(ticker, start='2024-01-01', end='2024-10-12')
 
-# Visualization
-apds = []
+    # Calculate extremes
+    sigma = 0.02  # 2% retracement
+    extremes = get_extremes(data, sigma)
 
-# Create empty Series for tops and bottoms
-high_series = pd.Series(index=data.index, dtype=float)
-low_series = pd.Series(index=data.index, dtype=float)
+    # Visualization
+    apds = []
 
-# Plot tops and bottoms
-for _, row in extremes.iterrows():
-    ext_index = int(row['ext_i'])  # Ensure ext_i is an integer
-    if row['type'] == 1:  # Top
-        high_series.iloc[ext_index] = data['High'].iloc[ext_index]
-    elif row['type'] == -1:  # Bottom
-        low_series.iloc[ext_index] = data['Low'].iloc[ext_index]
+    # Create empty Series for tops and bottoms
+    high_series = pd.Series(index=data.index, dtype=float)
+    low_series = pd.Series(index=data.index, dtype=float)
 
-# Now add the plots
-apds.append(mpf.make_addplot(high_series, type='scatter', markersize=100, marker='^', color='red'))
-apds.append(mpf.make_addplot(low_series, type='scatter', markersize=100, marker='v', color='green'))
+    # Plot tops and bottoms
+    for _, row in extremes.iterrows():
+        ext_index = int(row['ext_i'])  # Ensure ext_i is an integer
+        if row['type'] == 1:  # Top
+            high_series.iloc[ext_index] = data['High'].iloc[ext_index]
+        elif row['type'] == -1:  # Bottom
+            low_series.iloc[ext_index] = data['Low'].iloc[ext_index]
 
-# Plot the candlestick chart with extremes
-mpf.plot(data, type='candle', addplot=apds, title=f"{ticker} with Directional Changes", ylabel='Price', volume=True)
+    # Now add the plots
+    apds.append(mpf.make_addplot(high_series, type='scatter', markersize=100, marker='^', color='red'))
+    apds.append(mpf.make_addplot(low_series, type='scatter', markersize=100, marker='v', color='green'))
 
+    # Plot the candlestick chart with extremes
+    mpf.plot(data, type='candle', addplot=apds, title=f"{ticker} with Directional Changes", ylabel='Price', volume=True)
@@ -1,5 +1,6 @@
 from flask import Flask, render_template, request
 from stock_fetcher import get_current_price
+from option_scenarios import STRATEGIES, scenario, parse_legs
 
 app = Flask(__name__)
 
@@ -16,6 +17,23 @@ def index():
 
     return render_template('index.html')
 
+@app.route('/scenario')
+def option_scenario():
+    # /scenario?ticker=AAPL&strategy=straddle&days=30  or  &legs=call:200:30:1,call:210:30:-1
+    ticker = request.args.get('ticker', '').upper()
+    days = request.args.get('days', '30')
+    if not ticker:
+        return render_template('scenario.html', strategies=STRATEGIES, result=None, days=days)
+    legs = request.args.get('legs')
+    try:
+        result = scenario(ticker, legs=parse_legs(legs) if legs else None,
+                          strategy=request.args.get('strategy', 'straddle'),
+                          days=int(days))
+    except (FileNotFoundError, KeyError, ValueError, IndexError):
+        return "No stored prices for that ticker, or an invalid position. Please try again."
+    return render_template('scenario.html', strategies=STRATEGIES, result=result, days=days,
+                           surface=result['surface'].iloc[::4].round(2).to_html(classes='surface'))
+
 if __name__ == "__main__":
     app.run(debug=True)
 
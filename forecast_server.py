@@ -0,0 +1,69 @@
+import sys
+import threading
+from flask import Flask, jsonify, request
+
+from price_store import SP500_DIR, list_tickers
+from predictor_features import load_features
+from predictor import prepare_universe, forecast_universe, configure_threads, THREADS
+from model_store import universe_key, find_artifacts, load_artifacts
+
+HOST = '127.0.0.1'
+PORT = 5050
+MAX_DAYS = 60
+
+class ForecastService:
+    """
+    Keeps one trained model and its scalers loaded and answers forecasts from
+    the cached feature matrices, so requests skip the Keras import and model load.
+    """
+
+    def __init__(self, path, directory=SP500_DIR):
+        self.directory = directory
+        self.model, self.scalers, self.meta = load_artifacts(path)
+        self.lock = threading.Lock()  # One model call at a time
+
+    def forecast(self, tickers=None, days=30):
+        """{ticker: [price day 1, ..., day n]} for the requested (default all) tickers, empty when days < 1"""
+        stored = set(list_tickers(self.directory))
+        tickers = [t for t in (tickers or self.scalers) if t in self.scalers and t in stored]
+        if not tickers or days < 1:
+            return {}
+        prepared, _ = prepare_universe(load_features(tickers, self.directory),
+                                       self.meta['sequence_length'], scalers=self.scalers)
+        if not prepared:
+            return {}
+        with self.lock:
+            forecasts = forecast_universe(self.model, prepared, days, self.meta['sequence_length'])
+        return {ticker: [round(float(v), 4) for v in row] for ticker, row in forecasts.iterrows()}
+
+def create_app(service):
+    app = Flask(__name__)
+
+    @app.route('/health')
+    def health():
+        return jsonify(service.meta)
+
+    @app.route('/forecast')
+    def forecast():
+        tickers = [t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()]
+        try:
+            days = int(request.args.get('days', 30))
+        except ValueError:
+            return jsonify({'error': 'days must be an integer'}), 400
+        days = max(1, min(days, MAX_DAYS))
+        return jsonify({'cutoff': service.meta['cutoff'], 'days': days,
+                        'forecasts': service.forecast(tickers or None, days)})
+
+    return app
+
+if __name__ == '__main__':
+    # python forecast_server.py [price dir] -- serves the latest model trained on that universe
+    directory = sys.argv[1] if len(sys.argv) > 1 else SP500_DIR
+    configure_threads(THREADS)
+    path = find_artifacts(universe_key(list_tickers(directory)))
+    if path is None:
+        sys.exit(f"No saved model for {directory}; run predictor.py --universe --dir {directory} first.")
+    service = ForecastService(path, directory)
+    service.forecast(list(service.scalers)[:1], 1)  # Warm up the model before taking requests
+    print(f"Serving forecasts from {path} on http://{HOST}:{PORT}/forecast?tickers=AAPL,MSFT&days=30")
+    create_app(service).run(host=HOST, port=PORT, threaded=True)
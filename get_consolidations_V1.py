@@ -1,7 +1,7 @@
 import os
 import logging
 import pandas as pd
-import pandas_ta as ta
+import indicators
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -25,7 +25,7 @@ def is_breaking_out(df, percentage=1.5, consolidation_periods=10, breakout_perio
 
     return False
 
-def additional_filters(df):
+def additional_filters(df, ticker=None, directory=None):
     # Uptrend filter
     sma50 = df['Close'].rolling(window=50).mean().iloc[-1]
     sma200 = df['Close'].rolling(window=200).mean().iloc[-1]
@@ -35,7 +35,10 @@ def additional_filters(df):
     uptrend = price > sma50 > sma200
     
     # Volatility filter
-    atr = ta.atr(df['High'], df['Low'], df['Close'], length=14).iloc[-1]
+    if ticker is not None:
+        atr = indicators.indicator(ticker, 'atr', directory, df=df, period=14, mamode='rma').iloc[-1]
+    else:
+        atr = indicators.atr(df['High'], df['Low'], df['Close'], 14, mamode='rma').iloc[-1]
     atr_percentage = (atr / price) * 100
     low_volatility = atr_percentage < 3  # Adjust this threshold as needed
     
@@ -80,7 +83,7 @@ def analyze_stocks(directory, **kwargs):
                     logging.info(f"  Volume increase: {(df['Volume'].iloc[-kwargs['breakout_periods']:].mean() / df['Volume'].iloc[-kwargs['consolidation_periods']:-kwargs['breakout_periods']].mean() - 1) * 100:.2f}%")
                     logging.info(f"  50 SMA: {df['Close'].rolling(window=50).mean().iloc[-1]:.2f}")
                     logging.info(f"  200 SMA: {df['Close'].rolling(window=200).mean().iloc[-1]:.2f}")
-                    atr = ta.atr(df['High'], df['Low'], df['Close'], length=14).iloc[-1]
+                    atr = indicators.indicator(filename[:-4], 'atr', directory, df=df, period=14, mamode='rma').iloc[-1]
                     atr_percentage = (atr / df['Close'].iloc[-1]) * 100
                     logging.info(f"  ATR %: {atr_percentage:.2f}%")
             else:
@@ -1,72 +1,215 @@
+import numpy as np
 import pandas as pd
 import yfinance as yf
 import plotly.graph_objects as go
-from finta import TA
 import os
+import sys
+import indicators
+from indicator_panel import load_panels
+from price_store import load_matrix, list_tickers, on_own_calendar
 
-def calculate_hma(df):
-    n1 = 5  # Shorter moving average period
-    n2 = 34  # Longer moving average period
-    df['HMA1'] = TA.HMA(df, period=n1)
-    df['HMA2'] = TA.HMA(df, period=n2)
+N1 = 5  # Shorter moving average period
+N2 = 34  # Longer moving average period
+CROSSOVER_COLUMNS = ['Ticker', 'Date', 'Direction', 'Confirmed', 'Confirm_Date', 'Lag']
+
+def calculate_hma(df, panel=None):
+    n1 = N1
+    n2 = N2
+    if panel is not None:
+        # Precomputed at ingest time by indicator_panel.write_panels
+        df['HMA1'] = panel[f'HMA{n1}']
+        df['HMA2'] = panel[f'HMA{n2}']
+    else:
+        df['HMA1'] = indicators.hma(df['Close'], n1)
+        df['HMA2'] = indicators.hma(df['Close'], n2)
     return df
 
-def detect_confirmed_hull_xover(df, n):
-    df = calculate_hma(df)
-    confirmed_crossovers = []
-    
-    # Check for crossovers in the last 'n' entries
-    recent_hma1 = df['HMA1'].tail(n)
-    recent_hma2 = df['HMA2'].tail(n)
-    
-    for i in range(1, len(recent_hma1)):
-        crossover_date = recent_hma1.index[i].date()
-        latest_close = df['Close'].iloc[-1]
-        
-        # Bullish crossover
-        if (recent_hma1.iloc[i-1] < recent_hma2.iloc[i-1] and recent_hma1.iloc[i] > recent_hma2.iloc[i]):
-            # Check CAHOLD condition
-            low_day_index = df['Low'].loc[crossover_date:].idxmin()
-            high_of_low_day = df.loc[low_day_index, 'High']
-            
-            if latest_close > high_of_low_day:
-                confirmed_crossovers.append((crossover_date, 'Bullish'))
-        
-        # Bearish crossover
-        elif (recent_hma1.iloc[i-1] > recent_hma2.iloc[i-1] and recent_hma1.iloc[i] < recent_hma2.iloc[i]):
-            # Check CBLOHD condition
-            high_day_index = df['High'].loc[crossover_date:].idxmax()
-            low_of_high_day = df.loc[high_day_index, 'Low']
-            
-            if latest_close < low_of_high_day:
-                confirmed_crossovers.append((crossover_date, 'Bearish'))
+def universe_bars(close, high, low, n1=N1, n2=N2, panels=None):
+    """
+    Long (ticker-major, date-ordered) bar table for aligned (date x ticker) frames,
+    with HMA1/HMA2 for every ticker. They come from the stored indicator panels
+    (indicator_panel.load_panels) where given and current; the other tickers are
+    computed together, per calendar group (price_store.on_own_calendar), so a
+    date one ticker lacks doesn't blank the others' windows. Dates a ticker has
+    no close for are dropped.
+    """
+    stored = {t: p for t, p in (panels or {}).items()
+              if t in close.columns and f'HMA{n1}' in p and f'HMA{n2}' in p}
+    hma = {'HMA1': pd.DataFrame({t: p[f'HMA{n1}'] for t, p in stored.items()}, index=close.index, dtype=float),
+           'HMA2': pd.DataFrame({t: p[f'HMA{n2}'] for t, p in stored.items()}, index=close.index, dtype=float)}
+    missing = [t for t in close.columns if t not in stored]
+    if missing:
+        computed = on_own_calendar(lambda f: {'HMA1': indicators.hma(f['Close'], n1),
+                                              'HMA2': indicators.hma(f['Close'], n2)},
+                                   {'Close': close[missing]})
+        hma = {name: pd.concat([hma[name], computed[name]], axis=1) for name in hma}
+    hma = {name: frame[close.columns] for name, frame in hma.items()}
+    closes = close.to_numpy(dtype=float)
+    columns = {
+        'High': high.to_numpy(dtype=float),
+        'Low': low.to_numpy(dtype=float),
+        'Close': closes,
+        'HMA1': hma['HMA1'].to_numpy(dtype=float),
+        'HMA2': hma['HMA2'].to_numpy(dtype=float),
+    }
+    valid = ~np.isnan(closes.T)
+    n_dates, n_tickers = closes.shape
+    bars = pd.DataFrame({name: values.T[valid] for name, values in columns.items()})
+    bars.insert(0, 'Date', np.tile(close.index.to_numpy(), n_tickers).reshape(n_tickers, n_dates)[valid])
+    bars.insert(0, 'Ticker', np.repeat(np.asarray(close.columns), n_dates).reshape(n_tickers, n_dates)[valid])
+    return bars
 
-    return confirmed_crossovers, df
-    
-directory = '/home/empadgett/myproject/sp500pricedata'
-n = 5
+def scan_hull_crossovers(bars, n=5, full_history=False):
+    """
+    HMA1/HMA2 crossovers with CAHOLD/CBLOHD confirmation for every ticker in bars.
+
+    Default mode looks at crossovers within the last n bars of each ticker and
+    confirms them as of the latest close, as detect_confirmed_hull_xover always
+    has: bullish needs the latest close above the high of the lowest-low day
+    since the crossover (CAHOLD), bearish the latest close below the low of the
+    highest-high day (CBLOHD).
+
+    full_history=True returns every crossover in the data instead, confirmed on
+    the first bar, before the next crossover, whose close clears the high of the
+    lowest-low day (or the low of the highest-high day) seen so far.
+
+    Returns a DataFrame of Ticker, Date, Direction, Confirmed, Confirm_Date and
+    Lag (bars from crossover to confirmation).
+    """
+    ticker = bars['Ticker']
+    pos = np.arange(len(bars))
+    diff = bars['HMA1'] - bars['HMA2']
+    prev = diff.groupby(ticker, sort=False).shift()
+    bullish = ((prev < 0) & (diff > 0)).to_numpy()
+    bearish = ((prev > 0) & (diff < 0)).to_numpy()
+
+    high = bars['High'].to_numpy()
+    low = bars['Low'].to_numpy()
+    close = bars['Close'].to_numpy()
+
+    if not full_history:
+        # The last n bars of each ticker hold n-1 bar-to-bar comparisons
+        recent = (bars.groupby(ticker, sort=False).cumcount(ascending=False) < n - 1).to_numpy()
+        bullish = bullish & recent
+        bearish = bearish & recent
 
-confirmed_stocks = []
+        # idxmin/idxmax of Low/High from each bar to the ticker's last bar: the first
+        # bar at or after d that is no worse than everything after it
+        rev = bars.iloc[::-1]
+        suffix_min = rev['Low'].groupby(rev['Ticker'], sort=False).cummin().to_numpy()[::-1]
+        suffix_max = rev['High'].groupby(rev['Ticker'], sort=False).cummax().to_numpy()[::-1]
+        low_day = pd.Series(np.where(low == suffix_min, pos, np.nan)).groupby(ticker.to_numpy(), sort=False).bfill()
+        high_day = pd.Series(np.where(high == suffix_max, pos, np.nan)).groupby(ticker.to_numpy(), sort=False).bfill()
+        latest_close = bars['Close'].groupby(ticker, sort=False).transform('last').to_numpy()
+        last_pos = pd.Series(pos).groupby(ticker.to_numpy(), sort=False).transform('last').to_numpy()
+
+        crossed = bullish | bearish
+        rows = np.flatnonzero(crossed)
+        low_rows = low_day.to_numpy()[rows].astype(np.int64)
+        high_rows = high_day.to_numpy()[rows].astype(np.int64)
+        confirmed = np.where(bullish[rows],
+                             latest_close[rows] > high[low_rows],
+                             latest_close[rows] < low[high_rows])
+        confirm_rows = np.where(confirmed, last_pos[rows], -1)
+    else:
+        crossed = bullish | bearish
+        rows = np.flatnonzero(crossed)
+
+        # Each crossover opens a segment that runs until the ticker's next crossover
+        segment = pd.Series(crossed.astype(np.int64)).groupby(ticker.to_numpy(), sort=False).cumsum().to_numpy()
+        key = [ticker.to_numpy(), segment]
+        direction = pd.Series(np.where(bullish, 1.0, np.where(bearish, -1.0, np.nan))).groupby(key, sort=False).ffill().to_numpy()
+
+        # High of the lowest-low day and low of the highest-high day so far in the segment
+        run_min = pd.Series(low).groupby(key, sort=False).cummin()
+        run_max = pd.Series(high).groupby(key, sort=False).cummax()
+        prev_min = run_min.groupby(key, sort=False).shift().to_numpy()
+        prev_max = run_max.groupby(key, sort=False).shift().to_numpy()
+        new_low = np.isnan(prev_min) | (low < prev_min)
+        new_high = np.isnan(prev_max) | (high > prev_max)
+        high_of_low_day = pd.Series(np.where(new_low, high, np.nan)).groupby(key, sort=False).ffill().to_numpy()
+        low_of_high_day = pd.Series(np.where(new_high, low, np.nan)).groupby(key, sort=False).ffill().to_numpy()
+
+        hit = ((direction == 1) & (close > high_of_low_day)) | ((direction == -1) & (close < low_of_high_day))
+        hit &= segment > 0
+        first_hit = pd.Series(np.where(hit, pos, np.nan)).groupby(key, sort=False).transform('min').to_numpy()
+        confirmed = ~np.isnan(first_hit[rows])
+        confirm_rows = np.where(confirmed, np.nan_to_num(first_hit[rows], nan=-1), -1).astype(np.int64)
+
+    dates = bars['Date'].to_numpy()
+    confirm_dates = np.where(confirmed, dates[confirm_rows], np.datetime64('NaT'))
+    return pd.DataFrame({
+        'Ticker': bars['Ticker'].to_numpy()[rows],
+        'Date': dates[rows],
+        'Direction': np.where(bullish[rows], 'Bullish', 'Bearish'),
+        'Confirmed': confirmed,
+        'Confirm_Date': pd.to_datetime(confirm_dates),
+        'Lag': np.where(confirmed, confirm_rows - rows, -1),
+    })
+
+def detect_confirmed_hull_xover(df, n, panel=None):
+    df = calculate_hma(df, panel)
+    bars = pd.DataFrame({
+        'Ticker': '', 'Date': df.index,
+        'High': df['High'].to_numpy(), 'Low': df['Low'].to_numpy(), 'Close': df['Close'].to_numpy(),
+        'HMA1': df['HMA1'].to_numpy(), 'HMA2': df['HMA2'].to_numpy(),
+    })
+    found = scan_hull_crossovers(bars, n)
+    found = found[found['Confirmed']]
+    confirmed_crossovers = [(date.date(), direction) for date, direction in zip(found['Date'], found['Direction'])]
+    return confirmed_crossovers, df
 
-for filename in os.listdir(directory):
-    if filename.endswith('.csv'):
-        file_path = os.path.join(directory, filename)
-        df = pd.read_csv(file_path, parse_dates=['Date'], index_col='Date')
-        confirmed_crossovers, df = detect_confirmed_hull_xover(df, n)
-        
-        if confirmed_crossovers:
-            stock_name = filename.split('.')[0]
-            for date, direction in confirmed_crossovers:
-                confirmed_stocks.append((stock_name, date, direction, df))
+def scan_universe_to_csv(directory, out_file, n=5, full_history=False, chunk_size=100):
+    """
+    Scan every ticker in directory and stream the crossover records to out_file.
 
-if confirmed_stocks:
-    print("Stocks with confirmed Hull MA crossovers:")
-    for stock, date, direction, df in confirmed_stocks:
-        print(f"{stock}: Confirmed {direction} on {date}")
+    Tickers are loaded and scanned chunk_size at a time (HMAs from the stored
+    indicator panels where current) and each chunk's records are appended to
+    the CSV before the next chunk is read, so memory stays bounded by the chunk
+    rather than the universe. The header row is always written, so an empty
+    universe or a scan without crossovers still reads back as an empty table.
+    Returns the number of records written.
+    """
+    tickers = list_tickers(directory)
+    os.makedirs(os.path.dirname(out_file) or '.', exist_ok=True)
+    written = 0
+    with open(out_file, 'w', newline='') as f:
+        pd.DataFrame(columns=CROSSOVER_COLUMNS).to_csv(f, index=False)
+        for start in range(0, len(tickers), chunk_size):
+            chunk = tickers[start:start + chunk_size]
+            prices = load_matrix(directory, fields=('High', 'Low', 'Close'), tickers=chunk)
+            bars = universe_bars(prices['Close'], prices['High'], prices['Low'],
+                                 panels=load_panels(chunk, directory))
+            records = scan_hull_crossovers(bars, n, full_history=full_history)
+            records[CROSSOVER_COLUMNS].to_csv(f, header=False, index=False, date_format='%Y-%m-%d')
+            written += len(records)
+    return written
 
-else:
-    print("No stocks with confirmed Hull MA crossovers found.")
+def read_crossovers(out_file, confirmed_only=True, chunksize=10000):
+    """Iterate the crossover records written by scan_universe_to_csv without loading them all"""
+    for chunk in pd.read_csv(out_file, parse_dates=['Date', 'Confirm_Date'], chunksize=chunksize):
+        if confirmed_only:
+            chunk = chunk[chunk['Confirmed']]
+        yield from chunk.itertuples(index=False)
 
+if __name__ == '__main__':
+    directory = '/home/empadgett/myproject/sp500pricedata'
+    n = 5
+    full_history = '--full-history' in sys.argv
+    out_file = os.path.join('reports', 'hull_crossovers_history.csv' if full_history else 'hull_crossovers.csv')
 
+    count = scan_universe_to_csv(directory, out_file, n, full_history=full_history)
+    print(f"{count} crossover records written to {out_file}")
 
+    confirmed_count = 0
+    for record in read_crossovers(out_file):
+        if confirmed_count == 0:
+            print("Stocks with confirmed Hull MA crossovers:")
+        confirmed_count += 1
+        if not full_history:
+            print(f"{record.Ticker}: Confirmed {record.Direction} on {record.Date.date()}")
 
+    if confirmed_count == 0:
+        print("No stocks with confirmed Hull MA crossovers found.")
+    elif full_history:
+        print(f"{confirmed_count} confirmed crossovers in history.")
@@ -2,28 +2,25 @@ import pandas as pd
 import plotly.graph_objects as go
 import yfinance as yf
 import os
+import indicators
 
-def calculate_atr(df, period=20):
+def calculate_atr(df, period=20, ticker=None, directory=None):
     """
     Calculate the Average True Range (ATR) for the given DataFrame.
     
     Parameters:
     df (DataFrame): DataFrame containing 'High', 'Low', 'Close' columns.
     period (int): The number of periods to calculate the ATR.
+    ticker, directory: When df is a stored price file, reuse the shared indicator cache.
     
     Returns:
     Series: ATR values.
     """
-    high_low = df['High'] - df['Low']
-    high_close = (df['High'] - df['Close'].shift(1)).abs()
-    low_close = (df['Low'] - df['Close'].shift(1)).abs()
-    
-    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    atr = true_range.rolling(window=period).mean()
-    
-    return atr
+    if ticker is not None:
+        return indicators.indicator(ticker, 'atr', directory, df=df, period=period)
+    return indicators.atr(df['High'], df['Low'], df['Close'], period)
 
-def detect_order_blocks(df):
+def detect_order_blocks(df, ticker=None, directory=None):
     """
     Detects order blocks based on ATR and specified candle patterns.
     
@@ -36,7 +33,7 @@ def detect_order_blocks(df):
     order_blocks = []
     
     # Calculate ATR
-    df['ATR'] = calculate_atr(df, period=20)
+    df['ATR'] = calculate_atr(df, period=20, ticker=ticker, directory=directory)
     
     start_index = max(len(df) - 11, 0) # contrain to past 7 days
     for i in range(start_index, len(df) - 4):
@@ -131,7 +128,7 @@ for filename in os.listdir(directory):
         df.reset_index(inplace=True)
 
         # Run order block detection
-        order_blocks = detect_order_blocks(df)
+        order_blocks = detect_order_blocks(df, filename[:-4], directory)
         
         if not order_blocks.empty:
             plot_order_blocks(df, order_blocks)
@@ -4,6 +4,7 @@ import yfinance as yf
 import matplotlib.pyplot as plt
 from scipy import stats
 from datetime import datetime, timedelta
+import indicators
 
 def get_stock_data(symbol, lookback=365):
     """Download stock data from Yahoo Finance"""
@@ -20,13 +21,20 @@ def get_stock_data(symbol, lookback=365):
 
 def calculate_atr(df, period=14):
     """Calculate Average True Range"""
-    df = df.copy()
-    df['H-L'] = df['High'] - df['Low']
-    df['H-PC'] = abs(df['High'] - df['Close'].shift(1))
-    df['L-PC'] = abs(df['Low'] - df['Close'].shift(1))
-    df['TR'] = df[['H-L', 'H-PC', 'L-PC']].max(axis=1)
-    df['ATR'] = df['TR'].rolling(period).mean()
-    return df['ATR']
+    return indicators.atr(df['High'], df['Low'], df['Close'], period)
+
+def extreme_point_mask(prices, direction='high'):
+    """Boolean mask of bars that are strict local highs (or lows) vs. both neighbours"""
+    prices = np.asarray(prices, dtype=float)
+    mask = np.zeros(len(prices), dtype=bool)
+    if len(prices) < 3:
+        return mask
+    mid = prices[1:-1]
+    if direction == 'high':
+        mask[1:-1] = (mid > prices[2:]) & (mid > prices[:-2])
+    else:
+        mask[1:-1] = (mid < prices[2:]) & (mid < prices[:-2])
+    return mask
 
 def find_trendline_points(df, direction='high', atr_multiplier=1.0, min_lookback=5, min_points=3):
     """
@@ -45,57 +53,52 @@ def find_trendline_points(df, direction='high', atr_multiplier=1.0, min_lookback
     min_points : int
         Minimum points required for valid trendline
     """
-    df = df.copy()
-    df['ATR'] = calculate_atr(df)
-    
-    # Start from x days before present
-    current_idx = len(df) - min_lookback
-    points = []
-    
     price_col = 'High' if direction == 'high' else 'Low'
-    
-    # Function to check if point is a local extreme
-    def is_extreme_point(idx):
-        if direction == 'high':
-            return (df[price_col].iloc[idx] > df[price_col].iloc[idx + 1] and 
-                   df[price_col].iloc[idx] > df[price_col].iloc[idx - 1])
-        else:
-            return (df[price_col].iloc[idx] < df[price_col].iloc[idx + 1] and 
-                   df[price_col].iloc[idx] < df[price_col].iloc[idx - 1])
-    
+    prices = df[price_col].to_numpy(dtype=float)
+    atr = np.asarray(calculate_atr(df), dtype=float)
+    # Day number of every bar, so distances are integer subtraction instead of Timestamp math
+    day_numbers = np.asarray(df.index.values, dtype='datetime64[D]').astype(np.int64)
+
+    # Only extreme points can ever be accepted, so walk those alone (newest first)
+    start_idx = len(df) - min_lookback
+    candidates = np.flatnonzero(extreme_point_mask(prices, direction))
+    candidates = candidates[(candidates > 10) & (candidates <= start_idx)][::-1]  # Keep some buffer at the start
+
+    points = []
+    # Running least-squares sums over accepted points, x measured in days from the first point
+    n = sum_x = sum_y = sum_xx = sum_xy = 0.0
+    origin_day = None
+
     consecutive_deviations = 0
     max_deviations = 3  # Number of consecutive deviations before stopping
-    
-    while current_idx > 10:  # Keep some buffer at the start
-        if len(points) < 2:
-            # Need at least 2 points to start checking ATR bounds
-            if is_extreme_point(current_idx):
-                points.append((df.index[current_idx], df[price_col].iloc[current_idx]))
-        else:
-            # Calculate current trendline
-            dates = [(pd.Timestamp(date) - pd.Timestamp(points[0][0])).days for date, _ in points]
-            prices = [price for _, price in points]
-            slope, intercept, r_value, _, _ = stats.linregress(dates, prices)
-            
-            # Project trendline to current point
-            days_diff = (df.index[current_idx] - pd.Timestamp(points[0][0])).days
-            projected_price = slope * days_diff + intercept
-            
-            # Check if point is within ATR bounds of trendline
-            current_price = df[price_col].iloc[current_idx]
-            current_atr = df['ATR'].iloc[current_idx]
-            
-            if is_extreme_point(current_idx):
-                if abs(current_price - projected_price) <= atr_multiplier * current_atr:
-                    points.append((df.index[current_idx], current_price))
-                    consecutive_deviations = 0
-                else:
-                    consecutive_deviations += 1
-                    if consecutive_deviations >= max_deviations and len(points) >= min_points:
-                        break
-        
-        current_idx -= 1
-    
+
+    for idx in candidates:
+        current_price = prices[idx]
+        if origin_day is None:
+            origin_day = day_numbers[idx]
+        x = float(day_numbers[idx] - origin_day)
+
+        if len(points) >= 2:
+            # Project current trendline to this point and check ATR bounds
+            denom = n * sum_xx - sum_x * sum_x
+            slope = (n * sum_xy - sum_x * sum_y) / denom if denom != 0 else 0.0
+            intercept = (sum_y - slope * sum_x) / n
+            projected_price = slope * x + intercept
+
+            if not abs(current_price - projected_price) <= atr_multiplier * atr[idx]:
+                consecutive_deviations += 1
+                if consecutive_deviations >= max_deviations and len(points) >= min_points:
+                    break
+                continue
+            consecutive_deviations = 0
+
+        points.append((df.index[idx], current_price))
+        n += 1
+        sum_x += x
+        sum_y += current_price
+        sum_xx += x * x
+        sum_xy += x * current_price
+
     return list(reversed(points)) if len(points) >= min_points else []
 
 def fit_trend_line(points):
@@ -1,6 +1,7 @@
 import os
 import yfinance as yf
 import pandas as pd
+from indicator_panel import write_panels
 
 # Function to fetch stock data
 def fetch_stock_data(ticker):
@@ -44,3 +45,7 @@ for i in range(len(df)):
         data.to_csv(csv_file_name, index=True)
 
         print(f"Data for {ticker} has been saved to {csv_file_name}.")
+
+# Precompute the indicator panel for the refreshed holdings
+written = write_panels(directory)
+print(f"Indicator panels updated for {len(written)} tickers.")
@@ -25,6 +25,17 @@ def calc_channel(source, high, low, length, slope, intercept):
     
     return std_dev, up_dev, dn_dev
 
+def channel_levels(data, length=200, upper_mult=2.0, lower_mult=2.0):
+    """Lower, middle and upper channel prices at the last bar, without plotting"""
+    close = data['Close'].to_numpy(dtype=float)
+    if len(close) < length:
+        return None
+    slope, average, intercept = calc_regression(close, length)
+    std_dev, up_dev, dn_dev = calc_channel(close, data['High'].to_numpy(dtype=float),
+                                           data['Low'].to_numpy(dtype=float), length, slope, intercept)
+    middle = (length - 1) * slope + intercept
+    return middle - lower_mult * std_dev, middle, middle + upper_mult * std_dev
+
 def linear_regression_channel(data, length=200, upper_mult=2.0, lower_mult=2.0):
     close = data['Close'].values
     high = data['High'].values
@@ -55,10 +66,11 @@ def linear_regression_channel(data, length=200, upper_mult=2.0, lower_mult=2.0):
     plt.legend()
     plt.show()
 
-# Fetch data from yfinance
-ticker = 'tsla'
-data = yf.download(ticker, start='2023-01-01', end='2024-10-04', progress=False)
+if __name__ == '__main__':
+    # Fetch data from yfinance
+    ticker = 'tsla'
+    data = yf.download(ticker, start='2023-01-01', end='2024-10-04', progress=False)
 
-# Call the function with the data
-linear_regression_channel(data)
+    # Call the function with the data
+    linear_regression_channel(data)
 
@@ -1,13 +1,17 @@
-import yfinance as yf
+import os
 import numpy as np
 import pandas as pd
-import mplfinance as mpf
 from datetime import datetime, timedelta
 
+from price_store import SP500_DIR, load_matrix
+
+PIVOT_WINDOW = 90
+FIB_WINDOW = 252
+
 def calculate_pivot_points(high, low, close):
     """Calculate all pivot points levels"""
     pivot = (high + low + close) / 3
-    
+
     # Standard pivot points
     r1 = 2 * pivot - low
     r2 = pivot + (high - low)
@@ -15,7 +19,7 @@ def calculate_pivot_points(high, low, close):
     s1 = 2 * pivot - high
     s2 = pivot - (high - low)
     s3 = low - 2 * (high - pivot)
-    
+
     # Fibonacci pivot points
     fib_r1 = pivot + 0.382 * (high - low)
     fib_r2 = pivot + 0.618 * (high - low)
@@ -23,7 +27,7 @@ def calculate_pivot_points(high, low, close):
     fib_s1 = pivot - 0.382 * (high - low)
     fib_s2 = pivot - 0.618 * (high - low)
     fib_s3 = pivot - 1.000 * (high - low)
-    
+
     return {
         'P': pivot,
         'R1': r1, 'R2': r2, 'R3': r3,
@@ -32,6 +36,21 @@ def calculate_pivot_points(high, low, close):
         'FibS1': fib_s1, 'FibS2': fib_s2, 'FibS3': fib_s3
     }
 
+def fibonacci_levels(high, low):
+    """Fibonacci retracement and extension levels of a high/low range"""
+    price_range = high - low
+    return {
+        'Ext 161.8%': high + price_range * 0.618,
+        'Ext 127.2%': high + price_range * 0.272,
+        '100%': high,
+        '78.6%': high - price_range * 0.214,
+        '61.8%': high - price_range * 0.382,
+        '50%': high - price_range * 0.5,
+        '38.2%': high - price_range * 0.618,
+        '23.6%': high - price_range * 0.764,
+        '0%': low,
+    }
+
 def calculate_all_pivot_points(data, window=120):
     """Calculate pivot points for the specified window"""
     recent_data = data.tail(window)
@@ -40,82 +59,120 @@ def calculate_all_pivot_points(data, window=120):
         recent_data['Low'].min(),
         recent_data['Close'].iloc[-1]
     )
-    
+
     # Sort levels from highest to lowest
     return sorted(list(pivots.values()), reverse=True)
 
 def calculate_fibonacci_levels(data):
     """Calculate Fibonacci retracement and extension levels"""
-    high = data['High'].max()
-    low = data['Low'].min()
-    price_range = high - low
-    
-    levels = {
-        'Ext 161.8%': high + price_range * 0.618,
-        'Ext 127.2%': high + price_range * 0.272,
-        '100%': high,
-        '78.6%': high - price_range * 0.214,
-        '61.8%': high - price_range * 0.382,
-        '50%': high - price_range * 0.5,
-        '38.2%': high - price_range * 0.618,
-        '23.6%': high - price_range * 0.764,
-        '0%': low,
-    }
-    
+    levels = fibonacci_levels(data['High'].max(), data['Low'].min())
     return sorted(list(levels.values()), reverse=True)
 
-# Fetch NVDA data
-ticker = 'tgt'
-data = yf.download(ticker, period='1y')
-
-# Calculate all levels
-pivot_levels = calculate_all_pivot_points(data, window=90)
-fib_levels = calculate_fibonacci_levels(data)
-
-# Combine all levels and remove duplicates
-all_levels = sorted(list(set(pivot_levels + fib_levels)), reverse=True)
-
-# Create plot lines for all levels
-plot_lines = []
-current_price = data['Close'].iloc[-1]
-
-# Create color-coded lines based on relation to current price
-for level in all_levels:
-    if level > current_price:
-        color = 'red'  # Resistance
-    elif level < current_price:
-        color = 'green'  # Support
-    else:
-        color = 'blue'  # Current level
-        
-    plot_lines.append(
-        mpf.make_addplot([level] * len(data), 
-                        color=color, 
-                        linestyle='--', 
-                        width=0.75)
-    )
+# Every pivot is a linear combination of (window high, window low, close) and every
+# retracement of (window high, window low), so the formulas above evaluated on unit
+# vectors give one coefficient matrix each
+_PIVOTS = calculate_pivot_points(*np.eye(3))
+_FIBS = fibonacci_levels(*np.eye(2))
+PIVOT_NAMES = list(_PIVOTS)
+FIB_NAMES = list(_FIBS)
+LEVEL_NAMES = PIVOT_NAMES + FIB_NAMES
+PIVOT_COEF = np.array(list(_PIVOTS.values()))
+FIB_COEF = np.array(list(_FIBS.values()))
+
+def rolling_levels(high, low, close, pivot_window=PIVOT_WINDOW, fib_window=FIB_WINDOW):
+    """
+    Standard/Fibonacci pivots and Fibonacci retracements at every bar.
+
+    Inputs are Series (one ticker) or aligned date x ticker DataFrames. Pivots use
+    the rolling high/low over pivot_window bars and the bar's close; retracements
+    use the rolling high/low over fib_window bars (shorter histories use what they
+    have). Levels are as of each bar's close. Returns a float32 array shaped
+    (n_bars, n_levels) or (n_bars, n_tickers, n_levels) in LEVEL_NAMES order.
+    """
+    def window_high_low(window):
+        hh = high.rolling(window, min_periods=1).max().to_numpy(dtype=np.float64)
+        ll = low.rolling(window, min_periods=1).min().to_numpy(dtype=np.float64)
+        return hh, ll
+
+    c = close.to_numpy(dtype=np.float64)
+    ph, pl = window_high_low(pivot_window)
+    fh, fl = window_high_low(fib_window)
+    pivots = np.stack([ph, pl, c], axis=-1) @ PIVOT_COEF.T
+    fibs = np.stack([fh, fl], axis=-1) @ FIB_COEF.T
+    return np.concatenate([pivots, fibs], axis=-1).astype(np.float32)
+
+def nearest_level_distance(levels, close):
+    """
+    Signed distance from each close to its nearest level, as a fraction of the close.
+
+    Positive means the nearest level is above (resistance), negative below
+    (support). Also returns the distances to the nearest level above and below.
+    """
+    c = np.asarray(close, dtype=np.float64)
+    diff = levels - c[..., None]
+    above = np.where(diff > 0, diff, np.inf).min(axis=-1)
+    below = np.where(diff < 0, -diff, np.inf).min(axis=-1)
+    nearest = np.where(above <= below, above, -below)
+    with np.errstate(invalid='ignore'):
+        to_frac = lambda d: np.where(np.isfinite(d), d / c, np.nan)
+        return to_frac(nearest), to_frac(above), to_frac(below)
+
+def universe_levels(directory=SP500_DIR, pivot_window=PIVOT_WINDOW, fib_window=FIB_WINDOW):
+    """
+    Rolling levels for every stored ticker at once.
+
+    Returns (levels, dates, tickers, nearest) where levels is the
+    (n_bars, n_tickers, n_levels) float32 array and nearest is a date x ticker
+    DataFrame of the signed nearest-level distance.
+    """
+    prices = load_matrix(directory, fields=('High', 'Low', 'Close'))
+    high, low, close = prices['High'], prices['Low'], prices['Close']
+    levels = rolling_levels(high, low, close, pivot_window, fib_window)
+    nearest, _, _ = nearest_level_distance(levels, close.to_numpy())
+    return levels, close.index, close.columns, pd.DataFrame(nearest, index=close.index, columns=close.columns)
 
-# Print levels analysis
-print(f"\nCurrent Price: ${current_price:.2f}")
-print("\nAll Price Levels (from highest to lowest):")
-for i, level in enumerate(all_levels, 1):
-    distance = level - current_price
-    percent = (distance / current_price) * 100
-    level_type = "Resistance" if level > current_price else "Support"
-    print(f"Level {i}: ${level:.2f} ({level_type}) - ${abs(distance):.2f} ({percent:.1f}%) {'above' if distance > 0 else 'below'} current price")
+def save_levels(path, levels, dates, tickers):
+    """Store a levels array compressed with its dates, tickers and level names"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez_compressed(path, levels=levels, dates=np.asarray(dates, dtype='datetime64[D]'),
+                        tickers=np.asarray(tickers, dtype=str), names=np.asarray(LEVEL_NAMES))
 
+if __name__ == '__main__':
+    import yfinance as yf
+    import mplfinance as mpf
 
+    # Fetch NVDA data
+    ticker = 'tgt'
+    data = yf.download(ticker, period='1y')
 
+    # All levels as of the last bar: pivots over 90 bars, Fibonacci over the full year
+    levels = rolling_levels(data['High'], data['Low'], data['Close'],
+                            pivot_window=90, fib_window=len(data))[-1]
+    all_levels = np.unique(levels)[::-1]
+    current_price = data['Close'].iloc[-1]
 
-# Plot
-mpf.plot(data, 
-         type='candle',
-         style='yahoo',
-         title=f'{ticker} with Pivot Points and Fibonacci Levels',
-         ylabel='Price ($)',
-         volume=True,
-         addplot=plot_lines,
-         figratio=(16,8),
-         figscale=1.2)
+    # One addplot per side instead of one full-length array per level
+    lines = pd.DataFrame(np.broadcast_to(all_levels, (len(data), len(all_levels))), index=data.index)
+    sides = [(all_levels > current_price, 'red'), (all_levels <= current_price, 'green')]  # Resistance, support
+    plot_lines = [mpf.make_addplot(lines.loc[:, side], color=color, linestyle='--', width=0.75)
+                  for side, color in sides if side.any()]
 
+    # Print levels analysis
+    print(f"\nCurrent Price: ${current_price:.2f}")
+    print("\nAll Price Levels (from highest to lowest):")
+    for i, level in enumerate(all_levels, 1):
+        distance = level - current_price
+        percent = (distance / current_price) * 100
+        level_type = "Resistance" if level > current_price else "Support"
+        print(f"Level {i}: ${level:.2f} ({level_type}) - ${abs(distance):.2f} ({percent:.1f}%) {'above' if distance > 0 else 'below'} current price")
 
+    # Plot
+    mpf.plot(data,
+             type='candle',
+             style='yahoo',
+             title=f'{ticker} with Pivot Points and Fibonacci Levels',
+             ylabel='Price ($)',
+             volume=True,
+             addplot=plot_lines,
+             figratio=(16,8),
+             figscale=1.2)
@@ -6,6 +6,8 @@ from datetime import datetime
 import logging
 import sys
 from contextlib import contextmanager
+from indicator_panel import write_panels
+from market_breadth import update_breadth
 
 @contextmanager
 def suppress_stdout():
@@ -139,6 +141,18 @@ try:
 
         logging.info("Stock data fetch process completed.")
 
+        # Precompute the indicator panel for every refreshed ticker
+        try:
+            write_panels(directory)
+        except Exception as e:
+            logging.error(f"Failed to write indicator panels: {e}")
+
+        # Append the new dates to the market breadth series
+        try:
+            update_breadth(directory)
+        except Exception as e:
+            logging.error(f"Failed to update market breadth: {e}")
+
 except sqlite3.Error as e:
     logging.error(f"Error connecting to database or creating table: {e}")
     logging.info(f"Current working directory: {os.getcwd()}")
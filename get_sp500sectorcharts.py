@@ -1,81 +1,63 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import os
-
-# Directory containing the CSV files
-directory = 'sp500sectorpricedata'
-
-# Initialize a DataFrame to hold performance data
-performance_data = []
-
-# Initialize a plot
-plt.figure(figsize=(12, 6))
-
-# Loop through all files in the directory
-for filename in os.listdir(directory):
-    if filename.endswith('.csv'):
-        # Construct full file path
-        file_path = os.path.join(directory, filename)
-
-        # Read the CSV file
-        data = pd.read_csv(file_path)
-
-        # Convert 'Date' column to datetime format
-        data['Date'] = pd.to_datetime(data['Date'])
-
-        # Calculate 20-day performance
-        if len(data) >= 20:
-            last_20_days = data['Close'][-20:]
-            performance_20_days = (last_20_days.iloc[-1] - last_20_days.iloc[0]) / last_20_days.iloc[0] * 100
-        else:
-            performance_20_days = None
-
-        # Calculate YTD performance
-        ytd_data = data[data['Date'] >= pd.to_datetime(f'{data["Date"].dt.year.iloc[0]}-01-01')]
-        if not ytd_data.empty:
-            performance_ytd = (ytd_data['Close'].iloc[-1] - ytd_data['Close'].iloc[0]) / ytd_data['Close'].iloc[0] * 100
-        else:
-            performance_ytd = None
-
-        # Get the description from the DataFrame and clean it
-        description = data['Description'].iloc[0].replace('SPDR Select Sector Fund - ', '')  # Clean description
-
-        # Append the performance metrics to the list
-        performance_data.append({
-            'Sector': filename[:-4],  # Remove '.csv' from filename
-            'Description': description,
-            '20-Day Performance (%)': performance_20_days,
-            'YTD Performance (%)': performance_ytd
-        })
-
-        # Normalize the Closing price for plotting
-        normalized_close = (data['Close'] - data['Close'].min()) / (data['Close'].max() - data['Close'].min())
-
-        # Plot the normalized Closing price with cleaned description in the label
-        plt.plot(data['Date'], normalized_close, label=f"{filename[:-4]} ({description})")  # Remove '.csv' from filename for the label
-
-# Create a DataFrame from the performance data
-performance_df = pd.DataFrame(performance_data)
-
-# Display the DataFrame
-print(performance_df)
-
-# Customize the plot
-plt.title('Normalized Closing Prices of S&P 500 Sectors')
-plt.xlabel('Date')
-plt.ylabel('Normalized Closing Price')
-plt.legend()
-plt.grid()
-plt.xticks(rotation=45)
-plt.tight_layout()
-
-# Show the plot
-plt.show()
-
-
-
-
-
-
 
+from price_store import SECTOR_DIR, list_tickers, ticker_path, load_matrix
+from period_returns import ytd_return
+import sector_rotation
 
+# Directory containing the CSV files
+directory = SECTOR_DIR
+
+def load_descriptions(directory=SECTOR_DIR):
+    """Cleaned fund description per sector ETF, from the first row of each CSV"""
+    descriptions = {}
+    for ticker in list_tickers(directory):
+        first = pd.read_csv(ticker_path(ticker, directory), usecols=['Description'], nrows=1)
+        descriptions[ticker] = first['Description'].iloc[0].replace('SPDR Select Sector Fund - ', '')
+    return pd.Series(descriptions)
+
+def sector_performance(close, descriptions):
+    """20-day and YTD performance (%) for every sector, from the aligned close matrix"""
+    filled = close.ffill()
+    counts = close.notna().sum()
+    # Change over the last 20 bars, first to last (as before)
+    performance_20_days = ((filled.iloc[-1] / filled.iloc[-20] - 1) * 100).to_numpy() if len(close) >= 20 else None
+    performance_df = pd.DataFrame({
+        'Sector': close.columns,
+        'Description': descriptions.reindex(close.columns).to_numpy(),
+        '20-Day Performance (%)': performance_20_days,
+        'YTD Performance (%)': (ytd_return(close) * 100).to_numpy(),
+    })
+    performance_df.loc[(counts < 20).to_numpy(), '20-Day Performance (%)'] = None
+    return performance_df
+
+def plot_normalized(close, descriptions):
+    """Min-max normalized closing price of every sector on one chart"""
+    normalized = (close - close.min()) / (close.max() - close.min())
+    plt.figure(figsize=(12, 6))
+    for ticker in normalized.columns:
+        series = normalized[ticker].dropna()
+        plt.plot(series.index, series, label=f"{ticker} ({descriptions.get(ticker, '')})")
+    plt.title('Normalized Closing Prices of S&P 500 Sectors')
+    plt.xlabel('Date')
+    plt.ylabel('Normalized Closing Price')
+    plt.legend()
+    plt.grid()
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == '__main__':
+    close = load_matrix(directory)['Close']
+    descriptions = load_descriptions(directory)
+
+    # Display the performance table
+    performance_df = sector_performance(close, descriptions)
+    print(performance_df)
+
+    # Rotation ranks, relative strength and breadth; also written out for backtests
+    rotation = sector_rotation.run(sector_dir=directory)
+    print("\nSector rotation ranks (1 = strongest momentum):")
+    print(rotation['rank'].iloc[-1].sort_values().to_string())
+
+    plot_normalized(close, descriptions)
@@ -18,20 +18,24 @@ def get_sp500_tickers():
         # The first table contains the S&P 500 companies
         sp500_table = tables[0]
 
-        # Extract the tickers
+        # Extract the tickers and their GICS sectors
         tickers = sp500_table['Symbol'].tolist()
+        sectors = sp500_table['GICS Sector'].tolist()
 
         # Check for 'xxxx.x' tickers and add 'xxxx-x' versions
         additional_tickers = []
-        for ticker in tickers:
+        additional_sectors = []
+        for ticker, sector in zip(tickers, sectors):
             if re.match(r'^.+\.[A-Z]$', ticker):
                 additional_tickers.append(ticker[:-2] + '-' + ticker[-1])
+                additional_sectors.append(sector)
 
         # Add the additional tickers to the list
         tickers.extend(additional_tickers)
+        sectors.extend(additional_sectors)
 
-        # Create a DataFrame from the list
-        df = pd.DataFrame(tickers, columns=['Ticker'])
+        # Create a DataFrame from the list; the sector feeds sector_rotation.py
+        df = pd.DataFrame({'Ticker': tickers, 'Sector': sectors})
 
         # Get the user's home directory
         home_dir = os.path.expanduser("~")
@@ -53,6 +57,7 @@ def get_sp500_tickers():
         cur.execute('''
             CREATE TABLE IF NOT EXISTS tickers (
                 Ticker TEXT PRIMARY KEY,
+                Sector TEXT,
                 timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
                 status TEXT DEFAULT 'pending'
             )
@@ -0,0 +1,108 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+import indicators
+from price_store import SP500_DIR, list_tickers, ticker_path, file_version, load_matrix, on_own_calendar
+
+# Panels live next to the price CSVs, in a subdirectory the *.csv scanners skip
+PANEL_SUBDIR = 'panel'
+MANIFEST = 'versions.json'
+PANEL_FORMAT = 2  # Part of each manifest version; bump when the stored panel changes
+VOLATILITY_WINDOW = 21
+
+def panel_dir(directory=SP500_DIR):
+    return os.path.join(directory, PANEL_SUBDIR)
+
+def compute_panels(high, low, close):
+    """
+    Standard indicator panel for aligned (date x ticker) high/low/close frames.
+
+    Returns a dict of column name -> (date x ticker) frame. Tickers sharing a
+    calendar are computed together; each group only sees its own dates, so a
+    weekend-trading ticker doesn't put NaN gaps into every stock's windows.
+    """
+    return on_own_calendar(lambda f: _panels(f['High'], f['Low'], f['Close']),
+                           {'High': high, 'Low': low, 'Close': close})
+
+def _panels(high, low, close):
+    returns = close.pct_change(fill_method=None)
+    return {
+        'Returns': returns,
+        'Log_Returns': np.log(close).diff(),
+        'ATR14': indicators.atr(high, low, close, 14),
+        'ATR20': indicators.atr(high, low, close, 20),
+        'SMA20': indicators.sma(close, 20),
+        'SMA50': indicators.sma(close, 50),
+        'SMA200': indicators.sma(close, 200),
+        'EMA20': indicators.ema(close, 20),
+        'HMA5': indicators.hma(close, 5),
+        'HMA34': indicators.hma(close, 34),
+        'Volatility21': returns.rolling(VOLATILITY_WINDOW).std() * np.sqrt(252),
+    }
+
+def _panel_version(ticker, directory):
+    return f"{PANEL_FORMAT}-{file_version(ticker_path(ticker, directory))}"
+
+def _read_manifest(directory):
+    path = os.path.join(panel_dir(directory), MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_panels(directory=SP500_DIR, tickers=None, force=False):
+    """
+    Compute and store the indicator panel for every ticker whose prices changed.
+
+    Each panel is written to <directory>/panel/<ticker>.csv at full float
+    precision and the price file's content hash is recorded in the manifest, so
+    later runs skip unchanged tickers. Returns the list of tickers that were
+    (re)written.
+    """
+    tickers = list_tickers(directory) if tickers is None else list(tickers)
+    manifest = _read_manifest(directory)
+    versions = {ticker: _panel_version(ticker, directory) for ticker in tickers}
+    stale = [t for t in tickers if force or manifest.get(t) != versions[t]]
+    if not stale:
+        logging.info("Indicator panels are up to date.")
+        return []
+
+    prices = load_matrix(directory, fields=('High', 'Low', 'Close'), tickers=stale)
+    panels = compute_panels(prices['High'], prices['Low'], prices['Close'])
+
+    out_dir = panel_dir(directory)
+    os.makedirs(out_dir, exist_ok=True)
+    for ticker in stale:
+        # Drop the union-calendar rows this ticker has no price for
+        valid = prices['Close'][ticker].notna()
+        panel = pd.DataFrame({name: frame[ticker] for name, frame in panels.items()})[valid]
+        panel.to_csv(os.path.join(out_dir, f"{ticker}.csv"), index_label='Date')
+        manifest[ticker] = versions[ticker]
+
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    logging.info(f"Wrote indicator panels for {len(stale)} tickers to {out_dir}.")
+    return stale
+
+def load_panels(tickers, directory=SP500_DIR):
+    """{ticker: stored indicator panel} for the tickers whose panel is present and current"""
+    manifest = _read_manifest(directory)
+    panels = {}
+    for ticker in tickers:
+        path = os.path.join(panel_dir(directory), f"{ticker}.csv")
+        if os.path.exists(path) and manifest.get(ticker) == _panel_version(ticker, directory):
+            panels[ticker] = pd.read_csv(path, parse_dates=['Date'], index_col='Date', float_precision='round_trip')
+    return panels
+
+def load_panel(ticker, directory=SP500_DIR):
+    """Stored indicator panel for ticker, or None if it is missing or older than the prices"""
+    return load_panels([ticker], directory).get(ticker)
+
+if __name__ == '__main__':
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    for directory in sys.argv[1:] or [SP500_DIR]:
+        write_panels(directory)
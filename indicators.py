@@ -0,0 +1,200 @@
+import os
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from price_store import SP500_DIR, ticker_path, file_version, load_prices
+
+CACHE_DIR = os.path.join('cache', 'indicators')
+
+def _values(x):
+    """Float array view of a Series/DataFrame/array, shaped (n_bars,) or (n_bars, n_series)"""
+    return np.asarray(x, dtype=np.float64)
+
+def _wrap(values, like):
+    """Return values with the index/columns of like when like is a pandas object"""
+    if isinstance(like, pd.Series):
+        return pd.Series(values, index=like.index, name=like.name)
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(values, index=like.index, columns=like.columns)
+    return values
+
+def _rolling_sum(a, period):
+    """Rolling sum along axis 0, NaN wherever the window holds a NaN or is incomplete"""
+    out = np.full(a.shape, np.nan)
+    if period > len(a):
+        return out
+    missing = np.isnan(a)
+    csum = np.cumsum(np.where(missing, 0.0, a), axis=0)
+    cmiss = np.cumsum(missing, axis=0)
+    out[period - 1] = csum[period - 1]
+    out[period:] = csum[period:] - csum[:-period]
+    gaps = cmiss[period - 1:].copy()
+    gaps[1:] -= cmiss[:-period]
+    out[period - 1:][gaps > 0] = np.nan
+    return out
+
+def sma(close, period=20):
+    """Simple moving average"""
+    return _wrap(_rolling_sum(_values(close), period) / period, close)
+
+def wma(close, period=10):
+    """Linearly weighted moving average (newest bar weighted period, oldest 1)"""
+    a = _values(close)
+    out = np.full(a.shape, np.nan)
+    if period <= len(a):
+        weights = np.arange(1, period + 1, dtype=np.float64)
+        windows = sliding_window_view(a, period, axis=0)
+        out[period - 1:] = windows @ (weights / weights.sum())
+    return _wrap(out, close)
+
+def ema(close, period=20):
+    """Exponential moving average, span=period, seeded from the first bar"""
+    frame = pd.DataFrame(_values(close).reshape(len(close), -1))
+    out = frame.ewm(span=period, min_periods=period, adjust=False).mean().to_numpy()
+    return _wrap(out.reshape(np.shape(close)), close)
+
+def hma(close, period=34):
+    """Hull moving average: WMA(2*WMA(n/2) - WMA(n), sqrt(n)), same lengths as finta's TA.HMA"""
+    a = _values(close)
+    half_length = int(period / 2)
+    sqrt_length = int(np.sqrt(period))
+    delta = 2 * wma(a, half_length) - wma(a, period)
+    return _wrap(wma(delta, sqrt_length), close)
+
+def rma(values, period=14):
+    """Wilder's moving average (EMA with alpha = 1/period), seeded from the first value"""
+    a = _values(values)
+    frame = pd.DataFrame(a.reshape(len(a), -1))
+    out = frame.ewm(alpha=1 / period, min_periods=period, adjust=False).mean().to_numpy()
+    return _wrap(out.reshape(a.shape), values)
+
+def rsi(close, period=14):
+    """Relative Strength Index with Wilder smoothing of gains and losses"""
+    c = _values(close)
+    delta = np.full(c.shape, np.nan)
+    delta[1:] = c[1:] - c[:-1]
+    avg_gain = _values(rma(np.where(np.isnan(delta), np.nan, np.fmax(delta, 0.0)), period))
+    avg_loss = _values(rma(np.where(np.isnan(delta), np.nan, np.fmax(-delta, 0.0)), period))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = 100 * avg_gain / (avg_gain + avg_loss)
+    return _wrap(out, close)
+
+def true_range(high, low, close):
+    """True range; the first bar has no previous close and falls back to high - low"""
+    h, l, c = _values(high), _values(low), _values(close)
+    prev_close = np.empty_like(c)
+    prev_close[0] = np.nan
+    prev_close[1:] = c[:-1]
+    tr = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+    return _wrap(tr, close)
+
+def atr(high, low, close, period=14, mamode='sma'):
+    """
+    Average True Range.
+
+    mamode 'sma' is the plain rolling mean used by the scanners; 'rma' is Wilder's
+    smoothing (alpha = 1/period), the pandas_ta default.
+    """
+    tr = _values(true_range(high, low, close))
+    if mamode == 'sma':
+        out = _rolling_sum(tr, period) / period
+    elif mamode == 'rma':
+        out = rma(tr, period)
+    else:
+        raise ValueError(f"Unknown ATR mamode: {mamode}")
+    return _wrap(out, close)
+
+# Indicator name -> function of an OHLCV frame and keyword params
+INDICATORS = {
+    'sma': lambda df, period=20, column='Close': sma(df[column], period),
+    'ema': lambda df, period=20, column='Close': ema(df[column], period),
+    'wma': lambda df, period=10, column='Close': wma(df[column], period),
+    'hma': lambda df, period=34, column='Close': hma(df[column], period),
+    'atr': lambda df, period=14, mamode='sma': atr(df['High'], df['Low'], df['Close'], period, mamode),
+    'true_range': lambda df: true_range(df['High'], df['Low'], df['Close']),
+    'rsi': lambda df, period=14, column='Close': rsi(df[column], period),
+}
+
+class IndicatorCache:
+    """
+    LRU memo of indicator values keyed by (group, data version, spec), backed by
+    one pickle per key in cache_dir/<group>/ so other scripts and later runs
+    reuse them. Writing a new version of a group deletes its older files.
+    """
+
+    def __init__(self, maxsize=4096, cache_dir=CACHE_DIR):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._store = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, group, version, spec):
+        digest = hashlib.sha1(repr(spec).encode()).hexdigest()
+        return os.path.join(self.cache_dir, group, f"{version}_{digest}.pkl")
+
+    def _prune(self, group, version):
+        """Remove the group's files written for any other data version"""
+        folder = os.path.join(self.cache_dir, group)
+        for name in os.listdir(folder):
+            if not name.startswith(f"{version}_"):
+                os.remove(os.path.join(folder, name))
+
+    def get_or_compute(self, group, version, spec, compute):
+        key = (group, version, spec)
+        if key in self._store:
+            self._store.move_to_end(key)
+            self.hits += 1
+            return self._store[key]
+        path = self._path(group, version, spec) if self.cache_dir else None
+        if path and os.path.exists(path):
+            self.hits += 1
+            value = pd.read_pickle(path)
+        else:
+            self.misses += 1
+            value = compute()
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                pd.to_pickle(value, path)
+                self._prune(group, version)
+        self._store[key] = value
+        if len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop the in-process entries; the files under cache_dir are kept"""
+        self._store.clear()
+
+    def __len__(self):
+        return len(self._store)
+
+_cache = IndicatorCache()
+
+def indicator(ticker, name, directory=SP500_DIR, df=None, version=None, **params):
+    """
+    Memoized indicator for a stored ticker, indexed like df (or the stored prices).
+
+    The data version defaults to the content hash of the ticker's price file, so
+    values are reused (in-process and from cache/indicators) until the file
+    changes. Pass df, the ticker's rows as the caller already loaded them, to
+    skip re-reading the prices. Only the raw values are cached; the result gets
+    the caller's index, so a frame read with a RangeIndex and one indexed by
+    Date each get their own index back.
+    """
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}")
+    if version is None:
+        version = file_version(ticker_path(ticker, directory))
+    frame = load_prices(ticker, directory) if df is None else df
+    group = os.path.join(os.path.basename(os.path.normpath(directory)), ticker)
+    spec = (name, tuple(sorted(params.items())), len(frame))
+    values = _cache.get_or_compute(group, version, spec,
+                                   lambda: _values(INDICATORS[name](frame, **params)))
+    return pd.Series(values, index=frame.index, name=name)
+
+def cache_info():
+    return {'hits': _cache.hits, 'misses': _cache.misses, 'size': len(_cache), 'maxsize': _cache.maxsize}
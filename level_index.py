@@ -0,0 +1,204 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+import indicators
+from price_store import SP500_DIR, list_tickers, load_prices, data_version
+
+CACHE_DIR = 'cache'
+ATR_PERIOD = 14
+KDE_LOOKBACK = 75
+CLUSTER_ATR = 0.25  # Levels this close (in ATR) count as the same zone
+
+# Detector name -> function(df) returning price levels for the latest bar
+def kde_levels(df):
+    """Market-profile (KDE) peaks from mp_support_resist over the last KDE_LOOKBACK closes"""
+    from mp_support_resist import find_levels
+    if len(df) <= KDE_LOOKBACK:
+        return []
+    log_atr = indicators.atr(np.log(df['High']), np.log(df['Low']), np.log(df['Close']),
+                             KDE_LOOKBACK, mamode='rma').iloc[-1]
+    levels, *_ = find_levels(np.log(df['Close'].to_numpy()[-KDE_LOOKBACK:]), log_atr)
+    return levels
+
+def pivot_levels(df):
+    """Standard/Fibonacci pivots and Fibonacci retracements from get_s_r at the last bar"""
+    from get_s_r import rolling_levels
+    return rolling_levels(df['High'], df['Low'], df['Close'])[-1]
+
+def regression_levels(df):
+    """Lower, middle and upper regression channel at the last bar"""
+    from get_regressionchannel import channel_levels
+    return channel_levels(df) or []
+
+def trendline_levels(df):
+    """Resistance and support trendlines from get_peeeks projected to the last date"""
+    from get_peeeks import find_trendline_points, fit_trend_line
+    levels = []
+    for direction in ('high', 'low'):
+        line = fit_trend_line(find_trendline_points(df, direction=direction))
+        if line is not None:
+            days = (df.index[-1] - pd.Timestamp(line['start_date'])).days
+            levels.append(line['intercept'] + line['slope'] * days)
+    return levels
+
+def volume_levels(df):
+    """Point of control and value-area edges of the volume profile"""
+    from volume_profile import volume_profile, profile_levels
+    return list(profile_levels(*volume_profile(df)))
+
+DETECTORS = {
+    'kde': kde_levels,
+    'pivot': pivot_levels,
+    'regression': regression_levels,
+    'trendline': trendline_levels,
+    'volume': volume_levels,
+}
+
+class LevelIndex:
+    """
+    Price levels from every detector for a universe of tickers, in one sorted array.
+
+    Levels are keyed by (ticker id, log price) so each ticker occupies a
+    contiguous sorted run; a band query for the whole universe is two
+    searchsorted calls, O(log n) per ticker. Per-detector cumulative counts
+    along the same order give the number of distinct detectors in any band.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self.tickers = []
+        self._ids = {}
+        self.sources = list(DETECTORS)
+        self.atr = {}
+        self.last_close = pd.Series(dtype=np.float64)
+        self.keys = np.empty(0)
+        self.prices = np.empty(0)
+        self.source_ids = np.empty(0, dtype=np.int8)
+
+    def add(self, ticker, levels, source):
+        """Queue levels for a ticker; call build() once everything is added"""
+        if source not in self.sources:
+            self.sources.append(source)
+        if ticker not in self._ids:
+            self._ids[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        levels = np.asarray(levels, dtype=np.float64).ravel()
+        levels = levels[np.isfinite(levels) & (levels > 0)]
+        self._pending.append((self._ids[ticker], levels, self.sources.index(source)))
+
+    def build(self):
+        """Sort everything added so far into the searchable arrays"""
+        if not self._pending:
+            return self
+        ids = np.concatenate([np.full(len(l), t) for t, l, _ in self._pending])
+        prices = np.concatenate([l for _, l, _ in self._pending])
+        sources = np.concatenate([np.full(len(l), s, dtype=np.int8) for _, l, s in self._pending])
+        keys = self._key(ids, prices)
+        order = np.argsort(keys, kind='stable')
+        self.keys = np.concatenate([self.keys, keys[order]])
+        self.prices = np.concatenate([self.prices, prices[order]])
+        self.source_ids = np.concatenate([self.source_ids, sources[order]])
+        if len(self.keys) > len(order):
+            merged = np.argsort(self.keys, kind='stable')
+            self.keys, self.prices, self.source_ids = self.keys[merged], self.prices[merged], self.source_ids[merged]
+        # Row s: how many levels of detector s come before each position
+        hits = self.source_ids[None, :] == np.arange(len(self.sources))[:, None]
+        self._source_counts = np.concatenate([np.zeros((len(self.sources), 1), int), np.cumsum(hits, axis=1)], axis=1)
+        self._pending = []
+        return self
+
+    @staticmethod
+    def _key(ids, prices):
+        # Log prices of any stock sit far inside (-50, 50), so ticker runs never overlap
+        return ids * 100.0 + np.log(np.clip(prices, 1e-12, None))
+
+    def _bounds(self, ids, low, high):
+        lo = np.searchsorted(self.keys, self._key(ids, low), side='left')
+        hi = np.searchsorted(self.keys, self._key(ids, high), side='right')
+        return lo, hi
+
+    def query(self, prices, atr, within=1.0):
+        """
+        Levels within `within` ATR of the given price for every ticker in prices.
+
+        prices and atr are Series indexed by ticker. Returns a DataFrame with the
+        number of levels in the band (Confluence), how many detectors they come
+        from, and the nearest level inside the band above and below the price.
+        """
+        prices, atr = prices.align(atr, join='inner')
+        known = prices.index.isin(self.tickers) & (atr > 0).to_numpy()
+        prices, atr = prices[known], atr[known]
+        ids = prices.index.map(self._ids).to_numpy(dtype=np.int64)
+        p, a = prices.to_numpy(dtype=np.float64), atr.to_numpy(dtype=np.float64)
+
+        lo, hi = self._bounds(ids, p - within * a, p + within * a)
+        split = self._bounds(ids, p, p)[0]
+        detectors = ((self._source_counts[:, hi] - self._source_counts[:, lo]) > 0).sum(axis=0)
+        below = np.where(split > lo, self.prices[np.maximum(split - 1, 0)], np.nan)
+        above = np.where(hi > split, self.prices[np.minimum(split, len(self.prices) - 1)], np.nan)
+        return pd.DataFrame({
+            'Price': p, 'ATR': a,
+            'Confluence': hi - lo,
+            'Detectors': detectors,
+            'Nearest Below': below,
+            'Nearest Above': above,
+        }, index=prices.index)
+
+    def levels(self, ticker, price, atr, within=1.0, cluster=CLUSTER_ATR):
+        """
+        Every level within `within` ATR of price for one ticker, with its source,
+        distance in ATR and how many levels (any detector, itself included) sit within
+        `cluster` ATR of it.
+        """
+        t = self._ids[ticker]
+        lo, hi = self._bounds(np.array([t]), np.array([price - within * atr]), np.array([price + within * atr]))
+        band = slice(lo[0], hi[0])
+        level = self.prices[band]
+        ids = np.full(len(level), t)
+        near_lo, near_hi = self._bounds(ids, level - cluster * atr, level + cluster * atr)
+        return pd.DataFrame({
+            'Level': level,
+            'Source': [self.sources[s] for s in self.source_ids[band]],
+            'Distance (ATR)': (level - price) / atr,
+            'Confluence': near_hi - near_lo,
+        })
+
+def build_index(directory=SP500_DIR, detectors=DETECTORS, tickers=None):
+    """Run every detector over the stored prices and index the levels with each ticker's ATR and last close"""
+    index = LevelIndex()
+    last = {}
+    for ticker in (list_tickers(directory) if tickers is None else tickers):
+        df = load_prices(ticker, directory).dropna(subset=['High', 'Low', 'Close'])
+        if len(df) < ATR_PERIOD + 1:
+            continue
+        index.atr[ticker] = indicators.atr(df['High'], df['Low'], df['Close'], ATR_PERIOD).iloc[-1]
+        last[ticker] = df['Close'].iloc[-1]
+        for name, detector in detectors.items():
+            try:
+                index.add(ticker, detector(df), name)
+            except Exception as e:
+                print(f"{name} levels failed for {ticker}: {e}")
+    index.last_close = pd.Series(last, dtype=np.float64)
+    return index.build()
+
+def load_index(directory=SP500_DIR, cache_dir=CACHE_DIR):
+    """build_index over the stored prices, cached until any price file changes"""
+    version = data_version(directory)
+    cache_file = os.path.join(cache_dir, f"level_index_{os.path.basename(os.path.normpath(directory))}.pkl")
+    if os.path.exists(cache_file):
+        cached = pd.read_pickle(cache_file)
+        if cached.get('version') == version:
+            return cached['index']
+    index = build_index(directory)
+    os.makedirs(cache_dir, exist_ok=True)
+    pd.to_pickle({'version': version, 'index': index}, cache_file)
+    return index
+
+if __name__ == '__main__':
+    within = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    index = load_index()
+    zones = index.query(index.last_close, pd.Series(index.atr), within)
+    print(f"Levels within {within} ATR of the last close, most confluence first:")
+    print(zones.sort_values(['Confluence', 'Detectors'], ascending=False).head(25).round(2).to_string())
@@ -0,0 +1,135 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+import indicators
+from price_store import SP500_DIR, load_matrix
+
+# Breadth lives next to the price CSVs, in a subdirectory the *.csv scanners skip
+BREADTH_SUBDIR = 'breadth'
+BREADTH_FILE = 'breadth.csv'
+HIGH_LOW_WINDOW = 252  # 52-week highs and lows
+MCCLELLAN_FAST = 19
+MCCLELLAN_SLOW = 39
+
+# Columns of the stored series, in order
+COLUMNS = [
+    'Issues', 'Advances', 'Declines', 'Unchanged', 'Net Advances', 'AD Line',
+    'Pct Above 50SMA', 'Pct Above 200SMA', 'New Highs', 'New Lows',
+    'EMA19', 'EMA39', 'McClellan Oscillator', 'McClellan Summation',
+]
+
+def breadth_path(directory=SP500_DIR):
+    return os.path.join(directory, BREADTH_SUBDIR, BREADTH_FILE)
+
+def _continue_ema(values, span, previous=None):
+    """EMA (adjust=False) of values, continuing from the previous EMA value when given"""
+    series = pd.Series(values, dtype=np.float64)
+    if previous is None or np.isnan(previous):
+        return series.ewm(span=span, adjust=False).mean().to_numpy()
+    seeded = pd.concat([pd.Series([previous]), series], ignore_index=True)
+    return seeded.ewm(span=span, adjust=False).mean().to_numpy()[1:]
+
+def daily_breadth(high, low, close, window=HIGH_LOW_WINDOW):
+    """
+    Per-date breadth counts from aligned (date x ticker) high/low/close frames.
+
+    Advances/declines compare each ticker's close to its own previous bar. New
+    highs/lows are bars that set the high/low of the trailing window; until a
+    ticker has a full window of history a quarter window is accepted, since the
+    stored prices only cover a year.
+    """
+    c = close.to_numpy()
+    prev = close.ffill().shift().to_numpy()
+    change = c - prev
+    has_change = ~np.isnan(change)
+
+    sma50 = indicators.sma(c, 50)
+    sma200 = indicators.sma(c, 200)
+    with np.errstate(invalid='ignore'):
+        above50 = np.where(~np.isnan(sma50), c > sma50, np.nan)
+        above200 = np.where(~np.isnan(sma200), c > sma200, np.nan)
+
+    min_periods = window // 4
+    rolling_high = high.rolling(window, min_periods=min_periods).max().to_numpy()
+    rolling_low = low.rolling(window, min_periods=min_periods).min().to_numpy()
+    new_high = (high.to_numpy() >= rolling_high) & ~np.isnan(rolling_high)
+    new_low = (low.to_numpy() <= rolling_low) & ~np.isnan(rolling_low)
+
+    advances = (change > 0).sum(axis=1)
+    declines = (change < 0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct50 = np.nansum(above50, axis=1) / (~np.isnan(above50)).sum(axis=1) * 100
+        pct200 = np.nansum(above200, axis=1) / (~np.isnan(above200)).sum(axis=1) * 100
+    return pd.DataFrame({
+        'Issues': has_change.sum(axis=1),
+        'Advances': advances,
+        'Declines': declines,
+        'Unchanged': has_change.sum(axis=1) - advances - declines,
+        'Net Advances': advances - declines,
+        'Pct Above 50SMA': pct50,
+        'Pct Above 200SMA': pct200,
+        'New Highs': new_high.sum(axis=1),
+        'New Lows': new_low.sum(axis=1),
+    }, index=close.index)
+
+def add_cumulative(daily, previous=None):
+    """
+    A/D line and McClellan oscillator/summation for daily breadth rows, carrying
+    the running values on from the previous stored row when given.
+    """
+    net = daily['Net Advances'].to_numpy(dtype=np.float64)
+    prev = previous if previous is not None else {}
+    daily = daily.copy()
+    daily['AD Line'] = prev.get('AD Line', 0.0) + np.cumsum(net)
+    daily['EMA19'] = _continue_ema(net, MCCLELLAN_FAST, prev.get('EMA19'))
+    daily['EMA39'] = _continue_ema(net, MCCLELLAN_SLOW, prev.get('EMA39'))
+    daily['McClellan Oscillator'] = daily['EMA19'] - daily['EMA39']
+    daily['McClellan Summation'] = prev.get('McClellan Summation', 0.0) + daily['McClellan Oscillator'].cumsum()
+    return daily[COLUMNS]
+
+def compute_breadth(high, low, close):
+    """Full breadth history for the aligned frames; the first date has no prior bar and is dropped"""
+    daily = daily_breadth(high, low, close).iloc[1:]
+    return add_cumulative(daily)
+
+def load_breadth(directory=SP500_DIR):
+    """Stored breadth series for the universe, or None if none has been written yet"""
+    path = breadth_path(directory)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+
+def update_breadth(directory=SP500_DIR, rebuild=False):
+    """
+    Append breadth rows for dates newer than the stored series and save it.
+
+    Stored rows are kept as they are, so the series keeps its history after the
+    one-year price files roll forward. The running A/D line and McClellan values
+    continue from the last stored row. rebuild recomputes everything from the
+    current price files.
+    """
+    prices = load_matrix(directory, fields=('High', 'Low', 'Close'))
+    high, low, close = prices['High'], prices['Low'], prices['Close']
+    stored = None if rebuild else load_breadth(directory)
+
+    if stored is None or stored.empty:
+        breadth = compute_breadth(high, low, close)
+    else:
+        last_date = stored.index[-1]
+        new_dates = close.index[close.index > last_date]
+        if len(new_dates) == 0:
+            return stored
+        # Lookback rows feed the SMAs and highs/lows; only the new rows are kept
+        daily = daily_breadth(high, low, close).loc[new_dates]
+        breadth = pd.concat([stored, add_cumulative(daily, stored.iloc[-1].to_dict())])
+
+    path = breadth_path(directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    breadth.round(4).to_csv(path, index_label='Date')
+    return breadth
+
+if __name__ == '__main__':
+    breadth = update_breadth(rebuild='--rebuild' in sys.argv)
+    print(breadth.tail(10).round(2).to_string())
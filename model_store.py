@@ -0,0 +1,86 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+import pandas as pd
+
+from predictor_features import FEATURES, feature_set_id
+
+ARTIFACT_DIR = 'models'
+MODEL_FILE = 'model.keras'
+SCALERS_FILE = 'scalers.pkl'
+META_FILE = 'meta.json'
+
+def universe_key(tickers):
+    """Artifact name for a set of tickers: the ticker itself, or a hash of the sorted list"""
+    tickers = sorted(tickers)
+    if len(tickers) == 1:
+        return tickers[0].upper()
+    return f"universe-{len(tickers)}-{hashlib.sha1(','.join(tickers).encode()).hexdigest()[:10]}"
+
+def data_cutoff(feature_sets):
+    """Latest date in any of the feature matrices, as YYYY-MM-DD"""
+    return max(pd.Timestamp(f.index[-1]) for f in feature_sets.values()).strftime('%Y-%m-%d')
+
+def artifact_path(key, feature_set, cutoff, root=ARTIFACT_DIR):
+    """models/<ticker or universe>/<feature set id>/<data cutoff>/"""
+    return os.path.join(root, key, feature_set, cutoff)
+
+def save_artifacts(model, scalers, key, cutoff, features=FEATURES, seq_length=None, root=ARTIFACT_DIR):
+    """Write the model, per-ticker scalers and a metadata file; returns the artifact directory"""
+    path = artifact_path(key, feature_set_id(features), cutoff, root)
+    os.makedirs(path, exist_ok=True)
+    model.save(os.path.join(path, MODEL_FILE))
+    pd.to_pickle(scalers, os.path.join(path, SCALERS_FILE))
+    meta = {
+        'key': key,
+        'features': list(features),
+        'feature_set': feature_set_id(features),
+        'sequence_length': seq_length,
+        'cutoff': cutoff,
+        'tickers': sorted(scalers),
+        'created': datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=1)
+    return path
+
+def find_artifacts(key, features=FEATURES, cutoff=None, root=ARTIFACT_DIR):
+    """Artifact directory for the exact cutoff, or the latest one when cutoff is None; None if absent"""
+    base = os.path.join(root, key, feature_set_id(features))
+    if cutoff is not None:
+        path = os.path.join(base, cutoff)
+        return path if os.path.exists(os.path.join(path, META_FILE)) else None
+    if not os.path.isdir(base):
+        return None
+    cutoffs = sorted(c for c in os.listdir(base) if os.path.exists(os.path.join(base, c, META_FILE)))
+    return os.path.join(base, cutoffs[-1]) if cutoffs else None
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+def load_artifacts(path):
+    """(model, scalers, meta) from an artifact directory"""
+    from keras.models import load_model
+    meta = read_meta(path)
+    model = load_model(os.path.join(path, MODEL_FILE))
+    scalers = pd.read_pickle(os.path.join(path, SCALERS_FILE))
+    return model, scalers, meta
+
+def get_or_train(feature_sets, train, key=None, features=FEATURES, root=ARTIFACT_DIR):
+    """
+    Load the artifacts for these tickers and data cutoff, or train and save them.
+
+    train is called as train(feature_sets) and returns (model, prepared), with
+    prepared as from predictor.prepare_universe. Returns (model, scalers, meta).
+    """
+    key = key or universe_key(feature_sets)
+    cutoff = data_cutoff(feature_sets)
+    path = find_artifacts(key, features, cutoff, root)
+    if path is not None:
+        return load_artifacts(path)
+    model, prepared = train(feature_sets)
+    scalers = {ticker: item['scaler'] for ticker, item in prepared.items()}
+    path = save_artifacts(model, scalers, key, cutoff, features, int(model.input_shape[1]), root)
+    return model, scalers, read_meta(path)
@@ -3,7 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import scipy
 import yfinance as yf
-import pandas_ta as ta
+import indicators
 import mplfinance as mpf
 import scipy.stats
 import scipy.signal
@@ -83,7 +83,7 @@ def support_resistance_levels(
     max_levels: int = MAX_LEVELS
 ):
     # Get log average true range
-    atr = ta.atr(np.log(data['high']), np.log(data['low']), np.log(data['close']), lookback)
+    atr = indicators.atr(np.log(data['high']), np.log(data['low']), np.log(data['close']), lookback, mamode='rma')
 
     all_levels = [None] * len(data)
     for i in range(lookback, len(data)):
@@ -210,4 +210,4 @@ if __name__ == '__main__':
 
     # Visualization of support and resistance levels
     plot_support_resistance(data, levels)
-print(levels)
\ No newline at end of file
+    print(levels)
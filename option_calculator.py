@@ -1,74 +1,228 @@
 import numpy as np
-from scipy.stats import norm
-import matplotlib.pyplot as plt
+from scipy.special import ndtr
+
+DAYS_PER_YEAR = 365
+IV_BOUNDS = (1e-4, 5.0)  # Implied volatility search range
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+def _is_call(option_type):
+    """Boolean array from 'call'/'put' strings (or an array of them)"""
+    if isinstance(option_type, str):
+        return np.asarray(option_type.lower() == 'call')
+    option_type = np.asarray(option_type)
+    if option_type.dtype.kind == 'b':
+        return option_type
+    # Plain comparisons; np.char.lower over a large array costs more than the pricing
+    option_type = option_type.astype(str)
+    return (option_type == 'call') | (option_type == 'Call') | (option_type == 'CALL')
+
+def _d1_d2(S, K, T, r, sigma):
+    vol_t = sigma * np.sqrt(T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(S / K) + (r + sigma**2 / 2) * T) / vol_t
+    return d1, d1 - vol_t, vol_t
 
 def black_scholes(S, K, days, r, sigma, option_type='call'):
-    T = days / 365
-    d1 = (np.log(S/K) + (r + sigma**2/2)*T) / (sigma*np.sqrt(T))
-    d2 = d1 - sigma*np.sqrt(T)
-    
-    if option_type.lower() == 'call':
-        option_price = S*norm.cdf(d1) - K*np.exp(-r*T)*norm.cdf(d2)
-    else:
-        option_price = K*np.exp(-r*T)*norm.cdf(-d2) - S*norm.cdf(-d1)
-    return option_price
-
-# Parameters
-S = 793  # Stock price
-K = 800  # Strike price
-r = 0.05  # Risk-free rate
-sigma = 0.36  # Volatility
-
-# Create multiple DTE scenarios
-dte_scenarios = [1, 7, 30, 86]
-colors = ['red', 'orange', 'blue', 'green']
-
-# Calculate price range
-price_range = 0.20
-min_price = S * (1 - price_range)
-max_price = S * (1 + price_range)
-stock_prices = np.linspace(min_price, max_price, 100)
-
-# Create the plot
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 12))
-
-# Plot for calls
-for days, color in zip(dte_scenarios, colors):
-    call_prices = [black_scholes(s, K, days, r, sigma, 'call') for s in stock_prices]
-    ax1.plot(stock_prices, call_prices, label=f'{days} DTE', color=color, linewidth=2)
-
-ax1.axvline(x=K, color='gray', linestyle='--', alpha=0.5, label='Strike')
-ax1.axvline(x=S, color='black', linestyle=':', alpha=0.5, label='Current Price')
-ax1.grid(True, alpha=0.3)
-ax1.set_title(f'Call Option Prices vs Days to Expiration\nStock=${S}, Strike=${K}, Vol={sigma*100:.0f}%')
-ax1.set_xlabel('Stock Price')
-ax1.set_ylabel('Call Option Price')
-ax1.legend()
-
-# Plot for puts
-for days, color in zip(dte_scenarios, colors):
-    put_prices = [black_scholes(s, K, days, r, sigma, 'put') for s in stock_prices]
-    ax2.plot(stock_prices, put_prices, label=f'{days} DTE', color=color, linewidth=2)
-
-ax2.axvline(x=K, color='gray', linestyle='--', alpha=0.5, label='Strike')
-ax2.axvline(x=S, color='black', linestyle=':', alpha=0.5, label='Current Price')
-ax2.grid(True, alpha=0.3)
-ax2.set_title('Put Option Prices vs Days to Expiration')
-ax2.set_xlabel('Stock Price')
-ax2.set_ylabel('Put Option Price')
-ax2.legend()
-
-plt.tight_layout()
-
-# Print some example values at current stock price
-print(f"Option prices at current stock price (${S:.2f}):")
-print("\nDays to Expiration  |  Call Price  |  Put Price")
-print("-" * 50)
-for days in dte_scenarios:
-    call = black_scholes(S, K, days, r, sigma, 'call')
-    put = black_scholes(S, K, days, r, sigma, 'put')
-    print(f"{days:^16d} | ${call:^10.2f} | ${put:^9.2f}")
-
-plt.show()
+    """
+    Black-Scholes price of European calls and puts.
+
+    Every argument broadcasts, so one call prices a whole grid of spots,
+    strikes, days to expiration, rates and vols; option_type is 'call', 'put'
+    or an array of them. Expired or zero-vol options are worth their
+    (discounted) intrinsic value.
+    """
+    S, K, days, r, sigma, call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (S, K, days, r, sigma)), _is_call(option_type))
+    T = days / DAYS_PER_YEAR
+    d1, d2, vol_t = _d1_d2(S, K, T, r, sigma)
+    discount = K * np.exp(-r * T)
+    sign = np.where(call, 1.0, -1.0)
+    price = sign * (S * ndtr(sign * d1) - discount * ndtr(sign * d2))
+    degenerate = ~(vol_t > 0)
+    if degenerate.any():
+        price = np.where(degenerate, np.maximum(sign * (S - discount), 0.0), price)
+    return price[()] if price.ndim == 0 else price
+
+def greeks(S, K, days, r, sigma, option_type='call'):
+    """
+    Price and Greeks on the same broadcast grid as black_scholes.
+
+    Returns a dict of arrays: price, delta, gamma, theta (per calendar day),
+    vega (per 1 vol point, i.e. 0.01) and rho (per 1% rate move).
+    """
+    S, K, days, r, sigma, call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (S, K, days, r, sigma)), _is_call(option_type))
+    T = days / DAYS_PER_YEAR
+    d1, d2, vol_t = _d1_d2(S, K, T, r, sigma)
+    sign = np.where(call, 1.0, -1.0)
+    discount = K * np.exp(-r * T)
+    pdf = np.exp(-d1**2 / 2) / _SQRT_2PI
+    n1, n2 = ndtr(sign * d1), ndtr(sign * d2)
+
+    result = {
+        'price': sign * (S * n1 - discount * n2),
+        'delta': sign * n1,
+        'gamma': pdf / (S * vol_t),
+        'theta': (-S * pdf * sigma / (2 * np.sqrt(T)) - sign * r * discount * n2) / DAYS_PER_YEAR,
+        'vega': S * pdf * np.sqrt(T) / 100,
+        'rho': sign * discount * T * n2 / 100,
+    }
+    degenerate = ~(vol_t > 0)
+    if degenerate.any():
+        itm = sign * (S - discount) > 0
+        result['price'] = np.where(degenerate, np.maximum(sign * (S - discount), 0.0), result['price'])
+        result['delta'] = np.where(degenerate, np.where(itm, sign, 0.0), result['delta'])
+        for name in ('gamma', 'theta', 'vega', 'rho'):
+            result[name] = np.where(degenerate, 0.0, result[name])
+    return {name: value[()] if value.ndim == 0 else value for name, value in result.items()}
+
+def _initial_vol(price, S, X, T):
+    """
+    Corrado-Miller estimate from a call price with discounted strike X, falling
+    back to the Manaster-Koehler point sqrt(2|ln(S/X)|/T) where it has no real root.
+    """
+    half_gap = (S - X) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = (price - half_gap) ** 2 - (S - X) ** 2 / np.pi
+        guess = np.sqrt(2 * np.pi / T) / (S + X) * (price - half_gap + np.sqrt(root))
+        fallback = np.sqrt(2 * np.abs(np.log(S / X)) / T)
+    guess = np.where((root >= 0) & (guess > 0), guess, fallback)
+    return np.where(np.isfinite(guess) & (guess > 0), guess, 0.3)
+
+def implied_volatility(price, S, K, days, r, option_type='call', tol=1e-10, max_iter=100):
+    """
+    Volatility that reproduces the given option prices, solved for every point at once.
+
+    Each point is solved on its out-of-the-money side (an in-the-money price is
+    turned into the other option's price by put-call parity), where the
+    price is pure time value. Newton steps are taken on log price as a
+    function of 1/vol**2, which is nearly linear even for deep
+    out-of-the-money prices far below a cent, so those converge in a few
+    steps with a relative tolerance instead of stalling on vanishing vega.
+    Starts from the Corrado-Miller estimate and keeps every point inside a
+    bracket that tightens each iteration; a step that leaves the bracket
+    falls back to (geometric) bisection. Only unconverged points are carried
+    into the next iteration. Prices outside the no-arbitrage bounds, or
+    needing a vol outside IV_BOUNDS, come back as NaN.
+    """
+    price, S, K, days, r, call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (price, S, K, days, r)), _is_call(option_type))
+    shape = price.shape
+    price, S, K, days, r, call = (a.ravel() for a in (price, S, K, days, r, call))
+    T = days / DAYS_PER_YEAR
+    X = K * np.exp(-r * T)
+    lower = np.maximum(np.where(call, S - X, X - S), 0.0)
+    upper = np.where(call, S, X)
+    valid = (price > lower) & (price < upper) & (T > 0)
+    sigma = np.full(len(price), np.nan)
+
+    active = np.flatnonzero(valid)
+    s, x, t, target = S[active], X[active], T[active], price[active]
+    # Out-of-the-money side: call when S < X, put otherwise; the target is its time value
+    otm_call = s < x
+    target = target - np.where(call[active] != otm_call, np.abs(s - x), 0.0)
+    sign = np.where(otm_call, 1.0, -1.0)
+    log_moneyness, sqrt_t = np.log(s / x), np.sqrt(t)
+    log_target = np.log(target)
+    lo = np.full(len(active), IV_BOUNDS[0])
+    hi = np.full(len(active), IV_BOUNDS[1])
+    vol = np.clip(_initial_vol(target + np.where(otm_call, 0.0, s - x), s, x, t), lo * 2, hi / 2)
+
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        vol_t = vol * sqrt_t
+        d1 = log_moneyness / vol_t + vol_t / 2
+        model = sign * (s * ndtr(sign * d1) - x * ndtr(sign * (d1 - vol_t)))
+        vega = s * np.exp(-d1**2 / 2) / _SQRT_2PI * sqrt_t
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            diff = np.log(model) - log_target
+            # Newton on log price in u = 1/vol**2, where it is close to linear for small prices
+            u = 1 / vol**2
+            step = 1 / np.sqrt(u + diff * model / (vega * vol**3 / 2))
+
+        # Price rises with vol, so the sign of diff says which end of the bracket moves
+        lo = np.where(diff < 0, vol, lo)
+        hi = np.where(diff > 0, vol, hi)
+        inside = (step > lo) & (step < hi)
+        new = np.where(inside, step, np.sqrt(lo * hi))
+
+        # Convergence is quadratic, so a step from within sqrt(tol) lands within tol
+        close = (np.abs(diff) < np.sqrt(tol)) & inside
+        done = close | (np.abs(diff) < tol) | (hi - lo < tol * vol)
+        sigma[active[done]] = np.where(np.abs(diff[done]) < tol, vol[done], new[done])
+        keep = ~done
+        if not keep.all():
+            active, s, x, t, sign, log_moneyness, sqrt_t, log_target, lo, hi = (
+                a[keep] for a in (active, s, x, t, sign, log_moneyness, sqrt_t, log_target, lo, hi))
+            new = new[keep]
+        vol = new
+
+    edge = (sigma <= IV_BOUNDS[0] * (1 + 1e-6)) | (sigma >= IV_BOUNDS[1] * (1 - 1e-6))
+    sigma[edge] = np.nan
+    sigma = sigma.reshape(shape)
+    return sigma[()] if sigma.ndim == 0 else sigma
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    # Parameters
+    S = 793  # Stock price
+    K = 800  # Strike price
+    r = 0.05  # Risk-free rate
+    sigma = 0.36  # Volatility
+
+    # Create multiple DTE scenarios
+    dte_scenarios = np.array([1, 7, 30, 86])
+    colors = ['red', 'orange', 'blue', 'green']
+
+    # Calculate price range
+    price_range = 0.20
+    min_price = S * (1 - price_range)
+    max_price = S * (1 + price_range)
+    stock_prices = np.linspace(min_price, max_price, 100)
+
+    # Every DTE x stock price point in one call each
+    call_grid = black_scholes(stock_prices[None, :], K, dte_scenarios[:, None], r, sigma, 'call')
+    put_grid = black_scholes(stock_prices[None, :], K, dte_scenarios[:, None], r, sigma, 'put')
+
+    # Create the plot
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 12))
+
+    # Plot for calls
+    for days, color, call_prices in zip(dte_scenarios, colors, call_grid):
+        ax1.plot(stock_prices, call_prices, label=f'{days} DTE', color=color, linewidth=2)
+
+    ax1.axvline(x=K, color='gray', linestyle='--', alpha=0.5, label='Strike')
+    ax1.axvline(x=S, color='black', linestyle=':', alpha=0.5, label='Current Price')
+    ax1.grid(True, alpha=0.3)
+    ax1.set_title(f'Call Option Prices vs Days to Expiration\nStock=${S}, Strike=${K}, Vol={sigma*100:.0f}%')
+    ax1.set_xlabel('Stock Price')
+    ax1.set_ylabel('Call Option Price')
+    ax1.legend()
+
+    # Plot for puts
+    for days, color, put_prices in zip(dte_scenarios, colors, put_grid):
+        ax2.plot(stock_prices, put_prices, label=f'{days} DTE', color=color, linewidth=2)
+
+    ax2.axvline(x=K, color='gray', linestyle='--', alpha=0.5, label='Strike')
+    ax2.axvline(x=S, color='black', linestyle=':', alpha=0.5, label='Current Price')
+    ax2.grid(True, alpha=0.3)
+    ax2.set_title('Put Option Prices vs Days to Expiration')
+    ax2.set_xlabel('Stock Price')
+    ax2.set_ylabel('Put Option Price')
+    ax2.legend()
+
+    plt.tight_layout()
 
+    # Print some example values at current stock price
+    at_spot = greeks(S, K, dte_scenarios[:, None], r, sigma, np.array(['call', 'put']))
+    print(f"Option prices at current stock price (${S:.2f}):")
+    print("\nDays to Expiration  |  Call Price  |  Put Price  |  Call Delta  |  Theta/day  |  Vega")
+    print("-" * 88)
+    for i, days in enumerate(dte_scenarios):
+        call, put = at_spot['price'][i]
+        print(f"{days:^19d} | ${call:^10.2f} | ${put:^9.2f} | {at_spot['delta'][i, 0]:^12.3f} | "
+              f"{at_spot['theta'][i, 0]:^11.3f} | {at_spot['vega'][i, 0]:^6.3f}")
 
+    plt.show()
@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from price_store import SP500_DIR, PORTFOLIO_DIR, ticker_path, stat_version
+from option_calculator import black_scholes
+
+CACHE_DIR = os.path.join('cache', 'scenarios')
+REPORT_DIR = os.path.join('reports', 'scenarios')
+VOL_WINDOW = 21  # Trading days of log returns behind the realized vol
+RISK_FREE = 0.05
+CONTRACT_SIZE = 100
+PRICE_RANGE = 0.20  # Surface spans spot +/- 20%
+N_PRICES = 81
+N_HORIZONS = 6
+
+def price_path(ticker, directories=(SP500_DIR, PORTFOLIO_DIR)):
+    """Price file of a stored ticker, from the first directory that has it"""
+    for directory in directories:
+        path = ticker_path(ticker, directory)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No stored prices for {ticker} in {', '.join(directories)}")
+
+def market_inputs(path, window=VOL_WINDOW):
+    """Spot (last close) and annualized realized vol from a stored price file"""
+    close = pd.read_csv(path, usecols=['Close'])['Close'].dropna()
+    log_returns = np.log(close).diff().dropna().iloc[-window:]
+    return float(close.iloc[-1]), float(log_returns.std() * np.sqrt(252))
+
+def strike_step(spot):
+    """Listed strike spacing for a stock at this price"""
+    return 1.0 if spot < 50 else 2.5 if spot < 100 else 5.0 if spot < 500 else 10.0
+
+def _strike(spot, offset=0.0):
+    step = strike_step(spot)
+    return round(spot * (1 + offset) / step) * step
+
+LEG_TYPES = ('call', 'put', 'stock')
+
+def leg(kind, strike, days, quantity=1):
+    """One position leg: 'call', 'put' or 'stock', quantity negative for short"""
+    if kind not in LEG_TYPES:
+        raise ValueError(f"Unknown leg type {kind!r}; expected one of {', '.join(LEG_TYPES)}")
+    return {'type': kind, 'strike': float(strike), 'days': int(days), 'quantity': quantity}
+
+# Strategy name -> function(spot, days, width) returning legs; width is the
+# distance of the outer strikes from spot as a fraction of it
+STRATEGIES = {
+    'long_call': lambda s, d, w: [leg('call', _strike(s), d)],
+    'long_put': lambda s, d, w: [leg('put', _strike(s), d)],
+    'straddle': lambda s, d, w: [leg('call', _strike(s), d), leg('put', _strike(s), d)],
+    'strangle': lambda s, d, w: [leg('call', _strike(s, w), d), leg('put', _strike(s, -w), d)],
+    'bull_call_spread': lambda s, d, w: [leg('call', _strike(s), d), leg('call', _strike(s, w), d, -1)],
+    'bear_put_spread': lambda s, d, w: [leg('put', _strike(s), d), leg('put', _strike(s, -w), d, -1)],
+    'iron_condor': lambda s, d, w: [leg('put', _strike(s, -2 * w), d), leg('put', _strike(s, -w), d, -1),
+                                    leg('call', _strike(s, w), d, -1), leg('call', _strike(s, 2 * w), d)],
+    'covered_call': lambda s, d, w: [leg('stock', 0, d, CONTRACT_SIZE), leg('call', _strike(s, w), d, -1)],
+}
+
+def strategy_legs(name, spot, days=30, width=0.05):
+    return STRATEGIES[name](spot, days, width)
+
+def parse_legs(text):
+    """Legs from 'call:800:30:1,put:800:30:-1' (type:strike:days[:quantity])"""
+    legs = []
+    for item in text.split(','):
+        parts = item.strip().split(':')
+        if len(parts) not in (3, 4):
+            raise ValueError(f"Leg {item.strip()!r} is not type:strike:days[:quantity]")
+        legs.append(leg(parts[0].lower(), parts[1], parts[2], int(parts[3]) if len(parts) > 3 else 1))
+    return legs
+
+def pnl_surface(spot, sigma, legs, r=RISK_FREE, price_range=PRICE_RANGE, n_prices=N_PRICES,
+                horizons=None):
+    """
+    Position P&L over a grid of underlying prices x days elapsed.
+
+    Every leg is priced at every grid point in one broadcast black_scholes
+    call (price x day x leg) and marked against its entry premium at spot
+    today. Options are per contract of CONTRACT_SIZE shares, stock legs per
+    share. horizons defaults to N_HORIZONS days from today to the first option expiry.
+    Returns (surface DataFrame, legs with their entry premiums).
+    """
+    prices = np.linspace(spot * (1 - price_range), spot * (1 + price_range), n_prices)
+    # Stock legs never expire; only a stock-only position falls back to their days
+    expiry = min((l['days'] for l in legs if l['type'] != 'stock'), default=max(l['days'] for l in legs))
+    if horizons is None:
+        horizons = np.unique(np.linspace(0, expiry, N_HORIZONS).round().astype(int))
+    horizons = np.asarray(horizons)
+
+    kinds = np.array([l['type'] for l in legs])
+    unknown = sorted({l['type'] for l in legs} - set(LEG_TYPES))
+    if unknown:
+        raise ValueError(f"Unknown leg type {', '.join(map(repr, unknown))}; expected one of {', '.join(LEG_TYPES)}")
+    strikes = np.array([l['strike'] for l in legs])
+    days = np.array([l['days'] for l in legs])
+    quantity = np.array([l['quantity'] for l in legs], dtype=np.float64)
+    option = kinds != 'stock'
+    multiplier = np.where(option, CONTRACT_SIZE, 1)
+    option_type = np.where(kinds == 'put', 'put', 'call')
+    strikes = np.where(option, strikes, spot)  # Stock legs are priced as themselves below
+
+    entry = np.where(option, black_scholes(spot, strikes, days, r, sigma, option_type), spot)
+    remaining = np.maximum(days[None, None, :] - horizons[None, :, None], 0)
+    value = black_scholes(prices[:, None, None], strikes, remaining, r, sigma, option_type)
+    value = np.where(option, value, prices[:, None, None])
+    pnl = ((value - entry) * quantity * multiplier).sum(axis=2)
+
+    surface = pd.DataFrame(pnl, index=pd.Index(prices.round(2), name='Price'),
+                           columns=pd.Index(horizons, name='Days Elapsed'))
+    priced = [dict(l, premium=round(float(p), 4)) for l, p in zip(legs, entry)]
+    return surface, priced
+
+def breakevens(pnl):
+    """Prices where a P&L Series (indexed by price) crosses zero, linearly interpolated"""
+    prices, values = pnl.index.to_numpy(dtype=np.float64), pnl.to_numpy()
+    cross = np.flatnonzero(np.sign(values[:-1]) * np.sign(values[1:]) < 0)
+    return [float(prices[i] - values[i] * (prices[i + 1] - prices[i]) / (values[i + 1] - values[i]))
+            for i in cross]
+
+def scenario_key(params):
+    """Cache key: hash of the scenario parameters (including the price file's stat version)"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+def scenario(ticker, legs=None, strategy='straddle', days=30, width=0.05, r=RISK_FREE,
+             price_range=PRICE_RANGE, n_prices=N_PRICES, sigma=None, cache_dir=CACHE_DIR):
+    """
+    P&L surface for a position in a stored ticker, cached by parameter hash.
+
+    Spot and (unless given) sigma come from the local price store; legs
+    default to the named strategy around spot. The cache is looked up by the
+    request parameters and the price file's size and modification time,
+    before the prices are read, so a hit costs one stat call and a price
+    update builds a fresh surface. Returns a dict with the inputs, legs,
+    surface and an expiry summary.
+    """
+    ticker = ticker.upper()
+    prices = price_path(ticker)
+    name = strategy if legs is None else 'custom'
+    params = {'ticker': ticker, 'version': stat_version(prices), 'strategy': name, 'legs': legs,
+              'days': days, 'width': width, 'r': r, 'sigma': sigma, 'price_range': price_range, 'n_prices': n_prices}
+    path = os.path.join(cache_dir, f"{scenario_key(params)}.pkl")
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    spot, realized = market_inputs(prices)
+    sigma = realized if sigma is None else sigma
+    legs = legs or strategy_legs(strategy, spot, days, width)
+    surface, priced = pnl_surface(spot, sigma, legs, r, price_range, n_prices)
+    at_expiry = surface.iloc[:, -1]
+    result = {
+        'ticker': ticker, 'spot': spot, 'sigma': sigma, 'r': r,
+        'strategy': name,
+        'legs': priced,
+        'surface': surface,
+        'max_profit': float(at_expiry.max()),
+        'max_loss': float(at_expiry.min()),
+        'breakevens': breakevens(at_expiry),
+    }
+    os.makedirs(cache_dir, exist_ok=True)
+    pd.to_pickle(result, path)
+    return result
+
+def write_scenario(result, directory=REPORT_DIR):
+    """Save the surface as reports/scenarios/<ticker>_<strategy>.csv; returns the path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{result['ticker']}_{result['strategy']}.csv")
+    result['surface'].round(2).to_csv(path)
+    return path
+
+if __name__ == '__main__':
+    # python option_scenarios.py TICKER [strategy | type:strike:days[:qty],...] [days]
+    ticker = sys.argv[1] if len(sys.argv) > 1 else 'AAPL'
+    spec = sys.argv[2] if len(sys.argv) > 2 else 'straddle'
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    if spec in STRATEGIES:
+        result = scenario(ticker, strategy=spec, days=days)
+    else:
+        result = scenario(ticker, legs=parse_legs(spec))
+
+    print(f"{result['ticker']} spot ${result['spot']:.2f}, realized vol {result['sigma'] * 100:.1f}%")
+    print(pd.DataFrame(result['legs']).to_string(index=False))
+    print(f"\nMax profit ${result['max_profit']:.2f}, max loss ${result['max_loss']:.2f} at expiry, "
+          f"breakevens {', '.join(f'${b:.2f}' for b in result['breakevens']) or 'none'}")
+    print(result['surface'].iloc[::10].round(2).to_string())
+    print(f"\nSaved to {write_scenario(result)}")
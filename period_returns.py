@@ -0,0 +1,71 @@
+import sys
+import numpy as np
+import pandas as pd
+
+from price_store import PORTFOLIO_DIR, load_matrix
+
+BENCHMARK = 'SPY'
+RS_WINDOW = 63  # About three months of trading days
+
+def period_closes(close, freq):
+    """Last close of every period (pandas Period alias, e.g. 'W-FRI', 'M', 'Y') per ticker"""
+    return close.groupby(close.index.to_period(freq)).last()
+
+def period_returns(close, freq='W-FRI'):
+    """Close-to-close return of every period for every ticker"""
+    return period_closes(close, freq).pct_change(fill_method=None)
+
+def period_to_date(close, freq):
+    """Return of the current (latest) period so far: last close vs the previous period's last close"""
+    closes = period_closes(close, freq)
+    if len(closes) < 2:
+        return pd.Series(np.nan, index=close.columns)
+    return closes.iloc[-1] / closes.iloc[-2] - 1
+
+def ytd_return(close):
+    """
+    Year-to-date return vs last year's final close, or vs the first close of the
+    year for tickers with no history before January.
+    """
+    this_year = close.index[-1].year
+    before = close[close.index.year < this_year]
+    during = close[close.index.year == this_year]
+    base = before.ffill().iloc[-1] if len(before) else pd.Series(np.nan, index=close.columns)
+    base = base.fillna(during.bfill().iloc[0])
+    return close.ffill().iloc[-1] / base - 1
+
+def cagr(close):
+    """Compound annual growth rate from each ticker's first to last close"""
+    first = close.bfill().iloc[0]
+    last = close.ffill().iloc[-1]
+    dates = close.index.to_numpy()
+    has_bar = close.notna().to_numpy()
+    first_date = dates[has_bar.argmax(axis=0)]
+    last_date = dates[len(dates) - 1 - has_bar[::-1].argmax(axis=0)]
+    years = (last_date - first_date) / np.timedelta64(1, 'D') / 365.25
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(years > 0, (last / first).to_numpy() ** (1 / years) - 1, np.nan)
+    return pd.Series(growth, index=close.columns)
+
+def relative_strength(close, benchmark=BENCHMARK, window=RS_WINDOW):
+    """
+    Rolling relative strength vs the benchmark on the benchmark's trading days:
+    window growth of each ticker over window growth of the benchmark, minus 1.
+    """
+    trading = close.ffill()[close[benchmark].notna()]
+    growth = trading / trading.shift(window)
+    return growth.div(growth[benchmark], axis=0) - 1
+
+def summary(close, benchmark=BENCHMARK, window=RS_WINDOW):
+    """Latest weekly, monthly, YTD, CAGR and relative-strength figures per ticker, as fractions"""
+    return pd.DataFrame({
+        'Weekly': period_to_date(close, 'W-FRI'),
+        'Monthly': period_to_date(close, 'M'),
+        'YTD': ytd_return(close),
+        'CAGR': cagr(close),
+        'Relative Strength': relative_strength(close, benchmark, window).iloc[-1],
+    })
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else PORTFOLIO_DIR
+    print((summary(load_matrix(directory)['Close']) * 100).round(2).to_string())
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+import indicators
+import period_returns
+from indicator_panel import load_panels
+from price_store import PORTFOLIO_DIR, load_matrix
+
+TRADING_DAYS = 252
+BENCHMARK = 'SPY'
+
+# Report columns in display order; all numeric except the conditions text
+COLUMNS = [
+    'Annualized Volatility', '1 Mo Return', 'Annualized Return', 'Beta (SPY)',
+    '20SMA', 'PCT From 20SMA', '50SMA', 'PCT From 50SMA', '200SMA', 'PCT From 200SMA',
+    'Trend', 'Price', 'Technical Conditions', 'Weekly Performance', 'Monthly Performance', 'YTD Return',
+    'Relative Strength to SPY',
+]
+
+def end_aligned(values, valid=None):
+    """
+    Shift each column's valid values to the bottom of the matrix, NaN-padded on top.
+
+    Row -k then holds every ticker's k-th most recent observation, so trailing
+    windows work per ticker even when calendars differ (e.g. BTC trades weekends).
+    valid defaults to the non-NaN cells of values.
+    """
+    if valid is None:
+        valid = ~np.isnan(values)
+    order = np.argsort(valid, axis=0, kind='stable')
+    packed = np.take_along_axis(values, order, axis=0)
+    packed[~np.take_along_axis(valid, order, axis=0)] = np.nan
+    return packed
+
+def own_returns(close):
+    """Close-to-close returns of each ticker over its own bars, placed on the aligned dates"""
+    prev_close = close.ffill().shift()
+    return (close / prev_close - 1).where(close.notna())
+
+def beta_to(returns, benchmark):
+    """Beta of every column vs the benchmark column, over the dates both have returns"""
+    r = returns.to_numpy()
+    m = returns[benchmark].to_numpy()[:, None]
+    both = ~np.isnan(r) & ~np.isnan(m)
+    n = both.sum(axis=0)
+    x = np.where(both, r, 0.0)
+    y = np.where(both, m, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = ((x * y).sum(axis=0) - x.sum(axis=0) * y.sum(axis=0) / n) / (n - 1)
+        var = ((y * y).sum(axis=0) - y.sum(axis=0) ** 2 / n) / (n - 1)
+        beta = np.where(var != 0, cov / var, np.nan)
+    return pd.Series(beta, index=returns.columns)
+
+def trend_strength(price, sma20, sma50, sma200):
+    """Trend score from price and moving-average ordering, for arrays of tickers"""
+    pct_from_200 = (price - sma200) / sma200 * 100
+    return ((price > sma20).astype(int) + (price > sma50) + 2 * (price > sma200)
+            + (sma20 > sma50) + 2 * (sma50 > sma200)
+            + (pct_from_200 > 20) - (pct_from_200 < -20))
+
+def technical_conditions(sma20, sma50, sma200, pct_from_20sma, pct_from_50sma):
+    """Comma-joined condition labels per ticker from vectorized masks"""
+    masks = [
+        ("Potential Breakout", (pct_from_20sma > 5) & (pct_from_50sma > 3)),
+        ("Potential Breakdown", (pct_from_20sma < -5) & (pct_from_50sma < -3)),
+        ("Overbought", pct_from_20sma > 10),
+        ("Oversold", pct_from_20sma < -10),
+        ("Strong Uptrend", (sma20 > sma50) & (sma50 > sma200)),
+        ("Strong Downtrend", (sma20 < sma50) & (sma50 < sma200)),
+    ]
+    labels = np.array([label for label, _ in masks])
+    hits = np.column_stack([mask for _, mask in masks])
+    return [', '.join(labels[row]) or "Normal Trading Range" for row in hits]
+
+def latest_smas(packed_close, tickers, smas=None, windows=(20, 50, 200)):
+    """
+    Latest SMA per window for each ticker, taken from smas (ticker x 'SMA<window>',
+    e.g. the last rows of the stored indicator panels) where it has the ticker
+    and computed from the end-aligned closes for the rest.
+    """
+    have = tickers.isin(smas.index) if smas is not None else np.zeros(len(tickers), bool)
+    latest = []
+    for window in windows:
+        values = np.full(len(tickers), np.nan)
+        if have.any():
+            values[have] = smas.loc[tickers[have], f'SMA{window}'].to_numpy(dtype=np.float64)
+        if not have.all():
+            values[~have] = indicators.sma(packed_close[:, ~have], window)[-1]
+        latest.append(values)
+    return latest
+
+def analyze(close, benchmark=BENCHMARK, smas=None):
+    """
+    Portfolio metrics for every ticker in an aligned (date x ticker) close frame.
+
+    Returns a numeric DataFrame indexed by ticker with the COLUMNS of the stock
+    analysis report; percentages are in percent units. The benchmark row comes first.
+    Annualized Return is the CAGR; weekly and monthly performance are the current
+    week/month to date; relative strength is over the last period_returns.RS_WINDOW
+    trading days. smas optionally supplies precomputed latest SMAs (see latest_smas).
+    """
+    if benchmark not in close.columns:
+        raise ValueError(f"{benchmark} data not found. Please ensure it is in the directory.")
+
+    returns = own_returns(close)
+    r = returns.to_numpy()
+    daily_vol = np.nanstd(r, axis=0, ddof=1)
+    periods = period_returns.summary(close, benchmark)
+
+    packed_close = end_aligned(close.to_numpy())
+    price = packed_close[-1]
+    n_obs = (~np.isnan(packed_close)).sum(axis=0)
+    month_ago = packed_close[-31] if len(packed_close) >= 31 else np.full(len(price), np.nan)
+    month_return = np.where(n_obs >= 31, price / month_ago - 1, np.nan)
+
+    sma20, sma50, sma200 = latest_smas(packed_close, close.columns, smas)
+    pct20, pct50, pct200 = ((price - sma) / sma * 100 for sma in (sma20, sma50, sma200))
+
+    metrics = pd.DataFrame({
+        'Annualized Volatility': daily_vol * np.sqrt(TRADING_DAYS),
+        '1 Mo Return': month_return * 100,
+        'Annualized Return': periods['CAGR'].to_numpy() * 100,
+        'Beta (SPY)': beta_to(returns, benchmark).to_numpy(),
+        '20SMA': sma20, 'PCT From 20SMA': pct20,
+        '50SMA': sma50, 'PCT From 50SMA': pct50,
+        '200SMA': sma200, 'PCT From 200SMA': pct200,
+        'Trend': trend_strength(price, sma20, sma50, sma200),
+        'Price': price,
+        'Technical Conditions': technical_conditions(sma20, sma50, sma200, pct20, pct50),
+        'Weekly Performance': periods['Weekly'].to_numpy() * 100,
+        'Monthly Performance': periods['Monthly'].to_numpy() * 100,
+        'YTD Return': periods['YTD'].to_numpy() * 100,
+        'Relative Strength to SPY': periods['Relative Strength'].to_numpy() * 100,
+    }, index=pd.Index(close.columns, name='Ticker'))
+    metrics.loc[benchmark, 'Beta (SPY)'] = 1.0
+
+    order = [benchmark] + [t for t in metrics.index if t != benchmark]
+    return metrics.loc[order, COLUMNS]
+
+def analyze_directory(directory=PORTFOLIO_DIR, benchmark=BENCHMARK):
+    """
+    Load every price CSV in directory once and run analyze over the aligned
+    matrix, with the SMAs read from the stored indicator panels where current.
+    """
+    close = load_matrix(directory, fields=('Close',))['Close']
+    panels = load_panels(close.columns, directory)
+    smas = pd.DataFrame({t: p.iloc[-1] for t, p in panels.items()}).T if panels else None
+    return analyze(close, benchmark, smas)
+
+# Render-time formats for the console view
+DISPLAY_FORMATS = {
+    'Annualized Volatility': '{:.4f}',
+    '1 Mo Return': '{:.1f}%',
+    'Annualized Return': '{:.1f}%',
+    'Beta (SPY)': '{:.4f}',
+    '20SMA': '${:.2f}', 'PCT From 20SMA': '{:.1f}%',
+    '50SMA': '${:.2f}', 'PCT From 50SMA': '{:.1f}%',
+    '200SMA': '${:.2f}', 'PCT From 200SMA': '{:.1f}%',
+    'Price': '${:.2f}',
+    'Weekly Performance': '{:.2f}%',
+    'Monthly Performance': '{:.2f}%',
+    'YTD Return': '{:.1f}%',
+    'Relative Strength to SPY': '{:.2f}%',
+}
+
+# Decimal places kept in the written reports
+REPORT_DECIMALS = {
+    'Annualized Volatility': 4, '1 Mo Return': 1, 'Annualized Return': 1, 'Beta (SPY)': 4,
+    '20SMA': 2, 'PCT From 20SMA': 1, '50SMA': 2, 'PCT From 50SMA': 1, '200SMA': 2, 'PCT From 200SMA': 1,
+    'Price': 2, 'Weekly Performance': 2, 'Monthly Performance': 2, 'YTD Return': 1,
+    'Relative Strength to SPY': 2,
+}
+
+def format_for_display(metrics):
+    """String view of the metrics table; NaN shows as 'Not enough data'"""
+    shown = metrics.astype(object)
+    for column, fmt in DISPLAY_FORMATS.items():
+        if column in shown:
+            shown[column] = [fmt.format(v) if pd.notna(v) else "Not enough data" for v in metrics[column]]
+    return shown.reset_index()
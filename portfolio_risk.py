@@ -0,0 +1,179 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from price_store import PORTFOLIO_DIR, list_tickers, load_matrix, calendar_groups
+
+POSITIONS_FILE = 'post_positions.csv'  # Written by import_positions.py
+REPORT_PATH = os.path.join('reports', 'portfolio_risk.csv')
+LOOKBACK = 756  # Three years of daily returns behind the covariance / bootstrap
+HORIZON = 21
+N_PATHS = 100_000
+BLOCK = 5  # Days per bootstrap block, keeps short-term autocorrelation
+CHUNK_BYTES = 64 * 2**20  # Bound on the simulated returns array held at once per chunk
+CONFIDENCE = (0.95, 0.99)
+WORKERS = os.cpu_count() or 1
+
+def load_holdings(path=POSITIONS_FILE, directory=PORTFOLIO_DIR):
+    """
+    Dollar value per symbol from the positions export, summed across accounts.
+
+    Short positions keep their negative value (a negative weight). Symbols
+    without stored prices (cash sweeps, money market, pending, margin debit)
+    are netted into CASH, held at zero return, so CASH can be negative.
+    Weights are taken against the net value, which must be positive.
+    Without a positions file every stored ticker gets an equal weight.
+    """
+    stored = set(list_tickers(directory))
+    if not os.path.exists(path):
+        if not stored:
+            raise ValueError(f"No positions file ({path}) and no stored prices in {directory}.")
+        return pd.Series(1.0 / len(stored), index=sorted(stored), name='value')
+    positions = pd.read_csv(path)
+    positions = positions[positions['symbol'].notna()]
+    values = pd.to_numeric(positions['value'], errors='coerce').fillna(0.0)
+    values = values.groupby(positions['symbol'].astype(str)).sum()
+    held = values[values.index.isin(stored) & (values != 0)]
+    holdings = pd.concat([held, pd.Series({'CASH': values.drop(held.index).sum()})]).rename('value')
+    if holdings.sum() <= 0:
+        raise ValueError(f"Net value of the positions in {path} is not positive; nothing to weight against.")
+    return holdings
+
+def holding_returns(tickers, directory=PORTFOLIO_DIR, lookback=LOOKBACK):
+    """
+    (date x ticker) daily returns over the last `lookback` exchange trading days
+    for the held tickers.
+
+    Rows are the dates of the calendar most tickers trade on, so a
+    weekend-trading holding (BTC) doesn't add zero-return rows for every
+    stock; its weekend moves fold into the next trading day's return. Days
+    before a ticker's first bar (or missing bars) count as flat. No tickers
+    (an all-cash portfolio) gives an empty frame.
+    """
+    if not len(tickers):
+        return pd.DataFrame(dtype=np.float64)
+    close = load_matrix(directory, fields=('Close',), tickers=list(tickers))['Close'].sort_index()
+    _, columns = max(calendar_groups(close), key=lambda group: len(group[1]))
+    close = close[close[columns].notna().any(axis=1)]
+    returns = (close / close.ffill().shift() - 1).where(close.notna())
+    return returns.iloc[-lookback:].fillna(0.0)
+
+def _covariance_factor(cov):
+    """Lower factor L with L @ L.T == cov, through eigh when Cholesky fails on a near-singular matrix"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+def _simulate_chunk(seed, n_paths, horizon, weights, cash, method, params):
+    """
+    One chunk of paths; returns (terminal return, max drawdown) per path.
+
+    Assets are buy-and-hold from today's weights, so the portfolio value on
+    each day is cash plus every position compounded to that day.
+    """
+    rng = np.random.default_rng(seed)
+    # Daily log returns, (paths, horizon, assets)
+    if method == 'bootstrap':
+        history = params['returns']
+        n_blocks = -(-horizon // BLOCK)
+        starts = rng.integers(0, len(history) - BLOCK + 1, size=(n_paths, n_blocks))
+        rows = (starts[:, :, None] + np.arange(BLOCK)).reshape(n_paths, -1)[:, :horizon]
+        returns = history[rows]
+    else:
+        # Log returns ~ N(mu, cov), correlated through the covariance factor
+        returns = rng.standard_normal((n_paths, horizon, len(weights))) @ params['factor'].T
+        returns += params['mu']
+
+    np.cumsum(returns, axis=1, out=returns)
+    np.exp(returns, out=returns)
+    value = returns @ weights + cash  # (paths, horizon) portfolio value, starting from 1
+    value = np.concatenate([np.ones((n_paths, 1)), value], axis=1)
+    drawdown = 1 - value / np.maximum.accumulate(value, axis=1)
+    return value[:, -1] - 1, drawdown.max(axis=1)
+
+def simulate(holdings, returns, horizon=HORIZON, n_paths=N_PATHS, method='normal', seed=0,
+             workers=WORKERS):
+    """
+    Monte Carlo terminal returns and max drawdowns of the portfolio over `horizon` days.
+
+    method 'normal' draws correlated log returns from the historical mean and
+    covariance; 'bootstrap' resamples blocks of whole historical days, keeping
+    fat tails and cross-asset moves together. Paths are generated in chunks
+    of at most CHUNK_BYTES, each with its own child of one SeedSequence, so
+    results depend only on seed and n_paths, not on the number of workers.
+    Without priced holdings every path is flat.
+    """
+    weights = holdings.drop('CASH', errors='ignore')
+    if weights.empty:
+        return np.zeros(n_paths), np.zeros(n_paths)
+    returns = returns[weights.index]
+    if method == 'bootstrap' and len(returns) < BLOCK:
+        raise ValueError(f"Bootstrap needs at least {BLOCK} days of returns; have {len(returns)}.")
+    total = holdings.sum()
+    w = (weights / total).to_numpy(dtype=np.float64)
+    cash = float(holdings.get('CASH', 0.0) / total)
+
+    log_returns = np.log1p(returns.to_numpy(dtype=np.float64))
+    if method == 'bootstrap':
+        params = {'returns': log_returns}
+    else:
+        cov = np.atleast_2d(np.cov(log_returns, rowvar=False))  # 0-d for a single holding
+        params = {'mu': log_returns.mean(axis=0), 'factor': _covariance_factor(cov)}
+
+    chunk = max(1, CHUNK_BYTES // (horizon * len(w) * 8))
+    sizes = [min(chunk, n_paths - start) for start in range(0, n_paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(s, size, horizon, w, cash, method, params) for s, size in zip(seeds, sizes)]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(min(workers, len(tasks))) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*tasks)))
+    else:
+        results = [_simulate_chunk(*task) for task in tasks]
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+def risk_summary(terminal, drawdown, value=1.0, confidence=CONFIDENCE):
+    """
+    VaR and CVaR (expected loss beyond VaR) of the terminal return at each
+    confidence level, plus the drawdown distribution; in percent and in dollars
+    of the given portfolio value.
+    """
+    rows = {}
+    for level in confidence:
+        cutoff = np.quantile(terminal, 1 - level)
+        rows[f'VaR {level:.0%}'] = -cutoff
+        rows[f'CVaR {level:.0%}'] = -terminal[terminal <= cutoff].mean()
+    rows['Expected Return'] = terminal.mean()
+    rows['Median Max Drawdown'] = np.median(drawdown)
+    for level in confidence:
+        rows[f'Max Drawdown {level:.0%}'] = np.quantile(drawdown, level)
+    for threshold in (0.10, 0.20):
+        rows[f'P(Drawdown > {threshold:.0%})'] = (drawdown > threshold).mean()
+    summary = pd.DataFrame({'Percent': pd.Series(rows) * 100})
+    summary['Dollars'] = np.where(summary.index.str.startswith('P('), np.nan, summary['Percent'] / 100 * value)
+    return summary
+
+if __name__ == '__main__':
+    # python portfolio_risk.py [horizon days] [paths] [--bootstrap] [--seed N]
+    args = [a for i, a in enumerate(sys.argv[1:], 1) if not a.startswith('--') and sys.argv[i - 1] != '--seed']
+    horizon = int(args[0]) if args else HORIZON
+    n_paths = int(args[1]) if len(args) > 1 else N_PATHS
+    method = 'bootstrap' if '--bootstrap' in sys.argv else 'normal'
+    seed = int(sys.argv[sys.argv.index('--seed') + 1]) if '--seed' in sys.argv else 0
+
+    holdings = load_holdings()
+    returns = holding_returns(holdings.drop('CASH', errors='ignore').index)
+    terminal, drawdown = simulate(holdings, returns, horizon, n_paths, method, seed)
+    value = holdings.sum() if os.path.exists(POSITIONS_FILE) else 1.0
+    summary = risk_summary(terminal, drawdown, value)
+
+    print(f"{n_paths:,} {method} paths over {horizon} trading days, "
+          f"{len(returns.columns)} holdings, cash {holdings.get('CASH', 0) / holdings.sum():.1%}")
+    print(summary.round(2).to_string())
+    os.makedirs('reports', exist_ok=True)
+    summary.round(4).to_csv(REPORT_PATH)
+    print(f"\nSaved to {REPORT_PATH}")
@@ -1,176 +1,322 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
-from sklearn.preprocessing import MinMaxScaler
-from keras.models import Sequential
-from keras.layers import LSTM, Dense, Dropout
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-
-# Get data with longer history
-ticker = 'msft'
-end_date = datetime.now()
-start_date = end_date - timedelta(days=1500)  # More historical data
-data = yf.download(ticker, start=start_date, end=end_date)
-
-# Calculate basic features
-df = data.copy()
-df['Returns'] = df['Close'].pct_change()
-df['Volatility'] = df['Returns'].rolling(window=21).std()
-df['MA10'] = df['Close'].rolling(window=10).mean()
-df['MA20'] = df['Close'].rolling(window=20).mean()
-df['MA50'] = df['Close'].rolling(window=50).mean()
-
-# Momentum indicators
-df['RSI'] = df['Returns'].rolling(window=14).apply(lambda x: 100 - (100 / (1 + (x[x > 0].mean() / -x[x < 0].mean()))))
-df['Price_to_MA50'] = df['Close'] / df['MA50']
-
-# Volume indicators
-df['Volume_MA20'] = df['Volume'].rolling(window=20).mean()
-df['Volume_Ratio'] = df['Volume'] / df['Volume_MA20']
-
-# Remove extreme outliers
-df = df[df['Returns'].abs() < df['Returns'].std() * 3]
-
-# Select features
-features = ['Close', 'Volume_Ratio', 'RSI', 'Price_to_MA50', 'Volatility']
-df = df[features].dropna()
-
-# Scale data
-scaler = MinMaxScaler()
-scaled_data = scaler.fit_transform(df)
-
-# Create sequences
-def create_sequences(data, seq_length):
-    X, y = [], []
-    for i in range(seq_length, len(data)):
-        X.append(data[i-seq_length:i])
-        y.append(data[i, 0])
-    return np.array(X), np.array(y)
-
-sequence_length = 21  # One month of trading days
-X, y = create_sequences(scaled_data, sequence_length)
-
-# Time-based split (more recent data for testing)
-train_size = int(len(X) * 0.7)
-val_size = int(len(X) * 0.15)
-
-X_train = X[:train_size]
-y_train = y[:train_size]
-X_val = X[train_size:train_size+val_size]
-y_val = y[train_size:train_size+val_size]
-X_test = X[train_size+val_size:]
-y_test = y[train_size+val_size:]
-
-# Simpler model architecture
-model = Sequential([
-    LSTM(32, input_shape=(sequence_length, len(features)), return_sequences=True),
-    Dropout(0.1),
-    LSTM(16),
-    Dropout(0.1),
-    Dense(1)
-])
-
-# Compile with Huber loss
-model.compile(optimizer='adam', loss='huber', metrics=['mae'])
-
-# Callbacks
-from keras.callbacks import EarlyStopping, ReduceLROnPlateau
-
-early_stopping = EarlyStopping(
-    monitor='val_loss',
-    patience=10,
-    restore_best_weights=True
-)
-
-lr_scheduler = ReduceLROnPlateau(
-    monitor='val_loss',
-    factor=0.5,
-    patience=5,
-    min_lr=0.0001
-)
-
-# Train with smaller batch size
-history = model.fit(
-    X_train, y_train,
-    validation_data=(X_val, y_val),
-    epochs=100,
-    batch_size=32,
-    callbacks=[early_stopping, lr_scheduler],
-    verbose=1
-)
-
-# Rest of the code remains the same for predictions and plotting
-
-
-
-# Make predictions and calculate metrics (same as before)
-test_predictions = model.predict(X_test)
-
-# Scale predictions back
-pred_matrix = np.zeros((len(test_predictions), len(features)))
-pred_matrix[:, 0] = test_predictions.flatten()
-test_predictions = scaler.inverse_transform(pred_matrix)[:, 0]
-
-actual_matrix = np.zeros((len(y_test), len(features)))
-actual_matrix[:, 0] = y_test
-actual_prices = scaler.inverse_transform(actual_matrix)[:, 0]
-
-# Calculate metrics
-mse = mean_squared_error(actual_prices, test_predictions)
-rmse = np.sqrt(mse)
-mae = mean_absolute_error(actual_prices, test_predictions)
-r2 = r2_score(actual_prices, test_predictions)
-mape = np.mean(np.abs((actual_prices - test_predictions) / actual_prices)) * 100
-
-print("\nModel Performance Metrics on Test Set:")
-print(f"Root Mean Squared Error: ${rmse:.2f}")
-print(f"Mean Absolute Error: ${mae:.2f}")
-print(f"R-squared Score: {r2:.4f}")
-print(f"Mean Absolute Percentage Error: {mape:.2f}%")
-
-# Future predictions with continuity fix
-future_days = 30
-last_sequence = scaled_data[-sequence_length:]
-future_predictions = []
-last_actual_price = df['Close'].iloc[-1]
-
-# First prediction
-current_sequence = last_sequence.reshape((1, sequence_length, len(features)))
-next_pred = model.predict(current_sequence)
-pred_matrix = np.zeros((1, len(features)))
-pred_matrix[0, 0] = next_pred[0, 0]
-first_pred_unscaled = scaler.inverse_transform(pred_matrix)[0, 0]
-scaling_factor = last_actual_price / first_pred_unscaled
-
-# Generate future predictions
-for _ in range(future_days):
-    current_sequence = last_sequence.reshape((1, sequence_length, len(features)))
-    next_pred = model.predict(current_sequence)
-    new_row = np.zeros(len(features))
-    new_row[0] = next_pred[0, 0]
-    new_row[1:] = last_sequence[-1, 1:]
-    future_predictions.append(next_pred[0, 0])
-    last_sequence = np.vstack((last_sequence[1:], new_row))
-
-# Scale and adjust predictions
-future_pred_matrix = np.zeros((len(future_predictions), len(features)))
-future_pred_matrix[:, 0] = future_predictions
-future_predictions = scaler.inverse_transform(future_pred_matrix)[:, 0]
-future_predictions = future_predictions * scaling_factor
-
-
-future_dates = pd.date_range(start=df.index[-1] + timedelta(days=1), periods=future_days, freq='B')
-
-# Plot results
-plt.figure(figsize=(15, 7))
-plt.plot(df.index[-100:], df['Close'].values[-100:], label='Historical Prices')
-plt.plot(future_dates, future_predictions, label='Future Predictions', color='red')  # Fixed line
-plt.title(f'{ticker} Stock Price Prediction - Next {future_days} Days')
-plt.legend()
-plt.grid(True)
-plt.show()
-
-print(f"\nLast actual price: ${last_actual_price:.2f}")
-print(f"First prediction: ${future_predictions[0]:.2f}")
\ No newline at end of file
+
+from price_store import SP500_DIR, list_tickers
+from predictor_features import FEATURES, compute_features, load_features
+
+SEQUENCE_LENGTH = 21  # One month of trading days
+TRAIN_FRACTION = 0.7
+VAL_FRACTION = 0.15
+BATCH_SIZE = 32
+THREADS = os.cpu_count() or 1
+
+def build_features(data):
+    """Model features for one ticker's OHLCV frame, outliers and warm-up rows dropped"""
+    return compute_features(data)
+
+def fit_scaler(features):
+    """MinMaxScaler fitted on one ticker's feature matrix"""
+    from sklearn.preprocessing import MinMaxScaler
+    return MinMaxScaler().fit(features)
+
+def sequence_windows(scaled, seq_length=SEQUENCE_LENGTH):
+    """
+    Zero-copy input windows and next-bar targets for one scaled feature matrix.
+
+    X[i] is rows i..i+seq_length-1 (a strided view, no copy) and y[i] the scaled
+    close of the following row.
+    """
+    scaled = np.ascontiguousarray(scaled, dtype=np.float32)
+    if len(scaled) <= seq_length:
+        return np.empty((0, seq_length, scaled.shape[1]), np.float32), np.empty(0, np.float32)
+    X = sliding_window_view(scaled[:-1], (seq_length, scaled.shape[1]))[:, 0]
+    return X, scaled[seq_length:, 0]
+
+def split_indices(n_windows, train=TRAIN_FRACTION, val=VAL_FRACTION):
+    """Time-ordered train/validation/test window ranges for one ticker"""
+    train_end = int(n_windows * train)
+    val_end = train_end + int(n_windows * val)
+    return range(0, train_end), range(train_end, val_end), range(val_end, n_windows)
+
+def sequence_batches(windows, index, batch_size=BATCH_SIZE, rng=None):
+    """
+    Yield (X, y) batches from per-ticker window views.
+
+    windows is a list of (X, y) from sequence_windows and index an (n, 2) array
+    of (ticker position, window position) pairs. Only the rows of one batch are
+    ever copied; pass an rng to shuffle the order on every pass.
+    """
+    order = rng.permutation(len(index)) if rng is not None else np.arange(len(index))
+    for start in range(0, len(order), batch_size):
+        pairs = index[order[start:start + batch_size]]
+        X = np.stack([windows[t][0][w] for t, w in pairs])
+        y = np.array([windows[t][1][w] for t, w in pairs], dtype=np.float32)
+        yield X, y
+
+def sequence_dataset(windows, index, batch_size=BATCH_SIZE, shuffle=False, seed=0):
+    """tf.data pipeline over sequence_batches, regenerated (and reshuffled) every epoch"""
+    import tensorflow as tf
+    seq_length, n_features = windows[0][0].shape[1:]
+    rng = np.random.default_rng(seed) if shuffle else None
+    dataset = tf.data.Dataset.from_generator(
+        lambda: sequence_batches(windows, index, batch_size, rng),
+        output_signature=(
+            tf.TensorSpec((None, seq_length, n_features), tf.float32),
+            tf.TensorSpec((None,), tf.float32),
+        ))
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+def configure_threads(threads=THREADS):
+    """Limit TensorFlow's CPU thread pools; must run before any model is built"""
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(min(2, threads))
+    except RuntimeError:
+        pass  # TensorFlow already started; keep the pools it has
+
+def build_model(seq_length=SEQUENCE_LENGTH, n_features=len(FEATURES)):
+    """The two-layer LSTM forecaster, compiled with Huber loss"""
+    from keras.models import Sequential
+    from keras.layers import Input, LSTM, Dense, Dropout
+
+    # Simpler model architecture
+    model = Sequential([
+        Input((seq_length, n_features)),
+        LSTM(32, return_sequences=True),
+        Dropout(0.1),
+        LSTM(16),
+        Dropout(0.1),
+        Dense(1)
+    ])
+
+    # Compile with Huber loss
+    model.compile(optimizer='adam', loss='huber', metrics=['mae'])
+    return model
+
+def prepare_universe(feature_sets, seq_length=SEQUENCE_LENGTH, scalers=None):
+    """
+    Scalers and window views for {ticker: feature matrix}.
+
+    Pass the scalers of a saved model to reuse them instead of fitting new ones;
+    tickers without a scaler are then skipped.
+
+    Returns (prepared, index) where prepared maps ticker -> dict(features, scaler,
+    scaled, windows) and index holds the (ticker position, window position)
+    pairs of the train/val/test splits, each split taken in time order per ticker.
+    """
+    prepared = {}
+    for ticker, features in feature_sets.items():
+        if len(features) <= seq_length + 10 or (scalers is not None and ticker not in scalers):
+            continue
+        scaler = fit_scaler(features) if scalers is None else scalers[ticker]
+        scaled = scaler.transform(features).astype(np.float32)
+        prepared[ticker] = {'features': features, 'scaler': scaler, 'scaled': scaled,
+                            'windows': sequence_windows(scaled, seq_length)}
+
+    index = {'train': [], 'val': [], 'test': []}
+    for position, item in enumerate(prepared.values()):
+        for name, part in zip(index, split_indices(len(item['windows'][1]))):
+            index[name].append(np.column_stack([np.full(len(part), position), np.asarray(part)]))
+    index = {name: np.concatenate(parts).astype(np.int64) if parts else np.empty((0, 2), np.int64)
+             for name, parts in index.items()}
+    return prepared, index
+
+def fit_model(windows, index, epochs=100, batch_size=BATCH_SIZE, seed=0, verbose=1):
+    """
+    Build and fit the forecaster on the train pairs of index, early-stopping on the val pairs.
+
+    windows is the list of per-ticker (X, y) views that the index positions refer to.
+    """
+    from keras.callbacks import EarlyStopping, ReduceLROnPlateau
+
+    model = build_model(*windows[0][0].shape[1:])
+
+    # Callbacks
+    early_stopping = EarlyStopping(
+        monitor='val_loss',
+        patience=10,
+        restore_best_weights=True
+    )
+
+    lr_scheduler = ReduceLROnPlateau(
+        monitor='val_loss',
+        factor=0.5,
+        patience=5,
+        min_lr=0.0001
+    )
+
+    model.fit(
+        sequence_dataset(windows, index['train'], batch_size, shuffle=True, seed=seed),
+        validation_data=sequence_dataset(windows, index['val'], batch_size),
+        epochs=epochs,
+        callbacks=[early_stopping, lr_scheduler],
+        verbose=verbose
+    )
+    return model
+
+def train_universe(feature_sets, threads=THREADS, epochs=100, batch_size=BATCH_SIZE, seed=0, verbose=1):
+    """
+    Train one shared model on the windows of every ticker in feature_sets.
+
+    Windows stream from the per-ticker views through tf.data, so the full X
+    array is never built. Returns (model, prepared, index).
+    """
+    configure_threads(threads)
+    prepared, index = prepare_universe(feature_sets)
+    if not prepared:
+        raise ValueError("Not enough history in any ticker to build training sequences.")
+    windows = [item['windows'] for item in prepared.values()]
+    model = fit_model(windows, index, epochs, batch_size, seed, verbose)
+    return model, prepared, index
+
+def predict_windows(model, windows, index, batch_size=1024):
+    """Scaled next-bar predictions for the (ticker position, window position) pairs in index"""
+    out = np.empty(len(index), dtype=np.float32)
+    start = 0
+    for X, _ in sequence_batches(windows, index, batch_size):
+        out[start:start + len(X)] = np.asarray(model(X, training=False))[:, 0]
+        start += len(X)
+    return out
+
+def unscale_close(scaler, values):
+    """Scaled close predictions back to prices (MinMaxScaler column 0), no zero-padded matrices"""
+    return (np.asarray(values) - scaler.min_[0]) / scaler.scale_[0]
+
+def forecast_scaled(model, last_sequences, days=30, batch_size=1024):
+    """
+    Roll the model forward `days` steps for a batch of sequences at once.
+
+    last_sequences is (n_tickers, seq_length, n_features) in scaled units. Each
+    step predicts the next scaled close for every ticker, appends it as a new row
+    (other features carried forward from the last row) and drops the oldest.
+    Rows live in a ring buffer twice the sequence length, written at both slot
+    and slot + seq_length, so the current window is always a contiguous slice
+    and nothing is re-stacked. The model is called directly rather than through
+    predict(). Returns (n_tickers, days) scaled predictions.
+    """
+    last_sequences = np.asarray(last_sequences, dtype=np.float32)
+    n, seq_length, n_features = last_sequences.shape
+    ring = np.concatenate([last_sequences, last_sequences], axis=1)
+    carried = last_sequences[:, -1, 1:]
+    out = np.empty((n, days), dtype=np.float32)
+    start = 0
+    for step in range(days):
+        window = ring[:, start:start + seq_length]
+        for lo in range(0, n, batch_size):
+            out[lo:lo + batch_size, step] = np.asarray(model(window[lo:lo + batch_size], training=False))[:, 0]
+        row = np.concatenate([out[:, step:step + 1], carried], axis=1)
+        ring[:, start] = row
+        ring[:, start + seq_length] = row
+        start = (start + 1) % seq_length
+    return out
+
+def forecast_universe(model, prepared, days=30, seq_length=SEQUENCE_LENGTH):
+    """
+    Price forecasts for every prepared ticker in one batch, as a ticker x day DataFrame.
+
+    Same continuity fix as before: each path is scaled so its first prediction
+    lands on the last actual close.
+    """
+    tickers = list(prepared)
+    last_sequences = np.stack([prepared[t]['scaled'][-seq_length:] for t in tickers])
+    scaled = forecast_scaled(model, last_sequences, days)
+    prices = np.stack([unscale_close(prepared[t]['scaler'], scaled[i]) for i, t in enumerate(tickers)])
+    last_actual = np.array([prepared[t]['features']['Close'].iloc[-1] for t in tickers])
+    prices *= (last_actual / prices[:, 0])[:, None]
+    return pd.DataFrame(prices, index=pd.Index(tickers, name='Ticker'), columns=range(1, days + 1))
+
+def load_universe(tickers=None, directory=SP500_DIR):
+    """Feature matrices for stored tickers, from the per-ticker feature cache"""
+    tickers = list_tickers(directory) if tickers is None else tickers
+    return load_features(tickers, directory)
+
+def download(ticker, days=1500):
+    """Longer history for a single ticker straight from Yahoo Finance"""
+    import yfinance as yf
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)  # More historical data
+    return yf.download(ticker, start=start_date, end=end_date)
+
+def option(name, default):
+    """Value following a --name flag on the command line"""
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+    # python predictor.py [--ticker T] [--universe] [--dir DIR] [--threads N] [--epochs N]
+    ticker = option('--ticker', 'msft')
+    threads = int(option('--threads', THREADS))
+    epochs = int(option('--epochs', 100))
+    if '--universe' in sys.argv:
+        feature_sets = load_universe(directory=option('--dir', SP500_DIR))
+        ticker = next((t for t in feature_sets if t.lower() == ticker.lower()), next(iter(feature_sets)))
+    else:
+        feature_sets = {ticker: build_features(download(ticker))}
+
+    # Reuse the saved model and scalers for this ticker set and data cutoff when present
+    from model_store import get_or_train
+
+    def train(sets):
+        model, prepared, _ = train_universe(sets, threads=threads, epochs=epochs)
+        return model, prepared
+
+    configure_threads(threads)
+    model, scalers, meta = get_or_train(feature_sets, train)
+    prepared, index = prepare_universe(feature_sets, scalers=scalers)
+    item = prepared[ticker]
+    df, scaler, scaled_data = item['features'], item['scaler'], item['scaled']
+    sequence_length = SEQUENCE_LENGTH
+
+    # Test windows of the reported ticker
+    X, y = item['windows']
+    test = split_indices(len(y))[2]
+    X_test, y_test = X[test.start:test.stop], y[test.start:test.stop]
+
+    # Make predictions and scale them back to prices
+    test_predictions = unscale_close(scaler, model.predict(X_test).flatten())
+    actual_prices = unscale_close(scaler, y_test)
+
+    # Calculate metrics
+    mse = mean_squared_error(actual_prices, test_predictions)
+    rmse = np.sqrt(mse)
+    mae = mean_absolute_error(actual_prices, test_predictions)
+    r2 = r2_score(actual_prices, test_predictions)
+    mape = np.mean(np.abs((actual_prices - test_predictions) / actual_prices)) * 100
+
+    print(f"\nModel Performance Metrics on {ticker} Test Set:")
+    print(f"Root Mean Squared Error: ${rmse:.2f}")
+    print(f"Mean Absolute Error: ${mae:.2f}")
+    print(f"R-squared Score: {r2:.4f}")
+    print(f"Mean Absolute Percentage Error: {mape:.2f}%")
+
+    # Future predictions with continuity fix, every ticker in one batch
+    future_days = 30
+    last_actual_price = df['Close'].iloc[-1]
+    forecasts = forecast_universe(model, prepared, future_days)
+    future_predictions = forecasts.loc[ticker].to_numpy()
+    if len(forecasts) > 1:
+        os.makedirs('reports', exist_ok=True)
+        forecasts.round(2).to_csv(os.path.join('reports', 'forecasts.csv'))
+
+    future_dates = pd.date_range(start=df.index[-1] + timedelta(days=1), periods=future_days, freq='B')
+
+    # Plot results
+    plt.figure(figsize=(15, 7))
+    plt.plot(df.index[-100:], df['Close'].values[-100:], label='Historical Prices')
+    plt.plot(future_dates, future_predictions, label='Future Predictions', color='red')  # Fixed line
+    plt.title(f'{ticker} Stock Price Prediction - Next {future_days} Days')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+    print(f"\nLast actual price: ${last_actual_price:.2f}")
+    print(f"First prediction: ${future_predictions[0]:.2f}")
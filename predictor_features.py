@@ -0,0 +1,110 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+import indicators
+from price_store import SP500_DIR, ticker_path, file_version, load_matrix, on_own_calendar
+
+CACHE_DIR = os.path.join('cache', 'features')
+FEATURES = ['Close', 'Volume_Ratio', 'RSI', 'Price_to_MA50', 'Volatility']
+RSI_PERIOD = 14
+VOLATILITY_WINDOW = 21
+VOLUME_WINDOW = 20
+MA_WINDOWS = (10, 20, 50)
+OUTLIER_STD = 3
+FEATURE_VERSION = 3  # Bump when the feature computation changes, so cached matrices are rebuilt
+
+def feature_panel(close, volume):
+    """
+    Every candidate feature for aligned (date x ticker) close and volume frames.
+
+    Returns a dict of feature name -> (date x ticker) frame: returns, rolling
+    volatility, Wilder RSI, price-to-MA ratios and volume ratio. Tickers
+    sharing a calendar are computed together with array operations, each
+    group on its own dates, so a weekend-trading ticker doesn't put NaN gaps
+    into the other tickers' windows.
+    """
+    return on_own_calendar(lambda f: _feature_panel(f['Close'], f['Volume']),
+                           {'Close': close, 'Volume': volume})
+
+def _feature_panel(close, volume):
+    returns = close.pct_change(fill_method=None)
+    panel = {
+        'Close': close,
+        'Returns': returns,
+        'Volatility': returns.rolling(VOLATILITY_WINDOW).std(),
+        'RSI': indicators.rsi(close, RSI_PERIOD),
+        'Volume_Ratio': volume / indicators.sma(volume, VOLUME_WINDOW),
+    }
+    for window in MA_WINDOWS:
+        panel[f'Price_to_MA{window}'] = close / indicators.sma(close, window)
+    return panel
+
+def ticker_rows(panel, ticker, features=FEATURES):
+    """One ticker's own rows of a panel: the features plus Returns, before any filtering"""
+    columns = list(dict.fromkeys([*features, 'Returns']))
+    df = pd.DataFrame({name: panel[name][ticker] for name in columns})
+    return df[df['Close'].notna()]
+
+def select_features(rows, features=FEATURES, outliers_before=None):
+    """
+    Model features from a ticker's rows with return outliers (beyond OUTLIER_STD
+    standard deviations) and warm-up rows dropped. The standard deviation is
+    taken over the rows before outliers_before when given, so a backtest's
+    filter only sees its training history; over all rows otherwise.
+    """
+    returns = rows['Returns']
+    reference = returns if outliers_before is None else returns[rows.index < outliers_before]
+    rows = rows[returns.abs() < reference.std() * OUTLIER_STD]
+    return rows[list(features)].dropna()
+
+def ticker_features(panel, ticker, features=FEATURES, outliers_before=None):
+    """One ticker's model features from a panel (see select_features)"""
+    return select_features(ticker_rows(panel, ticker, features), features, outliers_before)
+
+def compute_features(data, features=FEATURES):
+    """Model features for a single OHLCV frame (e.g. a fresh download)"""
+    panel = feature_panel(data['Close'].to_frame('ticker'), data['Volume'].to_frame('ticker'))
+    return ticker_features(panel, 'ticker', features)
+
+def feature_set_id(features=FEATURES):
+    """Short id of the feature list and parameters, part of every cache key"""
+    spec = repr((list(features), RSI_PERIOD, VOLATILITY_WINDOW, VOLUME_WINDOW, MA_WINDOWS, OUTLIER_STD,
+                 FEATURE_VERSION))
+    return hashlib.sha1(spec.encode()).hexdigest()[:12]
+
+def _cache_path(ticker, directory, cache_dir):
+    return os.path.join(cache_dir, os.path.basename(os.path.normpath(directory)), f"{ticker}.pkl")
+
+def load_features(tickers, directory=SP500_DIR, features=FEATURES, cache_dir=CACHE_DIR, outliers_before=None):
+    """
+    Feature matrices for stored tickers, cached per ticker.
+
+    A ticker's cached rows are reused while its price file's content hash and
+    the feature set are unchanged; the rest are computed together in one panel
+    and written back. The cache holds the rows before outlier filtering, which
+    select_features applies on the way out (see outliers_before there).
+    Returns {ticker: DataFrame}.
+    """
+    set_id = feature_set_id(features)
+    result, missing, versions = {}, [], {}
+    for ticker in tickers:
+        versions[ticker] = file_version(ticker_path(ticker, directory))
+        path = _cache_path(ticker, directory, cache_dir)
+        if os.path.exists(path):
+            cached = pd.read_pickle(path)
+            if cached['version'] == versions[ticker] and cached['feature_set'] == set_id:
+                result[ticker] = cached['rows']
+                continue
+        missing.append(ticker)
+
+    if missing:
+        prices = load_matrix(directory, fields=('Close', 'Volume'), tickers=missing)
+        panel = feature_panel(prices['Close'], prices['Volume'])
+        os.makedirs(os.path.dirname(_cache_path('', directory, cache_dir)), exist_ok=True)
+        for ticker in missing:
+            result[ticker] = ticker_rows(panel, ticker, features).astype(np.float32)
+            pd.to_pickle({'version': versions[ticker], 'feature_set': set_id, 'rows': result[ticker]},
+                         _cache_path(ticker, directory, cache_dir))
+    return {ticker: select_features(result[ticker], features, outliers_before) for ticker in tickers}
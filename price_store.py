@@ -0,0 +1,86 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Directories written by get_sp500pricedata.py / get_portfoliprice.py / get_sectorpricedata.py
+SP500_DIR = 'sp500pricedata'
+PORTFOLIO_DIR = 'portfoliopricedata'
+SECTOR_DIR = 'sp500sectorpricedata'
+
+def list_tickers(directory=SP500_DIR):
+    """Tickers with a price CSV in the directory, sorted"""
+    return sorted(f[:-4] for f in os.listdir(directory) if f.endswith('.csv'))
+
+def ticker_path(ticker, directory=SP500_DIR):
+    return os.path.join(directory, f"{ticker}.csv")
+
+def load_prices(ticker, directory=SP500_DIR):
+    """Read one ticker's OHLCV CSV indexed by Date"""
+    return pd.read_csv(ticker_path(ticker, directory), parse_dates=['Date'], index_col='Date')
+
+def file_version(path):
+    """Content hash of a price file, so a rewrite with identical data keeps its version"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def stat_version(path):
+    """Cheap version of a file from its size and modification time, for lookups that can't afford a content hash"""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+def data_version(directory=SP500_DIR, tickers=None):
+    """Combined version of every price file in the directory (or the given tickers)"""
+    tickers = list_tickers(directory) if tickers is None else sorted(tickers)
+    digest = hashlib.sha1()
+    for ticker in tickers:
+        digest.update(ticker.encode())
+        digest.update(file_version(ticker_path(ticker, directory)).encode())
+    return digest.hexdigest()
+
+def load_matrix(directory=SP500_DIR, fields=('Close',), tickers=None):
+    """
+    Aligned (date x ticker) frames for the requested price fields.
+
+    Returns a dict of field -> DataFrame on the union of all dates, with NaN where
+    a ticker has no bar.
+    """
+    tickers = list_tickers(directory) if tickers is None else list(tickers)
+    columns = {field: {} for field in fields}
+    for ticker in tickers:
+        df = pd.read_csv(ticker_path(ticker, directory), parse_dates=['Date'], index_col='Date',
+                         usecols=['Date', *fields])
+        for field in fields:
+            columns[field][ticker] = df[field]
+    return {field: pd.DataFrame(series).sort_index() for field, series in columns.items()}
+
+def calendar_groups(frame):
+    """
+    Columns of a (date x ticker) frame grouped by the dates they trade on.
+
+    Yields (dates, columns) per group. Gaps before a ticker's first or after its
+    last bar don't count, so stocks listed at different times still share the
+    exchange calendar while e.g. BTC (weekends) lands in a group of its own.
+    """
+    valid = frame.notna().to_numpy()
+    inside = np.maximum.accumulate(valid, axis=0) & np.maximum.accumulate(valid[::-1], axis=0)[::-1]
+    in_calendar = valid | ~inside
+    groups = {}
+    for i, column in enumerate(frame.columns):
+        groups.setdefault(in_calendar[:, i].tobytes(), (in_calendar[:, i], []))[1].append(column)
+    for mask, columns in groups.values():
+        yield frame.index[mask], columns
+
+def on_own_calendar(compute, frames):
+    """
+    Run compute(frames) -> {name: frame} separately on each calendar group of
+    the aligned frames, so rolling windows only see each ticker's own bars.
+
+    Results are put back on the union dates and column order of the inputs,
+    NaN on dates a ticker has no bar.
+    """
+    first = next(iter(frames.values()))
+    parts = [compute({k: f.loc[dates, columns] for k, f in frames.items()})
+             for dates, columns in calendar_groups(first)]
+    return {name: pd.concat([p[name] for p in parts], axis=1, sort=False).reindex(index=first.index, columns=first.columns)
+            for name in parts[0]}
@@ -0,0 +1,167 @@
+import io
+import os
+import json
+import hashlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# Extra destination for the Excel report (e.g. the Windows desktop under WSL); empty disables it
+COPY_DIR = os.environ.get('STOCK_REPORT_COPY_DIR', '/mnt/c/tmp')
+MANIFEST = '.report_hashes.json'
+
+def table_hash(table):
+    """Hash of the table's columns, dtypes and values; independent of render time"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([(str(c), str(t)) for c, t in table.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def column_widths(table, padding=2):
+    """Display width per column from the header and the widest formatted value"""
+    widths = []
+    for column in table.columns:
+        values = table[column].dropna()
+        longest = int(values.astype(str).str.len().max()) if len(values) else 0
+        widths.append(max(longest, len(str(column))) + padding)
+    return widths
+
+class ReportSink:
+    """
+    A report format: renders the results table to bytes saved under one or more
+    paths, plus optional copies (e.g. outside the repo) whose failures are
+    reported on their own instead of failing the sink.
+    """
+    extension = ''
+
+    def __init__(self, name, paths, copies=()):
+        self.name = name
+        self.paths = list(paths)
+        self.copies = list(copies)
+
+    def render(self, table, title, generated):
+        raise NotImplementedError
+
+    def write(self, data, paths=None):
+        for path in self.paths if paths is None else paths:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+
+class CsvSink(ReportSink):
+    extension = 'csv'
+
+    def render(self, table, title, generated):
+        return table.to_csv(index=False).encode()
+
+class ExcelSink(ReportSink):
+    extension = 'xlsx'
+
+    def render(self, table, title, generated):
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+            table.to_excel(writer, sheet_name='Stock Analysis', index=False)
+            workbook = writer.book
+            worksheet = writer.sheets['Stock Analysis']
+            header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
+            for col_num, value in enumerate(table.columns.values):
+                worksheet.write(0, col_num, value, header_format)
+            for col_num, width in enumerate(column_widths(table)):
+                worksheet.set_column(col_num, col_num, width)
+        return buffer.getvalue()
+
+class TextSink(ReportSink):
+    extension = 'txt'
+
+    def render(self, table, title, generated):
+        from tabulate import tabulate  # pip install tabulate
+        stamp = generated.strftime('%Y-%m-%d %H:%M:%S')
+        return (f"{title} - {stamp}\n" + "=" * 100 + "\n\n"
+                + tabulate(table, headers='keys', tablefmt='grid')
+                + f"\n\nTotal stocks analyzed: {len(table)}\n"
+                + f"Report generated on: {stamp}").encode()
+
+class HtmlSink(ReportSink):
+    extension = 'html'
+
+    def render(self, table, title, generated):
+        return f"""
+<html>
+<head>
+    <title>{title}</title>
+    <style>
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ padding: 8px; text-align: left; border: 1px solid #ddd; }}
+        th {{ background-color: #f2f2f2; }}
+        tr:nth-child(even) {{ background-color: #f9f9f9; }}
+        tr:hover {{ background-color: #f5f5f5; }}
+    </style>
+</head>
+<body>
+    <h2>{title} - {generated.strftime('%Y-%m-%d %H:%M:%S')}</h2>
+    {table.to_html(index=False)}
+    <p>Total stocks analyzed: {len(table)}</p>
+</body>
+</html>
+""".encode()
+
+def default_sinks(output_dir='reports', basename='stock_analysis', copy_dir=COPY_DIR):
+    """CSV, Excel, text and HTML sinks; the Excel bytes are also copied to copy_dir if set"""
+    def path(ext):
+        return os.path.join(output_dir, f"{basename}.{ext}")
+    excel_copies = [os.path.join(copy_dir, f"{basename}.xlsx")] if copy_dir else []
+    return [
+        CsvSink('CSV', [path('csv')]),
+        ExcelSink('Excel', [path('xlsx')], excel_copies),
+        TextSink('Text', [path('txt')]),
+        HtmlSink('HTML', [path('html')]),
+    ]
+
+def write_reports(table, sinks, title='Stock Analysis Report', manifest_dir='reports', max_workers=4):
+    """
+    Render the table into every sink in parallel threads and write the results.
+
+    A sink is skipped when all its files exist and the table hash matches the
+    one recorded for it last time. Copies are tracked and reported separately,
+    as '<sink name> copy', so a failed copy doesn't mark the sink failed (and is
+    retried next run). Returns {name: 'written' | 'unchanged' | error}.
+    """
+    manifest_path = os.path.join(manifest_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    current = table_hash(table)
+    generated = datetime.now()
+
+    def up_to_date(paths):
+        return manifest.get('|'.join(paths)) == current and all(os.path.exists(p) for p in paths)
+
+    def run(sink):
+        targets = [(sink.name, sink.paths)] + ([(f"{sink.name} copy", sink.copies)] if sink.copies else [])
+        status = {name: 'unchanged' for name, paths in targets if up_to_date(paths)}
+        pending = [(name, paths) for name, paths in targets if name not in status]
+        if not pending:
+            return status
+        try:
+            data = sink.render(table, title, generated)
+        except Exception as e:
+            return {**status, **{name: f"failed: {e}" for name, _ in pending}}
+        for name, paths in pending:
+            try:
+                sink.write(data, paths)
+            except Exception as e:
+                status[name] = f"failed: {e}"
+                continue
+            manifest['|'.join(paths)] = current
+            status[name] = 'written'
+        return status
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        status = {name: result for results in pool.map(run, sinks) for name, result in results.items()}
+
+    os.makedirs(manifest_dir, exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return status
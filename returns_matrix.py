@@ -0,0 +1,144 @@
+import os
+import numpy as np
+import pandas as pd
+
+from price_store import SP500_DIR, SECTOR_DIR, list_tickers, load_matrix, data_version
+
+TRADING_DAYS = 252
+BENCHMARK = 'SPY'
+ROLLING_WINDOW = 60
+CACHE_DIR = 'cache'
+CACHE_FILE = 'returns_matrix.pkl'
+CACHE_FORMAT = 2  # Part of the cache version; bump when the cached dict changes
+
+def build_close(directories=(SP500_DIR, SECTOR_DIR)):
+    """Aligned closes for every ticker across the given price directories; later directories win on duplicate tickers"""
+    frames = []
+    seen = set()
+    # Walk from the last directory so its copy of a duplicated ticker is the one kept
+    for directory in reversed(directories):
+        if not os.path.isdir(directory):
+            continue
+        tickers = [t for t in list_tickers(directory) if t not in seen]
+        seen.update(tickers)
+        frames.insert(0, load_matrix(directory, fields=('Close',), tickers=tickers)['Close'])
+    return pd.concat(frames, axis=1).sort_index()
+
+def returns_from_close(close):
+    """Returns over each ticker's own consecutive bars, placed on the union calendar"""
+    prev_close = close.ffill().shift()
+    return (close / prev_close - 1).where(close.notna())
+
+def build_returns(directories=(SP500_DIR, SECTOR_DIR)):
+    """
+    Aligned daily returns for every ticker across the given price directories.
+
+    Later directories win on duplicate tickers. Returns are taken over each
+    ticker's own consecutive bars, then placed on the union calendar.
+    """
+    return returns_from_close(build_close(directories))
+
+def period_change(close):
+    """Last close / first close - 1 over each ticker's stored history"""
+    return close.ffill().iloc[-1] / close.bfill().iloc[0] - 1
+
+def cross_sectional_stats(returns, benchmark=BENCHMARK):
+    """
+    Volatility, beta and correlation to the benchmark for every column.
+
+    Missing returns are zero-filled after demeaning over each column's own
+    observations, so the covariance with the benchmark is a single
+    matrix-vector product over dates both have data.
+    """
+    r = returns.to_numpy()
+    m = returns[benchmark].to_numpy()
+    observed = ~np.isnan(r) & ~np.isnan(m)[:, None]
+    n = observed.sum(axis=0)
+
+    x = np.where(observed, r, 0.0)
+    y = np.where(observed, m[:, None], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = x.sum(axis=0) / n
+        y_mean = y.sum(axis=0) / n
+        xc = np.where(observed, x - x_mean, 0.0)
+        yc = np.where(observed, y - y_mean, 0.0)
+        cov = np.einsum('ij,ij->j', xc, yc) / (n - 1)
+        var_x = np.einsum('ij,ij->j', xc, xc) / (n - 1)
+        var_y = np.einsum('ij,ij->j', yc, yc) / (n - 1)
+        beta = cov / var_y
+        corr = cov / np.sqrt(var_x * var_y)
+
+    daily_vol = np.nanstd(r, axis=0, ddof=1)
+    return pd.DataFrame({
+        'Daily Volatility': daily_vol,
+        'Annualized Volatility': daily_vol * np.sqrt(TRADING_DAYS),
+        'Beta': beta,
+        'Correlation': corr,
+        'Observations': n,
+    }, index=returns.columns)
+
+def rolling_beta(returns, benchmark=BENCHMARK, window=ROLLING_WINDOW):
+    """
+    Rolling beta of every column over window bars, from rolling sums of x*y, x, y
+    and y*y (one cumulative sum per term across the whole matrix). Windows with a
+    missing return in either series are NaN.
+    """
+    r = returns.to_numpy()
+    m = returns[benchmark].to_numpy()[:, None]
+    valid = ~np.isnan(r) & ~np.isnan(m)
+    x = np.where(valid, r, 0.0)
+    y = np.where(valid, m, 0.0)
+
+    def window_sum(a):
+        c = np.cumsum(a, axis=0)
+        out = np.full(a.shape, np.nan)
+        if len(a) >= window:
+            out[window - 1] = c[window - 1]
+            out[window:] = c[window:] - c[:-window]
+        return out
+
+    count = window_sum(valid.astype(np.float64))
+    sx, sy, sxy, syy = window_sum(x), window_sum(y), window_sum(x * y), window_sum(y * y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / window
+        var = syy - sy * sy / window
+        beta = np.where(count == window, cov / var, np.nan)
+    return pd.DataFrame(beta, index=returns.index, columns=returns.columns)
+
+def load_returns_matrix(directories=(SP500_DIR, SECTOR_DIR), cache_dir=CACHE_DIR, benchmark=BENCHMARK):
+    """
+    Returns matrix, cross-sectional stats and rolling beta, cached on disk.
+
+    The cache is rebuilt when any price file's content changes, so the other
+    analytics scripts can reuse the matrix instead of re-reading 500 CSVs.
+    Returns a dict with 'returns', 'stats', 'rolling_beta' and 'period_change'
+    (last close / first close - 1, from the float64 closes).
+    """
+    directories = [d for d in directories if os.path.isdir(d)]
+    version = f"{CACHE_FORMAT}|" + '|'.join(f"{d}:{data_version(d)}" for d in directories)
+    cache_file = os.path.join(cache_dir, CACHE_FILE)
+    if os.path.exists(cache_file):
+        cached = pd.read_pickle(cache_file)
+        if cached.get('version') == version:
+            return cached
+
+    close = build_close(directories)
+    returns = returns_from_close(close)
+    if benchmark not in returns.columns:
+        raise ValueError(f"{benchmark} data not found. Please ensure it is in one of {directories}.")
+    result = {
+        'version': version,
+        'returns': returns.astype(np.float32),
+        'stats': cross_sectional_stats(returns, benchmark),
+        'rolling_beta': rolling_beta(returns, benchmark).astype(np.float32),
+        'period_change': period_change(close),
+    }
+    os.makedirs(cache_dir, exist_ok=True)
+    pd.to_pickle(result, cache_file)
+    return result
+
+if __name__ == '__main__':
+    matrix = load_returns_matrix()
+    stats = matrix['stats'].sort_values('Beta', ascending=False)
+    print(f"{matrix['returns'].shape[1]} tickers x {matrix['returns'].shape[0]} days")
+    print(stats.head(20).to_string(float_format=lambda v: f"{v:.4f}"))
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import pandas as pd
+
+import indicators
+from period_returns import relative_strength
+from price_store import SP500_DIR, SECTOR_DIR, PORTFOLIO_DIR, list_tickers, load_matrix
+
+BENCHMARK = 'SPY'
+RS_WINDOW = 63
+MOMENTUM_WINDOWS = (21, 63, 126)  # About one, three and six months
+BREADTH_SMA = 50
+OUTPUT_DIR = os.path.join('reports', 'sector_rotation')
+DB_PATH = os.path.join(os.path.expanduser("~"), 'myproject_data', 'sp500_data.db')
+
+# GICS sector (as stored by get_sp500tickers.py) -> Select Sector SPDR ETF
+SECTOR_ETFS = {
+    'Communication Services': 'XLC',
+    'Consumer Discretionary': 'XLY',
+    'Consumer Staples': 'XLP',
+    'Energy': 'XLE',
+    'Financials': 'XLF',
+    'Health Care': 'XLV',
+    'Industrials': 'XLI',
+    'Information Technology': 'XLK',
+    'Materials': 'XLB',
+    'Real Estate': 'XLRE',
+    'Utilities': 'XLU',
+}
+
+def load_sector_map(db_path=DB_PATH):
+    """Ticker -> sector ETF for the S&P constituents; empty if the ticker table has no sectors yet"""
+    if not os.path.exists(db_path):
+        return pd.Series(dtype=object)
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(tickers)")]
+        if 'Sector' not in columns:
+            return pd.Series(dtype=object)
+        table = pd.read_sql("SELECT Ticker, Sector FROM tickers", conn)
+    return table.set_index('Ticker')['Sector'].map(SECTOR_ETFS).dropna()
+
+def load_sector_close(directory=SECTOR_DIR, benchmark=BENCHMARK):
+    """Aligned sector ETF closes, with the benchmark pulled from the portfolio data if the sector folder lacks it"""
+    close = load_matrix(directory)['Close']
+    if benchmark not in close.columns:
+        extra = load_matrix(PORTFOLIO_DIR, tickers=[benchmark])['Close']
+        close = close.join(extra, how='left')
+    return close
+
+def momentum_score(close, windows=MOMENTUM_WINDOWS):
+    """Average of the trailing returns over each lookback, per date and ticker"""
+    filled = close.ffill()
+    return sum(filled / filled.shift(w) - 1 for w in windows) / len(windows)
+
+def momentum_ranks(close, windows=MOMENTUM_WINDOWS):
+    """Cross-sectional rank of the momentum score on every date; 1 is the strongest"""
+    return momentum_score(close, windows).rank(axis=1, ascending=False, method='min')
+
+def sector_breadth(close, sector_map, sma_window=BREADTH_SMA):
+    """
+    Per sector and date: share of constituents above their SMA and share with a
+    positive 21-day return. Constituents without a bar or SMA yet are not counted.
+    """
+    members = [t for t in close.columns if t in sector_map.index]
+    close = close[members]
+    sector = sector_map[members]
+    sma = indicators.sma(close, sma_window)
+    known = sma.notna() & close.notna()
+    above = (close > sma).astype(float).where(known)
+    rising = (close / close.shift(21) > 1).astype(float).where(close.shift(21).notna() & close.notna())
+    return {
+        f'Above {sma_window}SMA': above.T.groupby(sector).mean().T,
+        'Advancing 21D': rising.T.groupby(sector).mean().T,
+    }
+
+def constituent_ranks(close, sector_map, windows=MOMENTUM_WINDOWS):
+    """Percentile rank of each constituent's momentum within its sector per date; 1/n is the strongest, 1.0 the weakest"""
+    members = [t for t in close.columns if t in sector_map.index]
+    score = momentum_score(close[members], windows)
+    sector = sector_map[members]
+    ranks = score.T.groupby(sector).rank(ascending=False, pct=True).T
+    return ranks[members]
+
+def sector_rotation(sector_close, constituent_close=None, sector_map=None, benchmark=BENCHMARK,
+                    rs_window=RS_WINDOW, windows=MOMENTUM_WINDOWS):
+    """
+    Rotation time series for the sector ETFs (and their constituents when given).
+
+    Returns a dict of date x column frames: 'relative_strength' and 'momentum'
+    (score) and 'rank' for the ETFs vs the benchmark, plus 'breadth_*' per sector
+    and 'constituent_rank' when constituents and a sector map are supplied.
+    """
+    etfs = [t for t in sector_close.columns if t != benchmark]
+    rs = relative_strength(sector_close, benchmark, rs_window)[etfs]
+    result = {
+        'relative_strength': rs,
+        'momentum': momentum_score(sector_close[etfs], windows),
+        'rank': momentum_ranks(sector_close[etfs], windows),
+    }
+    if constituent_close is not None and sector_map is not None and len(sector_map):
+        for name, frame in sector_breadth(constituent_close, sector_map).items():
+            result[f"breadth_{name.lower().replace(' ', '_')}"] = frame
+        result['constituent_rank'] = constituent_ranks(constituent_close, sector_map, windows)
+    return result
+
+def write_rotation(result, output_dir=OUTPUT_DIR, decimals=4):
+    """Write every rotation series to <output_dir>/<name>.csv (dates down, tickers across) for backtests"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, frame in result.items():
+        path = os.path.join(output_dir, f"{name}.csv")
+        frame.dropna(how='all').round(decimals).to_csv(path, index_label='Date')
+        paths.append(path)
+    return paths
+
+def run(sector_dir=SECTOR_DIR, constituent_dir=SP500_DIR, output_dir=OUTPUT_DIR, db_path=DB_PATH):
+    """Load the stored sector and constituent prices, compute the rotation series and write them"""
+    sector_close = load_sector_close(sector_dir)
+    sector_map = load_sector_map(db_path)
+    constituent_close = None
+    if len(sector_map) and os.path.isdir(constituent_dir):
+        members = [t for t in list_tickers(constituent_dir) if t in sector_map.index]
+        constituent_close = load_matrix(constituent_dir, tickers=members)['Close']
+    result = sector_rotation(sector_close, constituent_close, sector_map)
+    write_rotation(result, output_dir)
+    return result
+
+if __name__ == '__main__':
+    result = run()
+    latest = pd.DataFrame({
+        'Rank': result['rank'].iloc[-1],
+        'Momentum (%)': result['momentum'].iloc[-1] * 100,
+        'RS vs SPY (%)': result['relative_strength'].iloc[-1] * 100,
+    })
+    breadth = result.get(f'breadth_above_{BREADTH_SMA}sma')
+    if breadth is not None:
+        latest[f'% Above {BREADTH_SMA}SMA'] = breadth.iloc[-1] * 100
+    print(latest.sort_values('Rank').round(2).to_string())
+    print(f"\nRotation series written to {OUTPUT_DIR}")
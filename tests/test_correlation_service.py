@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from correlation_service import CorrelationService
+
+def _returns(n=100, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(0, 0.01, (n, 3)), index=pd.bdate_range('2024-01-01', periods=n),
+                        columns=['AAA', 'BBB', 'CCC'])
+
+def test_incremental_update_matches_full_window(tmp_path):
+    returns = _returns()
+    CorrelationService('portfolio', windows=(20,), cache_dir=str(tmp_path)).update(returns.iloc[:90])
+    service = CorrelationService('portfolio', windows=(20,), cache_dir=str(tmp_path)).update(returns)
+    pd.testing.assert_frame_equal(service.correlation(20), returns.iloc[-20:].corr())
+
+def test_revised_history_rebuilds_the_window(tmp_path):
+    returns = _returns()
+    CorrelationService('portfolio', windows=(20,), cache_dir=str(tmp_path)).update(returns.iloc[:90])
+    revised = returns.copy()
+    revised.iloc[85, 0] = 0.2  # e.g. a split adjustment rewrote an already-consumed row
+    service = CorrelationService('portfolio', windows=(20,), cache_dir=str(tmp_path)).update(revised)
+    pd.testing.assert_frame_equal(service.correlation(20), revised.iloc[-20:].corr())
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+import indicator_panel
+from indicator_panel import compute_panels, write_panels, load_panel
+from price_store import load_matrix
+
+def _ohlc(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': 1000}, index=pd.DatetimeIndex(dates, name='Date'))
+
+def _mixed_universe():
+    """Two stocks on the 5-day calendar (one listed later) and BTC on the 7-day calendar"""
+    return {
+        'AAA': _ohlc(pd.bdate_range('2023-01-02', periods=300), 1),
+        'BBB': _ohlc(pd.bdate_range('2023-03-01', periods=250), 2),
+        'BTC': _ohlc(pd.date_range('2023-01-01', periods=420), 3),
+    }
+
+def _aligned(universe, field):
+    return pd.DataFrame({t: df[field] for t, df in universe.items()}).sort_index()
+
+def test_mixed_calendars_match_single_ticker_panels():
+    universe = _mixed_universe()
+    panels = compute_panels(*(_aligned(universe, f) for f in ('High', 'Low', 'Close')))
+    for ticker, df in universe.items():
+        alone = compute_panels(df[['High']].rename(columns={'High': ticker}),
+                               df[['Low']].rename(columns={'Low': ticker}),
+                               df[['Close']].rename(columns={'Close': ticker}))
+        for name, frame in panels.items():
+            pd.testing.assert_series_equal(frame[ticker].reindex(df.index), alone[name][ticker],
+                                           check_names=False)
+
+def test_weekend_ticker_does_not_blank_stock_indicators():
+    universe = _mixed_universe()
+    panels = compute_panels(*(_aligned(universe, f) for f in ('High', 'Low', 'Close')))
+    for name in ('SMA20', 'SMA200', 'ATR14', 'HMA34', 'Volatility21', 'Returns'):
+        stock = panels[name]['AAA'].dropna()
+        assert len(stock) > 0, name
+    # Monday's return is taken against Friday's close
+    monday = universe['AAA'].index[universe['AAA'].index.dayofweek == 0][1]
+    close = universe['AAA']['Close']
+    expected = close[monday] / close[close.index < monday].iloc[-1] - 1
+    assert np.isclose(panels['Returns'].loc[monday, 'AAA'], expected)
+    # Weekend dates stay empty for stocks and filled for BTC
+    saturday = pd.Timestamp('2023-06-03')
+    assert np.isnan(panels['SMA20'].loc[saturday, 'AAA'])
+    assert not np.isnan(panels['SMA20'].loc[saturday, 'BTC'])
+
+def test_write_panels_keeps_each_tickers_own_rows(tmp_path):
+    for ticker, df in _mixed_universe().items():
+        df.to_csv(tmp_path / f"{ticker}.csv")
+    assert sorted(write_panels(str(tmp_path))) == ['AAA', 'BBB', 'BTC']
+    panel = load_panel('AAA', str(tmp_path))
+    assert len(panel) == 300 and panel.index.dayofweek.max() < 5
+    assert panel['SMA200'].notna().sum() == 300 - 199
+    assert write_panels(str(tmp_path)) == []
+
+def test_stored_panels_keep_full_precision(tmp_path):
+    universe = _mixed_universe()
+    for ticker, df in universe.items():
+        df.to_csv(tmp_path / f"{ticker}.csv")
+    write_panels(str(tmp_path))
+    prices = load_matrix(str(tmp_path), fields=('High', 'Low', 'Close'))
+    panels = compute_panels(prices['High'], prices['Low'], prices['Close'])
+    stored = indicator_panel.load_panels(list(universe), str(tmp_path))
+    assert sorted(stored) == ['AAA', 'BBB', 'BTC']
+    for name in ('HMA5', 'HMA34', 'SMA200'):
+        expected = panels[name]['BTC'].dropna().to_numpy()
+        assert np.array_equal(stored['BTC'][name].dropna().to_numpy(), expected), name
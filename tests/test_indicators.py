@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from indicators import IndicatorCache
+
+def _write_prices(directory, ticker, closes):
+    dates = pd.bdate_range('2024-01-01', periods=len(closes))
+    close = pd.Series(closes, dtype=float)
+    frame = pd.DataFrame({'Date': dates, 'Open': close, 'High': close + 1, 'Low': close - 1,
+                          'Close': close, 'Volume': 1000})
+    frame.to_csv(directory / f"{ticker}.csv", index=False)
+
+def test_indicator_cache_persists_across_instances(tmp_path, monkeypatch):
+    _write_prices(tmp_path, 'AAA', np.linspace(10, 20, 30))
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(indicators, '_cache', IndicatorCache(cache_dir=str(cache_dir)))
+    first = indicators.indicator('AAA', 'sma', str(tmp_path), period=5)
+    assert indicators.cache_info()['misses'] == 1
+
+    # A fresh process-level cache reads the stored result instead of recomputing
+    monkeypatch.setattr(indicators, '_cache', IndicatorCache(cache_dir=str(cache_dir)))
+    second = indicators.indicator('AAA', 'sma', str(tmp_path), period=5)
+    assert indicators.cache_info() == {'hits': 1, 'misses': 0, 'size': 1, 'maxsize': 4096}
+    pd.testing.assert_series_equal(first, second)
+
+    # Rewriting the price file changes its version; the old entry stops matching and is deleted
+    _write_prices(tmp_path, 'AAA', np.linspace(20, 30, 30))
+    third = indicators.indicator('AAA', 'sma', str(tmp_path), period=5)
+    assert indicators.cache_info()['misses'] == 1
+    assert third.iloc[-1] > first.iloc[-1]
+    assert len(os.listdir(cache_dir / tmp_path.name / 'AAA')) == 1
+
+def test_indicator_keeps_the_callers_index(tmp_path, monkeypatch):
+    _write_prices(tmp_path, 'AAA', np.linspace(10, 20, 30))
+    monkeypatch.setattr(indicators, '_cache', IndicatorCache(cache_dir=str(tmp_path / 'cache')))
+    raw = pd.read_csv(tmp_path / 'AAA.csv')
+    by_row = indicators.indicator('AAA', 'atr', str(tmp_path), df=raw, period=5)
+    by_date = indicators.indicator('AAA', 'atr', str(tmp_path), period=5)
+    assert indicators.cache_info()['hits'] == 1
+    assert isinstance(by_row.index, pd.RangeIndex)
+    assert isinstance(by_date.index, pd.DatetimeIndex)
+    np.testing.assert_array_equal(by_row.to_numpy(), by_date.to_numpy())
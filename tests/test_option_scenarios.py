@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import option_scenarios
+from option_scenarios import parse_legs, pnl_surface, breakevens, strategy_legs, scenario, CONTRACT_SIZE
+
+def test_parse_legs():
+    assert parse_legs('call:800:30:1, PUT:780:30:-2') == [
+        {'type': 'call', 'strike': 800.0, 'days': 30, 'quantity': 1},
+        {'type': 'put', 'strike': 780.0, 'days': 30, 'quantity': -2},
+    ]
+
+@pytest.mark.parametrize('text', ['cal:100:30:1', 'call:100', 'call:abc:30'])
+def test_parse_legs_rejects_bad_legs(text):
+    with pytest.raises(ValueError):
+        parse_legs(text)
+
+def test_surface_rejects_unknown_leg_type():
+    with pytest.raises(ValueError, match='cal'):
+        pnl_surface(100, 0.3, [{'type': 'cal', 'strike': 100, 'days': 30, 'quantity': 1}])
+
+def test_covered_call_at_expiry():
+    surface, legs = pnl_surface(100, 0.3, strategy_legs('covered_call', 100, 30, 0.05))
+    premium = legs[1]['premium']
+    at_expiry = surface.iloc[:, -1]
+    assert surface.loc[100.0, 0] == pytest.approx(0, abs=1e-9)  # Marked at entry: flat at spot today
+    assert at_expiry.max() == pytest.approx((105 - 100 + premium) * CONTRACT_SIZE)
+    assert breakevens(at_expiry) == pytest.approx([100 - premium])
+
+def test_stock_legs_do_not_set_the_expiry():
+    surface, _ = pnl_surface(200, 0.3, parse_legs('stock:0:0:100,call:200:30:-1'))
+    assert surface.columns.tolist() == [0, 6, 12, 18, 24, 30]
+
+def test_cache_hit_skips_reading_prices(tmp_path, monkeypatch):
+    prices = tmp_path / 'AAA.csv'
+    dates = pd.bdate_range('2024-01-01', periods=40)
+    pd.DataFrame({'Date': dates, 'Close': 100 * 1.01 ** np.arange(40)}).to_csv(prices, index=False)
+    monkeypatch.setattr(option_scenarios, 'price_path', lambda ticker: str(prices))
+    first = scenario('AAA', cache_dir=str(tmp_path / 'cache'))
+
+    def fail(path):
+        raise AssertionError('prices read on a cache hit')
+    monkeypatch.setattr(option_scenarios, 'market_inputs', fail)
+    second = scenario('aaa', cache_dir=str(tmp_path / 'cache'))
+    pd.testing.assert_frame_equal(first['surface'], second['surface'])
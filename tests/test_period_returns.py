@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from period_returns import period_returns, period_to_date, ytd_return, cagr, relative_strength, summary
+
+@pytest.fixture
+def close():
+    """
+    AAA and SPY trade every weekday shown, BBB lists on 2024-01-03 and BTC
+    also trades on Saturday 2024-01-06.
+    """
+    dates = pd.to_datetime(['2023-12-28', '2023-12-29', '2024-01-02', '2024-01-03', '2024-01-05',
+                            '2024-01-06', '2024-01-08', '2024-01-09'])
+    nan = np.nan
+    return pd.DataFrame({
+        'AAA': [100, 110, 121, 110, 99, nan, 120, 132],
+        'BBB': [nan, nan, nan, 50, 55, nan, 60, 66],
+        'BTC': [10, 10, 10, 10, 10, 12, 12, 12],
+        'SPY': [200, 200, 210, 220, 200, nan, 220, 240],
+    }, index=dates, dtype=float)
+
+def test_week_to_date(close):
+    # Latest week (ending Fri 2024-01-12) vs the last close of the week ending 2024-01-05;
+    # BTC's Saturday bar already belongs to the new week
+    weekly = period_to_date(close, 'W-FRI')
+    assert weekly['AAA'] == pytest.approx(132 / 99 - 1)
+    assert weekly['BBB'] == pytest.approx(66 / 55 - 1)
+    assert weekly['BTC'] == pytest.approx(12 / 10 - 1)
+    assert weekly['SPY'] == pytest.approx(240 / 200 - 1)
+
+def test_month_to_date(close):
+    monthly = period_to_date(close, 'M')
+    assert monthly['AAA'] == pytest.approx(132 / 110 - 1)
+    assert monthly['SPY'] == pytest.approx(240 / 200 - 1)
+    assert np.isnan(monthly['BBB'])  # No December close to compare against
+
+def test_period_returns_series(close):
+    weekly = period_returns(close, 'W-FRI')['AAA']
+    assert list(weekly.index.astype(str)) == ['2023-12-23/2023-12-29', '2023-12-30/2024-01-05',
+                                             '2024-01-06/2024-01-12']
+    assert weekly.iloc[1] == pytest.approx(99 / 110 - 1)
+    assert weekly.iloc[2] == pytest.approx(132 / 99 - 1)
+
+def test_ytd(close):
+    ytd = ytd_return(close)
+    assert ytd['AAA'] == pytest.approx(132 / 110 - 1)
+    assert ytd['BBB'] == pytest.approx(66 / 50 - 1)  # Listed this year: from its first close
+    assert ytd['BTC'] == pytest.approx(12 / 10 - 1)
+
+def test_cagr(close):
+    growth = cagr(close)
+    assert growth['AAA'] == pytest.approx(1.32 ** (365.25 / 12) - 1)  # 12 calendar days
+    assert growth['BBB'] == pytest.approx((66 / 50) ** (365.25 / 6) - 1)  # 2024-01-03 to 01-09
+
+def test_relative_strength_on_benchmark_days(close):
+    # Window of 2 SPY trading days: 2024-01-05 -> 2024-01-09, BTC's Saturday skipped
+    rs = relative_strength(close, window=2)
+    assert pd.Timestamp('2024-01-06') not in rs.index
+    last = rs.iloc[-1]
+    assert last['AAA'] == pytest.approx((132 / 99) / (240 / 200) - 1)
+    assert last['BBB'] == pytest.approx((66 / 55) / (240 / 200) - 1)
+    assert last['BTC'] == pytest.approx((12 / 10) / (240 / 200) - 1)
+    assert last['SPY'] == pytest.approx(0)
+
+def test_summary_columns(close):
+    table = summary(close, window=2)
+    assert list(table.columns) == ['Weekly', 'Monthly', 'YTD', 'CAGR', 'Relative Strength']
+    assert table.loc['AAA', 'Weekly'] == pytest.approx(132 / 99 - 1)
+    assert table.loc['AAA', 'Relative Strength'] == pytest.approx((132 / 99) / 1.2 - 1)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_risk import load_holdings, holding_returns, simulate, risk_summary
+
+def _write(directory, ticker, dates, closes):
+    pd.DataFrame({'Date': dates, 'Close': closes}).to_csv(directory / f"{ticker}.csv", index=False)
+
+@pytest.fixture
+def price_dir(tmp_path):
+    weekdays = pd.bdate_range('2024-01-01', periods=30)
+    every_day = pd.date_range('2024-01-01', periods=42)
+    _write(tmp_path, 'AAA', weekdays, 100 * 1.01 ** np.arange(30))
+    _write(tmp_path, 'BBB', weekdays, 50 * 0.99 ** np.arange(30))
+    _write(tmp_path, 'BTC', every_day, 1000 + 10 * np.arange(42))
+    return tmp_path
+
+def test_returns_stay_on_the_exchange_calendar(price_dir):
+    returns = holding_returns(['AAA', 'BBB', 'BTC'], str(price_dir))
+    assert len(returns) == 30 and returns.index.dayofweek.max() < 5
+    assert returns['AAA'].iloc[1:].to_numpy() == pytest.approx(0.01)
+    # BTC's Saturday and Sunday moves fold into Monday's return
+    monday = pd.Timestamp('2024-01-08')
+    assert returns.loc[monday, 'BTC'] == pytest.approx(1070 / 1040 - 1)
+
+def test_holdings_keep_shorts_and_net_cash(price_dir, tmp_path_factory):
+    path = tmp_path_factory.mktemp('positions') / 'post_positions.csv'
+    pd.DataFrame({'account': ['x', 'x', 'x', 'y'], 'symbol': ['AAA', 'BBB', 'SPAXX**', 'AAA'],
+                  'value': [600, -200, 500, 400]}).to_csv(path, index=False)
+    holdings = load_holdings(str(path), str(price_dir))
+    assert holdings.to_dict() == {'AAA': 1000, 'BBB': -200, 'CASH': 500}
+
+def test_holdings_errors(tmp_path):
+    with pytest.raises(ValueError, match='no stored prices'):
+        load_holdings(str(tmp_path / 'missing.csv'), str(tmp_path))
+    path = tmp_path / 'post_positions.csv'
+    pd.DataFrame({'symbol': ['SPAXX**'], 'value': [-10]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match='not positive'):
+        load_holdings(str(path), str(tmp_path))
+
+def test_all_cash_has_no_risk(price_dir):
+    holdings = pd.Series({'AAA': 0.0, 'CASH': 1.0})
+    terminal, drawdown = simulate(holdings, holding_returns(['AAA'], str(price_dir)), 5, 1000, workers=1)
+    assert np.allclose(terminal, 0) and np.allclose(drawdown, 0)
+    assert risk_summary(terminal, drawdown).loc['VaR 95%', 'Percent'] == pytest.approx(0)
+
+def test_no_priced_holdings_is_flat(price_dir, tmp_path_factory):
+    path = tmp_path_factory.mktemp('positions') / 'post_positions.csv'
+    pd.DataFrame({'symbol': ['SPAXX**', 'PENDING'], 'value': [500, 100]}).to_csv(path, index=False)
+    holdings = load_holdings(str(path), str(price_dir))
+    assert holdings.to_dict() == {'CASH': 600}
+    returns = holding_returns(holdings.drop('CASH').index, str(price_dir))
+    assert returns.empty
+    for method in ('normal', 'bootstrap'):
+        terminal, drawdown = simulate(holdings, returns, 5, 100, method, workers=1)
+        assert len(terminal) == 100 and not terminal.any() and not drawdown.any()
+
+def test_bootstrap_needs_a_block_of_history(price_dir):
+    returns = holding_returns(['AAA'], str(price_dir), lookback=3)
+    with pytest.raises(ValueError, match='at least'):
+        simulate(pd.Series({'AAA': 1.0}), returns, 5, 100, 'bootstrap', workers=1)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from predictor_features import FEATURES, feature_panel, ticker_features, compute_features
+
+def _prices(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    volume = rng.integers(1_000, 5_000, len(dates)).astype(float)
+    return pd.DataFrame({'Close': close, 'Volume': volume}, index=pd.DatetimeIndex(dates, name='Date'))
+
+def test_weekend_ticker_does_not_change_stock_features():
+    universe = {
+        'AAA': _prices(pd.bdate_range('2023-01-02', periods=200), 1),
+        'BTC': _prices(pd.date_range('2023-01-01', periods=280), 2),
+    }
+    close = pd.DataFrame({t: df['Close'] for t, df in universe.items()}).sort_index()
+    volume = pd.DataFrame({t: df['Volume'] for t, df in universe.items()}).sort_index()
+    panel = feature_panel(close, volume)
+    for ticker, df in universe.items():
+        mixed = ticker_features(panel, ticker)
+        alone = compute_features(df)
+        assert len(mixed) > 100
+        pd.testing.assert_frame_equal(mixed, alone[FEATURES], check_names=False, check_freq=False)
+
+def test_outlier_cutoff_can_use_training_rows_only():
+    df = _prices(pd.bdate_range('2023-01-02', periods=200), 3)
+    moderate, spike = df.index[100], df.index[180]
+    df.loc[moderate:, 'Close'] *= 1.05  # A 5% move in the training history
+    df.loc[spike:, 'Close'] *= 2.0  # A doubling in the test block inflates the full-history std
+    panel = feature_panel(df[['Close']].rename(columns={'Close': 'T'}), df[['Volume']].rename(columns={'Volume': 'T'}))
+    full = ticker_features(panel, 'T')
+    train_only = ticker_features(panel, 'T', outliers_before=df.index[150])
+    assert moderate in full.index and moderate not in train_only.index
+    assert spike not in full.index and spike not in train_only.index
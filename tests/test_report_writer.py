@@ -0,0 +1,23 @@
+import pandas as pd
+
+from report_writer import CsvSink, column_widths, write_reports
+
+def test_column_widths_measure_every_value():
+    table = pd.DataFrame({'x': [-1.0, 0.1234, 2.0], 'Ticker': ['A', 'BBBB', None]})
+    assert column_widths(table, padding=0) == [6, 6]
+
+def test_failed_copy_is_reported_on_its_own(tmp_path):
+    blocker = tmp_path / 'not_a_dir'
+    blocker.write_text('')
+    table = pd.DataFrame({'Price': [1.5, 2.25]})
+    sink = CsvSink('CSV', [str(tmp_path / 'out' / 'report.csv')], [str(blocker / 'report.csv')])
+    status = write_reports(table, [sink], manifest_dir=str(tmp_path / 'out'))
+    assert status['CSV'] == 'written' and status['CSV copy'].startswith('failed')
+    assert (tmp_path / 'out' / 'report.csv').exists()
+
+    # The main file is unchanged next run; the copy is retried
+    blocker.unlink()
+    blocker.mkdir()
+    status = write_reports(table, [sink], manifest_dir=str(tmp_path / 'out'))
+    assert status == {'CSV': 'unchanged', 'CSV copy': 'written'}
+    assert (blocker / 'report.csv').read_bytes() == (tmp_path / 'out' / 'report.csv').read_bytes()
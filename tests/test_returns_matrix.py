@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from returns_matrix import build_returns, load_returns_matrix
+
+def _write(directory, ticker, closes):
+    directory.mkdir(exist_ok=True)
+    dates = pd.bdate_range('2024-01-01', periods=len(closes))
+    pd.DataFrame({'Date': dates, 'Close': closes}).to_csv(directory / f"{ticker}.csv", index=False)
+
+def test_later_directory_wins_on_duplicates(tmp_path):
+    first, second = tmp_path / 'sp500', tmp_path / 'sectors'
+    _write(first, 'AAA', [10, 11, 12])
+    _write(first, 'SPY', [100, 100, 100])
+    _write(second, 'SPY', [100, 110, 121])
+    _write(second, 'XLK', [50, 55, 50])
+    returns = build_returns((str(first), str(second), str(tmp_path / 'missing')))
+    assert list(returns.columns) == ['AAA', 'SPY', 'XLK']
+    assert returns['SPY'].iloc[1:].tolist() == pytest.approx([0.10, 0.10])
+    assert returns['AAA'].iloc[2] == pytest.approx(12 / 11 - 1)
+
+def test_period_change_uses_the_stored_closes(tmp_path):
+    prices = tmp_path / 'sp500'
+    _write(prices, 'SPY', [100, 101, 102])
+    _write(prices, 'AAA', [3.1, 7.3, 9.7])
+    matrix = load_returns_matrix((str(prices),), cache_dir=str(tmp_path / 'cache'))
+    assert matrix['period_change']['AAA'] == 9.7 / 3.1 - 1
+    assert matrix['period_change']['SPY'] == 102 / 100 - 1
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from sector_rotation import sector_breadth, write_rotation
+
+def test_breadth_is_float_and_rounds_on_write(tmp_path):
+    dates = pd.bdate_range('2024-01-01', periods=30)
+    close = pd.DataFrame({'AAA': np.linspace(10, 20, 30), 'BBB': np.linspace(20, 10, 30),
+                          'CCC': np.linspace(10, 30, 30), 'DDD': np.linspace(5, 6, 30)}, index=dates)
+    close.iloc[:5, 3] = np.nan  # DDD not listed yet
+    sector_map = pd.Series({'AAA': 'XLK', 'BBB': 'XLK', 'CCC': 'XLK', 'DDD': 'XLE'})
+    breadth = sector_breadth(close, sector_map, sma_window=5)
+    above = breadth['Above 5SMA']
+    assert (above.dtypes == np.float64).all()
+    assert (breadth['Advancing 21D'].dtypes == np.float64).all()
+    assert above['XLK'].iloc[-1] == 2 / 3
+    assert np.isnan(above['XLE'].iloc[5]) and above['XLE'].iloc[-1] == 1.0
+
+    write_rotation({'breadth': above}, str(tmp_path), decimals=4)
+    written = pd.read_csv(tmp_path / 'breadth.csv', index_col='Date')
+    assert written['XLK'].iloc[-1] == 0.6667
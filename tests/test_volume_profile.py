@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import load_prices
+from volume_profile import profile_levels, profile_universe, volume_profile
+
+def test_value_area_grows_contiguously_from_poc():
+    # Two volume clusters with a gap between them; the value area must not skip the gap
+    profile = np.array([0, 30, 0, 0, 40, 20, 10, 0], dtype=float)
+    edges = np.arange(9, dtype=float)
+    poc, val, vah = profile_levels(profile, edges, value_area=0.70)
+    assert poc == 4.5
+    # From bin 4 (40): take 5 (20) then 6 (10) -> 70 of 100, bins 1-3 stay out
+    assert (val, vah) == (4.0, 7.0)
+
+    # Many profiles with their own edges at once give the same answer row by row
+    profiles = np.stack([profile, profile[::-1]])
+    poc, val, vah = profile_levels(profiles, np.stack([edges, edges + 10]), value_area=0.70)
+    assert poc.tolist() == [4.5, 13.5]
+    assert val.tolist() == [4.0, 11.0] and vah.tolist() == [7.0, 14.0]
+
+def _write(directory, ticker, dates, closes, seed):
+    rng = np.random.default_rng(seed)
+    close = np.asarray(closes, dtype=float)
+    pd.DataFrame({'Date': dates, 'Open': close, 'High': close * (1 + rng.uniform(0, 0.02, len(close))),
+                  'Low': close * (1 - rng.uniform(0, 0.02, len(close))), 'Close': close,
+                  'Volume': rng.integers(1, 10_000, len(close))}).to_csv(directory / f"{ticker}.csv", index=False)
+
+@pytest.mark.parametrize('mode', ['close', 'range'])
+@pytest.mark.parametrize('window', [None, 20])
+def test_universe_matches_each_ticker_alone(tmp_path, mode, window):
+    rng = np.random.default_rng(0)
+    _write(tmp_path, 'AAA', pd.bdate_range('2024-01-01', periods=60), 50 + rng.normal(0, 1, 60).cumsum(), 1)
+    _write(tmp_path, 'BTC', pd.date_range('2024-01-10', periods=70), 900 + rng.normal(0, 9, 70).cumsum(), 2)
+    levels = profile_universe(str(tmp_path), bins=20, mode=mode, window=window)
+    for ticker in ('AAA', 'BTC'):
+        df = load_prices(ticker, str(tmp_path))
+        expected = profile_levels(*volume_profile(df, 20, mode, window))
+        assert levels.loc[ticker, ['POC', 'VAL', 'VAH']].tolist() == pytest.approx(expected)
+        assert levels.loc[ticker, 'Price'] == df['Close'].iloc[-1]
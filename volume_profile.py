@@ -0,0 +1,203 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from price_store import SP500_DIR, load_matrix
+
+BINS = 50
+VALUE_AREA = 0.70
+CHUNK_BYTES = 64 * 2**20  # Bound on the (date x ticker x bin) overlap array in range mode
+
+def price_edges(low, high, bins=BINS):
+    """Evenly spaced bin edges covering the full low..high price range"""
+    lo, hi = np.nanmin(low), np.nanmax(high)
+    if hi <= lo:
+        hi = lo + 1e-9
+    return np.linspace(lo, hi, bins + 1)
+
+def bar_contributions(close, volume, edges, high=None, low=None, mode='close'):
+    """
+    Volume each bar adds to each price bin, as an (n_bars x n_bins) matrix.
+
+    mode='close' puts the whole bar's volume in the bin of its close (one
+    bincount). mode='range' spreads it evenly over the bar's high-low range,
+    each bin getting the fraction of the range it overlaps; bars with no range
+    fall back to their close bin.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.nan_to_num(np.asarray(volume, dtype=np.float64))
+    n, bins = len(close), len(edges) - 1
+    idx = np.clip(np.searchsorted(edges, close, side='right') - 1, 0, bins - 1)
+    at_close = np.bincount(np.arange(n) * bins + idx, weights=volume, minlength=n * bins).reshape(n, bins)
+    at_close[np.isnan(close)] = 0.0
+    if mode == 'close':
+        return at_close
+    if mode != 'range':
+        raise ValueError(f"Unknown mode {mode!r}; use 'close' or 'range'")
+
+    high = np.asarray(high, dtype=np.float64)[:, None]
+    low = np.asarray(low, dtype=np.float64)[:, None]
+    span = high - low
+    overlap = np.clip(np.minimum(high, edges[1:]) - np.maximum(low, edges[:-1]), 0.0, None)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spread = overlap / span * volume[:, None]
+    flat = ~(span[:, 0] > 0)
+    spread[flat] = at_close[flat]
+    return np.nan_to_num(spread)
+
+def rolling_profiles(contributions, window):
+    """Profile of every trailing window of bars (n_bars x n_bins); rows before the first full window are NaN"""
+    csum = np.cumsum(contributions, axis=0)
+    out = np.full(contributions.shape, np.nan)
+    if window <= len(contributions):
+        out[window - 1] = csum[window - 1]
+        out[window:] = csum[window:] - csum[:-window]
+    return out
+
+def profile_levels(profiles, edges, value_area=VALUE_AREA):
+    """
+    Point of control and value area for one profile (n_bins,) or many (n, n_bins).
+
+    POC is the middle of the highest-volume bin. The value area grows outward
+    from the POC bin one bin at a time, taking whichever neighbour (above or
+    below) holds more volume, until it holds value_area of the volume, so it
+    is always one contiguous span. Every profile advances together, one numpy
+    step per bin. edges is shared (n_bins + 1,) or per profile (n, n_bins + 1).
+    Returns (poc, val, vah).
+    """
+    single = np.ndim(profiles) == 1
+    profiles = np.atleast_2d(profiles)
+    n, bins = profiles.shape
+    edges = np.broadcast_to(edges, (n, bins + 1))
+    rows = np.arange(n)
+    valid = np.nansum(profiles, axis=1) > 0
+    filled = np.nan_to_num(profiles)
+    target = filled.sum(axis=1) * value_area
+
+    top = np.argmax(filled, axis=1)
+    lo, hi = top.copy(), top.copy()
+    held = filled[rows, top]
+    for _ in range(bins - 1):
+        grow = valid & (held < target)
+        if not grow.any():
+            break
+        below = np.where(lo > 0, filled[rows, np.maximum(lo - 1, 0)], -1.0)
+        above = np.where(hi < bins - 1, filled[rows, np.minimum(hi + 1, bins - 1)], -1.0)
+        up = grow & (above >= below)
+        down = grow & ~up
+        hi += up
+        lo -= down
+        held += np.where(up, above, 0.0) + np.where(down, below, 0.0)
+
+    poc = np.where(valid, (edges[rows, top] + edges[rows, top + 1]) / 2, np.nan)
+    val = np.where(valid, edges[rows, lo], np.nan)
+    vah = np.where(valid, edges[rows, hi + 1], np.nan)
+    if single:
+        return poc[0], val[0], vah[0]
+    return poc, val, vah
+
+def volume_profile(df, bins=BINS, mode='close', window=None):
+    """
+    Volume profile of an OHLCV frame over its last window bars (all bars if None).
+
+    Returns (profile, edges) with profile the volume per price bin.
+    """
+    if window is not None:
+        df = df.iloc[-window:]
+    edges = price_edges(df['Low'], df['High'], bins)
+    contributions = bar_contributions(df['Close'], df['Volume'], edges, df['High'], df['Low'], mode)
+    return contributions.sum(axis=0), edges
+
+def rolling_levels(df, window=20, bins=BINS, mode='close', value_area=VALUE_AREA):
+    """
+    POC and value area of the trailing window at every bar, as a DataFrame.
+
+    Bins span the frame's whole price range so every window shares the same
+    edges and the rolling profiles are differences of one cumulative sum.
+    """
+    edges = price_edges(df['Low'], df['High'], bins)
+    contributions = bar_contributions(df['Close'], df['Volume'], edges, df['High'], df['Low'], mode)
+    poc, val, vah = profile_levels(rolling_profiles(contributions, window), edges, value_area)
+    return pd.DataFrame({'POC': poc, 'VAL': val, 'VAH': vah}, index=df.index)
+
+def universe_profiles(high, low, close, volume, bins=BINS, mode='close', window=None):
+    """
+    Volume profile of every column of aligned (date x ticker) arrays at once.
+
+    Each ticker gets its own bins over the price range of its bars (its last
+    window bars with a close when window is set). Returns (profiles, edges)
+    shaped (n_tickers, bins) and (n_tickers, bins + 1). mode='range' builds a
+    (date x ticker x bin) overlap array, so it runs over column chunks of at
+    most CHUNK_BYTES.
+    """
+    high, low, close, volume = (np.asarray(a, dtype=np.float64) for a in (high, low, close, volume))
+    used = ~np.isnan(close)
+    if window is not None:
+        used &= np.cumsum(used[::-1], axis=0)[::-1] <= window
+    volume = np.where(used, np.nan_to_num(volume), 0.0)
+    with np.errstate(all='ignore'):
+        lo = np.nanmin(np.where(used, low, np.nan), axis=0)
+        hi = np.nanmax(np.where(used, high, np.nan), axis=0)
+    hi = np.where(hi > lo, hi, lo + 1e-9)
+    edges = np.linspace(lo, hi, bins + 1, axis=1)
+    n_dates, n_tickers = close.shape
+
+    # Close bin of every bar, by one bincount over (ticker, bin)
+    steps = (hi - lo) / bins
+    with np.errstate(invalid='ignore'):
+        idx = np.clip(np.floor((close - lo) / steps), 0, bins - 1)
+    idx = np.where(used, idx, 0).astype(np.int64)
+    at_close = np.bincount((np.arange(n_tickers) * bins + idx).ravel(), weights=volume.ravel(),
+                           minlength=n_tickers * bins).reshape(n_tickers, bins)
+    if mode == 'close':
+        return at_close, edges
+    if mode != 'range':
+        raise ValueError(f"Unknown mode {mode!r}; use 'close' or 'range'")
+
+    span = high - low
+    flat = used & ~(span > 0)
+    flat_volume = np.where(flat, volume, 0.0)
+    profiles = np.bincount((np.arange(n_tickers) * bins + idx).ravel(), weights=flat_volume.ravel(),
+                           minlength=n_tickers * bins).reshape(n_tickers, bins)
+    density = np.where(used & ~flat, volume, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        density = np.nan_to_num(density / span)
+    chunk = max(1, CHUNK_BYTES // (n_dates * bins * 8))
+    for start in range(0, n_tickers, chunk):
+        part = slice(start, start + chunk)
+        overlap = np.clip(np.minimum(high[:, part, None], edges[None, part, 1:])
+                          - np.maximum(low[:, part, None], edges[None, part, :-1]), 0.0, None)
+        profiles[part] += np.einsum('dtb,dt->tb', np.nan_to_num(overlap), density[:, part])
+    return profiles, edges
+
+def profile_universe(directory=SP500_DIR, bins=BINS, mode='close', window=None, value_area=VALUE_AREA):
+    """
+    POC, value area and where the last close sits for every stored ticker.
+
+    Prices come from one aligned load_matrix read; the histograms and levels
+    of every ticker are computed together by universe_profiles and profile_levels.
+    """
+    matrix = load_matrix(directory, fields=('High', 'Low', 'Close', 'Volume'))
+    close = matrix['Close']
+    tickers = close.columns[close.notna().any()]
+    if tickers.empty:
+        return pd.DataFrame(columns=['Price', 'POC', 'VAL', 'VAH', 'PCT From POC', 'Position']).rename_axis('Ticker')
+    high, low, close, volume = (matrix[field][tickers] for field in ('High', 'Low', 'Close', 'Volume'))
+    profiles, edges = universe_profiles(high, low, close, volume, bins, mode, window)
+    poc, val, vah = profile_levels(profiles, edges, value_area)
+
+    price = close.ffill().iloc[-1].to_numpy()
+    levels = pd.DataFrame({'Price': price, 'POC': poc, 'VAL': val, 'VAH': vah,
+                           'PCT From POC': (price - poc) / poc * 100,
+                           'Position': np.where(price > vah, 'Above Value',
+                                                np.where(price < val, 'Below Value', 'In Value'))},
+                          index=pd.Index(tickers, name='Ticker'))
+    return levels
+
+if __name__ == '__main__':
+    mode = 'range' if '--range' in sys.argv else 'close'
+    levels = profile_universe(mode=mode)
+    os.makedirs('reports', exist_ok=True)
+    levels.round(2).to_csv(os.path.join('reports', 'volume_profile_levels.csv'))
+    print(levels.round(2).to_string())
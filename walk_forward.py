@@ -0,0 +1,133 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from price_store import SP500_DIR, list_tickers
+from predictor_features import load_features
+from predictor import (SEQUENCE_LENGTH, TRAIN_FRACTION, VAL_FRACTION, BATCH_SIZE, THREADS,
+                       fit_scaler, prepare_universe, configure_threads, fit_model,
+                       predict_windows, unscale_close, option)
+
+N_FOLDS = 5
+MIN_TRAIN = 0.5  # Share of the history in the first fold's training window
+REPORT_PATH = os.path.join('reports', 'walk_forward.csv')
+
+def fold_cutoffs(feature_sets, n_folds=N_FOLDS, min_train=MIN_TRAIN):
+    """
+    n_folds + 1 dates splitting the history after the first min_train share into
+    equal test blocks. Fold k trains on everything before cutoff k and is tested
+    on the targets from cutoff k up to cutoff k + 1.
+    """
+    dates = pd.DatetimeIndex(sorted(set().union(*(f.index for f in feature_sets.values()))))
+    positions = np.linspace(int(len(dates) * min_train), len(dates), n_folds + 1).astype(int)
+    return [dates[p] if p < len(dates) else dates[-1] + pd.Timedelta(days=1) for p in positions]
+
+def fold_index(prepared, train_end, test_end, seq_length=SEQUENCE_LENGTH):
+    """
+    (ticker position, window position) pairs of one fold, split on the date of
+    each window's target row: train/val before train_end (val the latest
+    VAL_FRACTION share of it, per ticker), test in [train_end, test_end).
+    """
+    val_share = VAL_FRACTION / (TRAIN_FRACTION + VAL_FRACTION)
+    index = {'train': [], 'val': [], 'test': []}
+    for position, item in enumerate(prepared.values()):
+        targets = item['features'].index[seq_length:]
+        n_train = int(np.searchsorted(targets, train_end))
+        n_test = int(np.searchsorted(targets, test_end)) - n_train
+        n_val = int(n_train * val_share)
+        parts = {'train': np.arange(n_train - n_val), 'val': np.arange(n_train - n_val, n_train),
+                 'test': np.arange(n_train, n_train + n_test)}
+        for name, part in parts.items():
+            index[name].append(np.column_stack([np.full(len(part), position), part]))
+    return {name: np.concatenate(parts).astype(np.int64) if parts else np.empty((0, 2), np.int64)
+            for name, parts in index.items()}
+
+def fold_metrics(actual, predicted, previous):
+    """RMSE, MAPE and directional accuracy of next-bar price predictions, plus a last-close baseline"""
+    error = predicted - actual
+    return {
+        'RMSE': np.sqrt(np.mean(error ** 2)),
+        'MAPE': np.mean(np.abs(error / actual)) * 100,
+        'Directional Accuracy': np.mean(np.sign(predicted - previous) == np.sign(actual - previous)) * 100,
+        'Naive RMSE': np.sqrt(np.mean((previous - actual) ** 2)),
+        'Naive MAPE': np.mean(np.abs((previous - actual) / actual)) * 100,
+    }
+
+def run_fold(tickers, directory, train_end, test_end, threads=1, epochs=100,
+             batch_size=BATCH_SIZE, seed=0, seq_length=SEQUENCE_LENGTH):
+    """
+    Train a fresh model on the history before train_end and score it on the
+    next-bar predictions up to test_end.
+
+    Runs in a worker process: features come from the per-ticker cache, with
+    the return outlier cutoff and the scalers both fitted on the training rows
+    only, so nothing from the test block leaks into the fold. Metrics are on prices, unscaled per ticker.
+    """
+    configure_threads(threads)
+    feature_sets = {t: f[f.index < test_end]
+                    for t, f in load_features(tickers, directory, outliers_before=train_end).items()}
+    scalers = {t: fit_scaler(f[f.index < train_end]) for t, f in feature_sets.items()
+               if (f.index < train_end).sum() > seq_length + 10}
+    prepared, _ = prepare_universe(feature_sets, seq_length, scalers=scalers)
+    index = fold_index(prepared, train_end, test_end, seq_length)
+    result = {'Train End': train_end, 'Test End': test_end, 'Tickers': len(prepared),
+              'Train Windows': len(index['train']), 'Test Windows': len(index['test'])}
+    if not len(index['train']) or not len(index['val']) or not len(index['test']):
+        return result
+
+    windows = [item['windows'] for item in prepared.values()]
+    start = time.time()
+    model = fit_model(windows, index, epochs, batch_size, seed, verbose=0)
+    result['Train Seconds'] = time.time() - start
+    predicted = predict_windows(model, windows, index['test'])
+
+    # Unscale per ticker; the previous close is the last row of each input window
+    items = list(prepared.values())
+    actual, prices, previous = (np.empty(len(predicted)) for _ in range(3))
+    for position in np.unique(index['test'][:, 0]):
+        rows = index['test'][:, 0] == position
+        w = index['test'][rows, 1]
+        close = items[position]['features']['Close'].to_numpy()
+        prices[rows] = unscale_close(items[position]['scaler'], predicted[rows])
+        actual[rows] = close[w + seq_length]
+        previous[rows] = close[w + seq_length - 1]
+    result.update(fold_metrics(actual, prices, previous))
+    return result
+
+def walk_forward(tickers=None, directory=SP500_DIR, n_folds=N_FOLDS, min_train=MIN_TRAIN,
+                 workers=None, epochs=100, seed=0):
+    """
+    Expanding-window backtest of the forecaster, one fold per worker process.
+
+    The feature cache is filled once up front so every worker reads it instead
+    of recomputing; CPU threads are split evenly between the workers. Returns
+    one row of metrics per fold.
+    """
+    tickers = list_tickers(directory) if tickers is None else tickers
+    cutoffs = fold_cutoffs(load_features(tickers, directory), n_folds, min_train)
+    workers = min(workers or THREADS, n_folds)
+    threads = max(1, THREADS // workers)
+
+    # Spawned workers start without the parent's TensorFlow state
+    with ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as pool:
+        futures = [pool.submit(run_fold, tickers, directory, cutoffs[k], cutoffs[k + 1],
+                               threads, epochs, BATCH_SIZE, seed + k)
+                   for k in range(n_folds)]
+        results = [future.result() for future in futures]
+    return pd.DataFrame(results, index=pd.RangeIndex(1, n_folds + 1, name='Fold'))
+
+if __name__ == '__main__':
+    # python walk_forward.py [--dir DIR] [--tickers A,B] [--folds N] [--workers N] [--epochs N]
+    directory = option('--dir', SP500_DIR)
+    tickers = option('--tickers', None)
+    report = walk_forward(tickers.upper().split(',') if tickers else None, directory,
+                          n_folds=int(option('--folds', N_FOLDS)),
+                          workers=int(option('--workers', 0)) or None,
+                          epochs=int(option('--epochs', 100)))
+    print(report.round(3).to_string())
+    os.makedirs('reports', exist_ok=True)
+    report.round(4).to_csv(REPORT_PATH)
+    print(f"\nSaved to {REPORT_PATH}")
@@ -0,0 +1,78 @@
+import os
+import numpy as np
+import pandas as pd
+
+from directionalchange import directional_change_batch
+from price_store import SP500_DIR, list_tickers, load_matrix, data_version
+
+# Retracement thresholds for the multi-scale zigzag
+SIGMAS = (0.01, 0.02, 0.03, 0.05, 0.08, 0.13)
+CACHE_DIR = 'cache'
+
+def build_zigzag_features(close, high, low, sigmas=SIGMAS):
+    """
+    Directional change extremes for every ticker and sigma in one batched pass.
+
+    close/high/low are aligned (date x ticker) frames. Returns one row per
+    (ticker, sigma, event) with the extreme and confirmation dates, the
+    confirmation lag in bars and the swing size relative to the previous extreme.
+    """
+    sigmas = np.asarray(sigmas, dtype=np.float64)
+    conf_i, ext_i, ext_p, ext_type, counts = directional_change_batch(
+        close.to_numpy(), high.to_numpy(), low.to_numpy(), sigmas
+    )
+    n_series, n_sigma, n_bars = conf_i.shape
+
+    # Flatten the filled part of every (ticker, sigma) lane
+    filled = np.arange(n_bars) < counts[..., None]
+    series_idx, sigma_idx, event = np.nonzero(filled)
+    conf = conf_i[filled]
+    ext = ext_i[filled]
+    price = ext_p[filled]
+
+    # Swing relative to the previous extreme of the same lane (NaN for the first event)
+    prev_price = np.full(len(price), np.nan)
+    prev_price[1:] = price[:-1]
+    prev_price[event == 0] = np.nan
+
+    dates = close.index.to_numpy()
+    return pd.DataFrame({
+        'ticker': pd.Categorical.from_codes(series_idx, categories=list(close.columns)),
+        'sigma': sigmas[sigma_idx].astype(np.float32),
+        'event': event.astype(np.int32),
+        'type': ext_type[filled],
+        'ext_date': dates[ext],
+        'conf_date': dates[conf],
+        'ext_p': price,
+        'conf_lag': (conf - ext).astype(np.int32),
+        'swing': (price / prev_price - 1).astype(np.float32),
+    })
+
+def load_zigzag_features(directory=SP500_DIR, sigmas=SIGMAS, cache_dir=CACHE_DIR):
+    """
+    Zigzag feature table for every ticker in directory, cached on disk.
+
+    The cache is rebuilt only when the price files' content or the sigma grid changes.
+    """
+    tickers = list_tickers(directory)
+    version = data_version(directory, tickers)
+    sigmas = tuple(float(s) for s in sigmas)
+    cache_file = os.path.join(cache_dir, f"zigzag_{os.path.basename(os.path.normpath(directory))}.pkl")
+
+    if os.path.exists(cache_file):
+        cached = pd.read_pickle(cache_file)
+        if cached['version'] == version and cached['sigmas'] == sigmas:
+            return cached['table']
+
+    prices = load_matrix(directory, fields=('Close', 'High', 'Low'), tickers=tickers)
+    table = build_zigzag_features(prices['Close'], prices['High'], prices['Low'], sigmas)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    pd.to_pickle({'version': version, 'sigmas': sigmas, 'table': table}, cache_file)
+    return table
+
+if __name__ == '__main__':
+    features = load_zigzag_features()
+    print(features.groupby('sigma', observed=True).agg(events=('event', 'size'),
+                                                       median_lag=('conf_lag', 'median'),
+                                                       median_swing=('swing', lambda s: s.abs().median())))